@@ -1,22 +1,32 @@
 import os
+import math
+import asyncio
 import time
-import hashlib
-from typing import List
+import json
+from typing import Any, AsyncIterator, Dict, List
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File, Form, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi.responses import StreamingResponse
 
 from app.core.config import settings
-from app.schemas.analysis import AnalysisRequest, AnalysisResponse, AnalysisResult
-from app.services.analysis_service import run_analysis_task, get_job_status
+from app.db.job_store import job_store, make_job_id
+from app.schemas.analysis import AnalysisRequest, AnalysisResponse, AnalysisResult, JobQueueStats
+from app.services.analysis_service import (
+    submit_analysis_job,
+    cancel_analysis_job,
+    find_reusable_job,
+    get_job_status,
+    get_queue_stats as get_job_queue_stats,
+)
+from app.services.job_progress import TERMINAL_STATUSES, job_progress
+from app.services.job_scheduler import DuplicateJob, JobQueueFull
+from app.services.result_index import compute_analysis_fingerprint
 
 router = APIRouter()
 
 
 @router.post("", response_model=AnalysisResponse)
-async def analyze_documents(
-    request: AnalysisRequest,
-    background_tasks: BackgroundTasks
-):
+async def analyze_documents(request: AnalysisRequest):
     """Start analysis of SOP against regulatory documents."""
     # Validate files exist
     if not os.path.exists(request.sop_file):
@@ -26,21 +36,119 @@ async def analyze_documents(
         if not os.path.exists(reg_file):
             raise HTTPException(status_code=404, detail=f"Regulatory file not found: {reg_file}")
     
+    # Reuse an identical analysis that is in flight or already completed
+    fingerprint = await asyncio.to_thread(
+        compute_analysis_fingerprint, request.sop_file, request.regulatory_files
+    )
+    if request.reuse:
+        existing_job_id = find_reusable_job(fingerprint)
+        if existing_job_id is not None:
+            existing_job = get_job_status(existing_job_id)
+            completed = existing_job["status"] == "completed"
+            return AnalysisResponse(
+                job_id=existing_job_id,
+                status=existing_job["status"],
+                message=(
+                    "Identical analysis already completed"
+                    if completed
+                    else "Attached to identical analysis in progress"
+                ),
+            )
+    
     # Generate job ID
-    job_id = f"job_{int(time.time())}_{hashlib.md5(request.sop_file.encode()).hexdigest()[:8]}"
+    job_id = make_job_id("job")
     
-    # Start background task
-    background_tasks.add_task(
-        run_analysis_task,
-        request.sop_file,
-        request.regulatory_files,
-        job_id
-    )
+    # Queue the job, rejecting it if the queue is full
+    try:
+        submit_analysis_job(
+            request.sop_file,
+            request.regulatory_files,
+            job_id,
+            priority=request.priority,
+            fingerprint=fingerprint,
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many analysis jobs queued, please retry later",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except DuplicateJob as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
-    return AnalysisResponse(
-        job_id=job_id,
-        status="processing",
-        message="Analysis started in background"
+    return AnalysisResponse(job_id=job_id, status="queued", message="Analysis queued")
+
+
+@router.get("/queue", response_model=JobQueueStats)
+async def get_queue_stats():
+    """Get job queue depth, wait times and job counts."""
+    return JobQueueStats(**get_job_queue_stats())
+
+
+@router.post("/cancel/{job_id}", response_model=AnalysisResponse)
+async def cancel_analysis(job_id: str):
+    """Cancel a queued or running analysis job."""
+    if not cancel_analysis_job(job_id):
+        if get_job_status(job_id) is None:
+            raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+        raise HTTPException(status_code=409, detail=f"Job is not queued or running: {job_id}")
+    
+    return AnalysisResponse(job_id=job_id, status="cancelled", message="Analysis cancelled")
+
+
+def _format_event(event: Dict[str, Any]) -> str:
+    """Format a progress event as a Server-Sent Event."""
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _stored_status_events(job_id: str, status: str) -> AsyncIterator[str]:
+    """Stream a job's status changes from the job store, for jobs run by another worker.
+    
+    Only status events are sent, as stage progress is published where the job runs.
+    """
+    yield _format_event({"event": "snapshot", "job_id": job_id, "status": status})
+    while status not in TERMINAL_STATUSES:
+        await asyncio.sleep(settings.JOB_STATUS_POLL_INTERVAL)
+        current = await asyncio.to_thread(job_store.get_status, job_id)
+        if current is None:
+            return
+        if current == status:
+            yield ": keep-alive\n\n"
+            continue
+        status = current
+        yield _format_event(
+            {"event": "status", "job_id": job_id, "status": status, "time": time.time()}
+        )
+
+
+@router.get("/events/{job_id}")
+async def stream_analysis_events(job_id: str):
+    """
+    Stream the progress of an analysis job as Server-Sent Events.
+    
+    The job's current state is sent first as a ``snapshot`` event, followed by
+    ``status``, ``stage`` and ``progress`` events until the job finishes.
+    """
+    job_info = get_job_status(job_id)
+    if job_info is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        if job_progress.snapshot(job_id) is None:
+            # Job run by another process, or finished before this process started
+            async for message in _stored_status_events(job_id, job_info["status"]):
+                yield message
+            return
+        async for event in job_progress.subscribe(job_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield _format_event(event)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -64,8 +172,12 @@ async def get_analysis_status(job_id: str):
             status="failed",
             error=job_info.get("error", "Unknown error")
         )
+    elif job_info["status"] in ("queued", "cancelled"):
+        return AnalysisResult(
+            job_id=job_id, status=job_info["status"], queue_position=job_info.get("queue_position")
+        )
     
     return AnalysisResult(
         job_id=job_id,
         status="processing"
-    ) 
\ No newline at end of file
+    ) 
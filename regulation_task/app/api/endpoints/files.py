@@ -1,4 +1,5 @@
 import os
+import math
 import hashlib
 import time
 import shutil
@@ -9,9 +10,26 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Backgro
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
-from app.schemas.files import FileInfo, FileUploadResponse, FileDeleteResponse
+from app.db.job_store import make_job_id
+from app.schemas.files import (
+    FileInfo,
+    FileUploadResponse,
+    FileDeleteResponse,
+    IngestRequest,
+    IngestResponse,
+    IngestStatus,
+)
 from app.utils.document_processing import get_file_hash, get_processed_file_path
-from app.db.vector_store import setup_vector_db, remove_document_from_db, get_indexed_documents
+from app.db.vector_store import get_vector_db, remove_document_from_db
+from app.services.analysis_service import forget_analysis_job
+from app.services.ingestion_service import (
+    cancel_document_ingest,
+    get_ingest_status,
+    start_document_ingest,
+    submit_ingest_job,
+)
+from app.services.job_scheduler import DuplicateJob, JobQueueFull
+from app.services.report_catalog import report_catalog
 
 router = APIRouter()
 
@@ -169,9 +187,24 @@ async def upload_sop(files: List[UploadFile] = File(...)):
     return results
 
 
+def _ingest_uploaded_document(file_path: Path, content_hash: str) -> dict:
+    """Start indexing an uploaded regulatory document in the background.
+    
+    Returns the ingest job fields of the upload response.
+    """
+    if not settings.INGEST_ON_UPLOAD:
+        return {}
+    try:
+        ingest = start_document_ingest(str(file_path), get_vector_db(), doc_id=content_hash)
+        return {"ingest_job_id": ingest["job_id"], "ingest_status": ingest["status"]}
+    except Exception as e:
+        print(f"Warning: Could not start ingest of {file_path}: {e}")
+        return {}
+
+
 @router.post("/upload/regulatory", response_model=List[FileUploadResponse])
 async def upload_regulatory(files: List[UploadFile] = File(...)):
-    """Upload one or more regulatory documents."""
+    """Upload one or more regulatory documents and start indexing them in the background."""
     results = []
     
     # Validate that files list is not empty
@@ -221,12 +254,15 @@ async def upload_regulatory(files: List[UploadFile] = File(...)):
                 if os.path.isfile(existing_path):
                     existing_hash = get_file_hash(str(existing_path))
                     if existing_hash == content_hash:
-                        results.append(FileUploadResponse(
-                            filename=existing_file,
-                            path=str(existing_path),
-                            size=os.path.getsize(existing_path),
-                            message="This document is already in our system"
-                        ))
+                        results.append(
+                            FileUploadResponse(
+                                filename=existing_file,
+                                path=str(existing_path),
+                                size=os.path.getsize(existing_path),
+                                message="This document is already in our system",
+                                **_ingest_uploaded_document(existing_path, content_hash),
+                            )
+                        )
                         break
             else:  # No duplicate found
                 # Check if a file with the same name exists but with different content
@@ -240,23 +276,32 @@ async def upload_regulatory(files: List[UploadFile] = File(...)):
                     with open(file_path, "wb") as f:
                         f.write(content)
                     
-                    results.append(FileUploadResponse(
-                        filename=new_filename,
-                        path=str(file_path),
-                        size=len(content),
-                        message=f"A different file with the same name already exists. Your file was saved as {new_filename}"
-                    ))
+                    results.append(
+                        FileUploadResponse(
+                            filename=new_filename,
+                            path=str(file_path),
+                            size=len(content),
+                            message=(
+                                "A different file with the same name already exists. "
+                                f"Your file was saved as {new_filename}"
+                            ),
+                            **_ingest_uploaded_document(file_path, content_hash),
+                        )
+                    )
                 else:
                     # Save the file with original name
                     file_path = settings.REGULATORY_DOCS_DIR / original_filename
                     with open(file_path, "wb") as f:
                         f.write(content)
                     
-                    results.append(FileUploadResponse(
-                        filename=original_filename,
-                        path=str(file_path),
-                        size=len(content)
-                    ))
+                    results.append(
+                        FileUploadResponse(
+                            filename=original_filename,
+                            path=str(file_path),
+                            size=len(content),
+                            **_ingest_uploaded_document(file_path, content_hash),
+                        )
+                    )
         except Exception as e:
             results.append(FileUploadResponse(
                 filename=file.filename,
@@ -337,22 +382,13 @@ async def delete_sop(filename: str):
         # Try to clean up reports
         deleted_reports = 0
         try:
-            for report_file in os.listdir(settings.REPORTS_DIR):
-                if report_file.endswith(".json") and not report_file.endswith("_status.json"):
-                    report_path = settings.REPORTS_DIR / report_file
-                    try:
-                        with open(report_path, "r") as f:
-                            import json
-                            report_data = json.load(f)
-                            if report_data.get("sop_file") == filename:
-                                os.remove(report_path)
-                                deleted_reports += 1
-                                # Also remove status file if it exists
-                                status_file = settings.REPORTS_DIR / f"{report_file.split('.')[0]}_status.json"
-                                if os.path.exists(status_file):
-                                    os.remove(status_file)
-                    except Exception as e:
-                        print(f"Warning: Error processing report file {report_file}: {e}")
+            for job_id in report_catalog.find_job_ids(filename):
+                try:
+                    if report_catalog.delete_report(job_id):
+                        deleted_reports += 1
+                    forget_analysis_job(job_id)
+                except Exception as e:
+                    print(f"Warning: Error deleting report {job_id}: {e}")
         except Exception as e:
             print(f"Warning: Error cleaning up reports: {e}")
         
@@ -380,21 +416,23 @@ async def delete_sop(filename: str):
         )
 
 
-def cleanup_vector_db_for_document(doc_id: str):
+def cleanup_vector_db_for_document(filename: str):
     """Background task to clean up vector database entries for a document.
     
     This function is designed to be run as a background task.
     """
     try:
-        print(f"Starting background cleanup of vector DB for document {doc_id}")
-        db = setup_vector_db()
-        result = remove_document_from_db(doc_id, db)
+        print(f"Starting background cleanup of vector DB for document {filename}")
+        db = get_vector_db()
+        result = remove_document_from_db(filename, db)
         if result:
-            print(f"Successfully removed document {doc_id} from vector database in background task")
+            print(
+                f"Successfully removed document {filename} from vector database in background task"
+            )
         else:
-            print(f"Document {doc_id} was not found in vector database or could not be removed")
+            print(f"Document {filename} was not found in vector database or could not be removed")
     except Exception as e:
-        print(f"Error in background cleanup of vector DB for document {doc_id}: {e}")
+        print(f"Error in background cleanup of vector DB for document {filename}: {e}")
 
 
 @router.delete("/regulatory/{filename}")
@@ -409,13 +447,8 @@ async def delete_regulatory(filename: str, background_tasks: BackgroundTasks):
                 content={"detail": f"File not found: {filename}"}
             )
         
-        # Calculate file hash before deletion to clean up vector DB
-        doc_id = None
-        try:
-            doc_id = get_file_hash(str(file_path))
-            print(f"Document ID for vector DB cleanup: {doc_id}")
-        except Exception as e:
-            print(f"Warning: Could not calculate file hash: {e}")
+        # Stop a background ingest of the document, waiting for its index writes to end
+        await cancel_document_ingest(str(file_path))
         
         # Delete the actual file
         try:
@@ -439,14 +472,13 @@ async def delete_regulatory(filename: str, background_tasks: BackgroundTasks):
         except Exception as e:
             print(f"Warning: Could not delete processed file: {e}")
         
-        # Schedule vector DB cleanup as a background task if we have the document ID
+        # Schedule vector DB cleanup as a background task; clauses are found by source
         vector_db_cleanup_scheduled = False
-        if doc_id:
-            try:
-                background_tasks.add_task(cleanup_vector_db_for_document, doc_id)
-                vector_db_cleanup_scheduled = True
-            except Exception as e:
-                print(f"Warning: Could not schedule vector DB cleanup: {e}")
+        try:
+            background_tasks.add_task(cleanup_vector_db_for_document, filename)
+            vector_db_cleanup_scheduled = True
+        except Exception as e:
+            print(f"Warning: Could not schedule vector DB cleanup: {e}")
         
         message = f"Regulatory document '{filename}' has been deleted"
         if vector_db_cleanup_scheduled:
@@ -467,6 +499,49 @@ async def delete_regulatory(filename: str, background_tasks: BackgroundTasks):
             content={
                 "filename": filename,
                 "success": False,
-                "message": f"Error deleting file: {str(e)}"
-            }
-        ) 
\ No newline at end of file
+                "message": f"Error deleting file: {str(e)}",
+            },
+        )
+
+
+@router.post("/ingest", response_model=IngestResponse)
+async def ingest_regulatory(ingest_request: IngestRequest):
+    """Index every regulatory document in a directory ahead of analyses."""
+    directory = (
+        Path(ingest_request.directory) if ingest_request.directory else settings.REGULATORY_DOCS_DIR
+    )
+    directory = directory.resolve()
+    if not directory.is_relative_to(settings.DATA_DIR.resolve()):
+        raise HTTPException(status_code=400, detail="Directory must be within the data directory")
+    if not directory.is_dir():
+        raise HTTPException(status_code=404, detail=f"Directory not found: {directory}")
+    
+    job_id = make_job_id("ingest")
+    try:
+        submit_ingest_job(directory, get_vector_db(), job_id, force=ingest_request.force)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many jobs queued, please retry later",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except DuplicateJob as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return IngestResponse(job_id=job_id, status="queued", message="Ingest queued")
+
+
+@router.get("/ingest/{job_id}", response_model=IngestStatus)
+async def get_ingest_job_status(job_id: str):
+    """Get the status and progress of an ingest job."""
+    status_data = get_ingest_status(job_id)
+    if status_data is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job not found: {job_id}")
+    return IngestStatus(
+        job_id=job_id,
+        **{
+            key: status_data[key]
+            for key in ("status", "progress", "summary", "error")
+            if key in status_data
+        },
+    )
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.metrics import JOB_QUEUE_DEPTH, JOBS_IN_FLIGHT, metrics
+from app.services.analysis_service import get_queue_stats
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Expose pipeline, job queue, cache and HTTP metrics in Prometheus text format."""
+    # The job scheduler's jobs, or the durable queue's when workers run the analyses
+    stats = get_queue_stats()
+    JOB_QUEUE_DEPTH.set(stats["queued"])
+    JOBS_IN_FLIGHT.set(stats["running"])
+
+    return PlainTextResponse(generate_latest(metrics), media_type=CONTENT_TYPE_LATEST)
@@ -1,46 +1,56 @@
 import os
 import json
-from typing import List
+import asyncio
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.db.job_store import job_store
 from app.schemas.reports import ReportSummary
+from app.services.analysis_service import forget_analysis_job
+from app.services.report_catalog import SORT_COLUMNS, report_catalog
 
 router = APIRouter()
 
+
 @router.get("", response_model=List[ReportSummary])
-async def list_reports():
-    """List all analysis reports."""
-    reports = []
-    for file in os.listdir(settings.REPORTS_DIR):
-        if file.endswith(".json") and not file.endswith("_status.json"):
-            file_path = settings.REPORTS_DIR / file
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    report_data = json.load(f)
-                
-                # Extract compliance score from analysis if available
-                compliance_score = None
-                if "analysis" in report_data and "compliance_score" in report_data["analysis"]:
-                    compliance_score = report_data["analysis"]["compliance_score"]
-                elif "compliance_score" in report_data:
-                    compliance_score = report_data["compliance_score"]
-                
-                reports.append(ReportSummary(
-                    job_id=report_data.get("job_id", file.replace(".json", "")),
-                    sop_file=report_data.get("sop_file", "Unknown"),
-                    timestamp=report_data.get("timestamp", os.path.getmtime(file_path)),
-                    status="completed" if "analysis" in report_data else "failed",
-                    compliance_score=compliance_score
-                ))
-            except Exception as e:
-                print(f"Error reading report {file}: {e}")
+async def list_reports(
+    response: Response,
+    offset: int = Query(0, ge=0, description="Number of reports to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of reports to return"),
+    sort: str = Query("timestamp", description=f"Sort field: {', '.join(SORT_COLUMNS)}"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
+    sop_file: Optional[str] = Query(None, description="Only reports for this SOP file name"),
+    status: Optional[str] = Query(
+        None, description="Only reports with this status (completed/failed)"
+    ),
+    min_score: Optional[int] = Query(None, description="Minimum compliance score"),
+    max_score: Optional[int] = Query(None, description="Maximum compliance score"),
+):
+    """List analysis reports, newest first by default.
+    
+    The total number of matching reports is returned in the X-Total-Count header.
+    """
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=400, detail=f"Cannot sort by {sort}; use one of {', '.join(SORT_COLUMNS)}"
+        )
     
-    # Sort by timestamp, newest first
-    reports.sort(key=lambda x: x.timestamp, reverse=True)
-    return reports
+    reports, total = await asyncio.to_thread(
+        report_catalog.list_reports,
+        offset=offset,
+        limit=limit,
+        sort=sort,
+        descending=order == "desc",
+        sop_file=sop_file,
+        status=status,
+        min_score=min_score,
+        max_score=max_score,
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return [ReportSummary(**report) for report in reports]
 
 
 @router.get("/{job_id}")
@@ -65,17 +75,16 @@ async def delete_report(job_id: str):
     report_path = settings.REPORTS_DIR / f"{job_id}.json"
     status_path = settings.REPORTS_DIR / f"{job_id}_status.json"
     
-    if not os.path.exists(report_path) and not os.path.exists(status_path):
+    known_job = job_store.get_status(job_id) is not None
+    if not os.path.exists(report_path) and not os.path.exists(status_path) and not known_job:
         raise HTTPException(status_code=404, detail=f"Report not found: {job_id}")
     
     try:
-        # Delete report file if it exists
-        if os.path.exists(report_path):
-            os.remove(report_path)
+        # Delete the report, its status file and its catalog entry
+        report_catalog.delete_report(job_id)
         
-        # Delete status file if it exists
-        if os.path.exists(status_path):
-            os.remove(status_path)
+        # Drop the cached status and stop identical requests from reusing the report
+        forget_analysis_job(job_id)
         
         return JSONResponse(
             status_code=200,
@@ -93,4 +102,4 @@ async def delete_report(job_id: str):
                 "success": False,
                 "message": f"Error deleting report: {str(e)}"
             }
-        ) 
\ No newline at end of file
+        ) 
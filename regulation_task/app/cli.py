@@ -1,16 +1,24 @@
 import os
+import sys
 import time
+import asyncio
+import argparse
 import hashlib
 from pathlib import Path
+from typing import Optional, Union
 
-from app.core.config import settings
+from app.core.config import ensure_data_dirs, settings
+from app.db.vector_store import get_vector_db
 from app.services.analysis_service import process_documents_and_analyze
-
+from app.services.extraction_pool import extraction_pool
+from app.services.ingestion_service import ingest_directory
+from app.services.llm_backends import close_llm_clients
 
 async def run_cli_analysis():
     """Run analysis from command line."""
     print(f"{settings.PROJECT_NAME}")
     print("=" * len(settings.PROJECT_NAME))
+    ensure_data_dirs()
     
     # Check for SOP file
     sop_file = settings.DEFAULT_SOP_PATH
@@ -39,7 +47,11 @@ async def run_cli_analysis():
     job_id = f"cli_job_{int(time.time())}"
     
     print("\nStarting analysis...")
-    result = await process_documents_and_analyze(sop_file, regulatory_files, job_id)
+    try:
+        result = await process_documents_and_analyze(sop_file, regulatory_files, job_id)
+    finally:
+        extraction_pool.shutdown()
+        await close_llm_clients()
     
     print("\nAnalysis complete!")
     print(f"Report saved to: {settings.REPORTS_DIR / f'{job_id}.json'}")
@@ -58,4 +70,78 @@ async def run_cli_analysis():
         
         print("\nTop Recommendations:")
         for i, adjustment in enumerate(analysis.get("recommended_adjustments", [])[:3]):
-            print(f"{i+1}. {adjustment.get('explanation', 'Unknown recommendation')}") 
\ No newline at end of file
+            print(f"{i+1}. {adjustment.get('explanation', 'Unknown recommendation')}")
+
+
+async def run_cli_ingest(directory: Optional[Union[str, Path]] = None, force: bool = False):
+    """Index every regulatory document in a directory from the command line."""
+    docs_dir = Path(directory) if directory else settings.REGULATORY_DOCS_DIR
+    if not docs_dir.is_dir():
+        print(f"Directory not found: {docs_dir}")
+        return
+    
+    print(f"Ingesting regulatory documents from {docs_dir}")
+    ensure_data_dirs()
+    
+    def print_progress(counts):
+        done = counts["files_indexed"] + counts["files_failed"]
+        pending = counts["files_total"] - counts["files_skipped"]
+        print(
+            f"[{done}/{pending}] {Path(counts['file']).name}: "
+            f"{counts['clauses_indexed']} clauses indexed, {counts['files_failed']} failed"
+        )
+    
+    try:
+        summary = await ingest_directory(
+            docs_dir, get_vector_db(), force=force, on_progress=print_progress
+        )
+    finally:
+        extraction_pool.shutdown()
+    
+    print("\nIngest complete!")
+    print(
+        f"Files: {summary['files_indexed']} indexed, {summary['files_skipped']} already indexed, "
+        f"{summary['files_failed']} failed of {summary['files_total']}"
+    )
+    print(
+        f"Clauses: {summary['clauses_indexed']} indexed ({summary['clauses_added']} embedded, "
+        f"{summary['clauses_removed']} removed) in batches of {summary['batch_size']}"
+    )
+    print(
+        f"Throughput: {summary['clauses_per_second']:.1f} clauses/sec "
+        f"over {summary['seconds']:.1f}s"
+    )
+    for failure in summary["failures"]:
+        print(f"Failed: {failure['file']}: {failure['error']}")
+    if summary["failures"]:
+        print("Run the ingest again to retry the failed documents.")
+
+
+def main(argv=None):
+    """Run the CLI: an analysis of the default documents, or an ingest with --ingest.
+
+    The CLI does not import FastAPI or the other web dependencies, so it starts faster
+    than the server: ``python -m app.cli [--ingest [DIRECTORY]] [--force]``.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=settings.PROJECT_NAME)
+    parser.add_argument("--cli", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--ingest",
+        nargs="?",
+        const="",
+        metavar="DIRECTORY",
+        help="index the regulatory documents in a directory (default: the regulatory directory)",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="re-index documents that are already indexed"
+    )
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    
+    if args.ingest is not None:
+        asyncio.run(run_cli_ingest(args.ingest or None, force=args.force))
+    else:
+        asyncio.run(run_cli_analysis())
+
+
+if __name__ == "__main__":
+    main()
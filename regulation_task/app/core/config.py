@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -43,11 +44,100 @@ class Settings(BaseSettings):
     CHUNK_OVERLAP: int = 200
     TOP_K_CLAUSES: int = 5
     
+    # Vector store settings
+    # "sharded" keeps one collection per regulation; "single" one for all
+    VECTOR_STORE_LAYOUT: str = "sharded"
+    # Regulation collections searched in parallel in the sharded layout
+    VECTOR_SEARCH_WORKERS: int = 8
+    
+    # Analysis settings
+    # "map_reduce" analyzes every SOP section; "single" sends one prompt
+    ANALYSIS_MODE: str = "map_reduce"
+    ANALYSIS_SECTION_CHARS: int = 8000  # Maximum SOP characters per map-reduce section
+    
+    # Prompt context settings
+    CONTEXT_TOKEN_BUDGET: int = 6000  # Tokens of SOP text and clauses per analysis prompt
+    CONTEXT_SOP_SHARE: float = 0.5  # Share of the budget reserved for SOP text
+    CONTEXT_DEDUP_THRESHOLD: float = 0.9  # Word-trigram similarity at which clauses are duplicates
+    TOKENIZER_ENCODING: str = "cl100k_base"
+    
+    # Job scheduler settings
+    JOB_WORKERS: int = 2  # Analysis jobs run at the same time
+    JOB_QUEUE_SIZE: int = 20  # Jobs allowed to wait before submissions are rejected with 429
+    # Finished jobs kept in memory (progress snapshots, memory job store)
+    JOB_STATUS_CACHE_SIZE: int = 256
+    # "sqlite" is shared by all API workers; "memory" is per process (tests)
+    JOB_STORE_BACKEND: str = "sqlite"
+    JOB_STORE_PATH: Path = DATA_DIR / "jobs.sqlite3"
+    # Seconds between status checks when streaming another worker's job
+    JOB_STATUS_POLL_INTERVAL: float = 1.0
+    JOB_HEARTBEAT_INTERVAL: float = 10.0  # Seconds between heartbeats of the jobs a process runs
+    # Seconds without a heartbeat before a queued or processing job counts as abandoned
+    JOB_STALE_AFTER: float = 60.0
+    # Report catalog and analysis fingerprints
+    REPORT_INDEX_PATH: Path = DATA_DIR / "report_index.sqlite3"
+    
+    # Out-of-process worker settings (python -m app.worker)
+    # "local" runs analyses in the API process; "queue" leaves them to workers
+    JOB_EXECUTION: str = "local"
+    # Durable queue shared by API and worker processes
+    JOB_QUEUE_PATH: Path = DATA_DIR / "job_queue.sqlite3"
+    JOB_MAX_ATTEMPTS: int = 3  # Runs of a job abandoned by crashed workers before it fails
+    # Seconds without a heartbeat before a job is given to another worker
+    WORKER_VISIBILITY_TIMEOUT: float = 60.0
+    WORKER_HEARTBEAT_INTERVAL: float = 10.0
+    WORKER_POLL_INTERVAL: float = 1.0  # Seconds between checks of an empty queue
+    
+    # Extraction pool settings (0 workers runs extraction in a thread instead)
+    EXTRACTION_WORKERS: int = os.cpu_count() or 1
+    EXTRACTION_MAX_IN_FLIGHT: int = 32
+    PDF_PAGES_PER_TASK: int = 25  # Minimum pages per parallel PDF extraction task
+    
+    # Bulk ingestion settings
+    # Clauses embedded and written to Chroma per batch; 0 uses Chroma's maximum
+    INGEST_BATCH_SIZE: int = 0
+    # Extract and index regulatory documents in the background when uploaded
+    INGEST_ON_UPLOAD: bool = True
+    
     # Model settings
     CLAUDE_MODEL: str = "claude-3-5-sonnet-20240620"
     MAX_TOKENS: int = 4000
     TEMPERATURE: float = 0.0
     
+    # LLM client settings
+    CLAUDE_BASE_URL: Optional[str] = None  # Override the API endpoint (e.g. a local stand-in)
+    LLM_MAX_CONCURRENCY: int = 4  # Maximum model calls in flight across all jobs
+    LLM_TIMEOUT: float = 120.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_MAX_RETRIES: int = 2
+    
+    # LLM backend settings ("anthropic" calls Claude; "local" is a deterministic offline stand-in)
+    LLM_BACKEND: str = "anthropic"
+    LOCAL_LLM_SEED: int = 0
+    # Latency distribution: "fixed", "uniform", "normal" or "lognormal"
+    LOCAL_LLM_LATENCY: str = "lognormal"
+    LOCAL_LLM_LATENCY_MEAN: float = 2.0  # Seconds per call
+    LOCAL_LLM_LATENCY_STDDEV: float = 1.0
+    LOCAL_LLM_LATENCY_PER_1K_TOKENS: float = 0.0  # Extra seconds per 1,000 prompt tokens
+    LOCAL_LLM_ERROR_RATE: float = 0.0  # Share of calls that fail with a server error
+    LOCAL_LLM_RATE_LIMIT_RATE: float = 0.0  # Share of calls rejected with 429
+    # Calls beyond this rate are rejected with 429; 0 is unlimited
+    LOCAL_LLM_REQUESTS_PER_MINUTE: int = 0
+    # Longer prompts are rejected; replies are cut at MAX_TOKENS
+    LOCAL_LLM_CONTEXT_TOKENS: int = 200000
+    
+    # Embedding cache settings (vectors keyed by text and embedding model)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: Path = DATA_DIR / "cache" / "embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 1_000_000  # Vectors kept on disk; the oldest are evicted
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 20_000  # Vectors kept in the in-memory LRU
+    
+    # LLM response cache settings
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: Path = DATA_DIR / "cache" / "llm_responses.sqlite3"
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_TTL: float = 30 * 24 * 3600  # Seconds; 0 keeps entries until evicted by size
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -56,11 +146,11 @@ class Settings(BaseSettings):
 # Create settings instance
 settings = Settings()
 
-# Create necessary directories
-os.makedirs(settings.SOP_DIR, exist_ok=True)
-os.makedirs(settings.REGULATORY_DOCS_DIR, exist_ok=True)
-os.makedirs(settings.PROCESSED_DIR, exist_ok=True)
-os.makedirs(settings.REPORTS_DIR, exist_ok=True)
-os.makedirs(settings.CHROMA_PERSIST_DIR, exist_ok=True)
-os.makedirs(BASE_DIR / "app" / "templates", exist_ok=True)
-os.makedirs(settings.STATIC_DIR, exist_ok=True) 
\ No newline at end of file
+
+def ensure_data_dirs() -> None:
+    """Create the data directories; run at startup (server or CLI) rather than on import."""
+    os.makedirs(settings.SOP_DIR, exist_ok=True)
+    os.makedirs(settings.REGULATORY_DOCS_DIR, exist_ok=True)
+    os.makedirs(settings.PROCESSED_DIR, exist_ok=True)
+    os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+    os.makedirs(settings.CHROMA_PERSIST_DIR, exist_ok=True)
@@ -1,8 +1,22 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from app.core.config import settings
-from app.db.vector_store import setup_vector_db
+from app.core.config import ensure_data_dirs, settings
+from app.db.job_store import job_store
+from app.services.extraction_pool import extraction_pool
+from app.services.job_scheduler import job_scheduler
+from app.services.llm_backends import close_llm_clients
+
+
+async def _renew_job_heartbeats():
+    """Renew the heartbeat of the jobs this process runs, so other workers do not take them over."""
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+        try:
+            await asyncio.to_thread(job_store.heartbeat)
+        except Exception as e:
+            print(f"Warning: Could not renew job heartbeats: {e}")
 
 
 @asynccontextmanager
@@ -14,8 +28,15 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}")
     
-    # Initialize vector database
-    app.state.vector_db = setup_vector_db()
+    # Create the data directories; the vector database is opened on first use
+    ensure_data_dirs()
+    
+    # Start the document extraction workers
+    await asyncio.to_thread(extraction_pool.start)
+    
+    # Start the analysis job workers
+    await job_scheduler.start()
+    heartbeats = asyncio.create_task(_renew_job_heartbeats())
     
     # Yield control to the application
     yield
@@ -23,7 +44,17 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print(f"Shutting down {settings.PROJECT_NAME}")
     
+    # Cancel outstanding analysis jobs
+    heartbeats.cancel()
+    await job_scheduler.stop()
+    
+    # Stop the document extraction workers
+    extraction_pool.shutdown()
+    
+    # Close pooled LLM connections
+    await close_llm_clients()
+    
     # Cleanup resources if needed
     if hasattr(app.state, "vector_db"):
         # Persist vector database if needed
-        pass 
\ No newline at end of file
+        pass 
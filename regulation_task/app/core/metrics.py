@@ -0,0 +1,78 @@
+import threading
+from typing import Dict, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Latency buckets in seconds, from fast lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Registry of the application's metrics, served at /metrics
+metrics = CollectorRegistry()
+
+# Time spent in each pipeline operation: extraction, clause_extraction, embedding,
+# chroma_add, chroma_search, llm_call and report_write
+PIPELINE_STAGE_SECONDS = Histogram(
+    "regulation_pipeline_stage_seconds",
+    "Duration of pipeline operations in seconds.",
+    ("stage",),
+    buckets=DEFAULT_BUCKETS,
+    registry=metrics,
+)
+
+# Time spent in each stage of an analysis job, as reported by job progress
+JOB_STAGE_SECONDS = Histogram(
+    "regulation_job_stage_seconds",
+    "Duration of analysis job stages in seconds.",
+    ("stage",),
+    buckets=DEFAULT_BUCKETS,
+    registry=metrics,
+)
+
+# Lookups in the caches of the pipeline (processed documents, embeddings, LLM responses)
+CACHE_REQUESTS = Counter(
+    "regulation_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+    registry=metrics,
+)
+
+CACHE_HIT_RATIO = Gauge(
+    "regulation_cache_hit_ratio",
+    "Share of cache lookups that were hits since startup.",
+    ("cache",),
+    registry=metrics,
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "regulation_job_queue_depth",
+    "Analysis jobs waiting in the queue.",
+    registry=metrics,
+)
+
+JOBS_IN_FLIGHT = Gauge(
+    "regulation_jobs_in_flight",
+    "Analysis jobs currently running.",
+    registry=metrics,
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "regulation_http_request_seconds",
+    "HTTP request latency in seconds by method, route and status code.",
+    ("method", "route", "status"),
+    buckets=DEFAULT_BUCKETS,
+    registry=metrics,
+)
+
+# Hits and misses per cache, for the hit ratio
+_cache_lookups: Dict[str, Tuple[int, int]] = {}
+_cache_lookups_lock = threading.Lock()
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    """Count cache lookups and update the cache's hit ratio."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+    with _cache_lookups_lock:
+        hits, misses = _cache_lookups.get(cache, (0, 0))
+        hits, misses = (hits + count, misses) if hit else (hits, misses + count)
+        _cache_lookups[cache] = (hits, misses)
+    CACHE_HIT_RATIO.labels(cache=cache).set(hits / (hits + misses))
@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.sqlite import connect
+
+# Version of the clause index layout; documents indexed under an older version are
+# re-indexed. Version 2 keys clauses by content hash (see make_clause_id).
+INDEX_VERSION = 2
+
+COLUMNS = ("source", "doc_id", "clause_count", "index_version", "layout", "indexed_at")
+
+
+class IndexRegistry:
+    """SQLite registry of the regulatory documents in the vector database.
+
+    Records, per source file, the file hash of the indexed revision, its clause
+    count, the index version and the vector store layout it was indexed under.
+    Lookups are served from an in-memory view, which is reloaded only when another
+    connection (in this or another process) has committed a change, so checking a
+    document costs no disk reads. Writes are single transactions, so concurrent jobs
+    cannot lose each other's entries.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the registry; the database is opened on first use."""
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._by_source: Dict[str, Dict[str, Any]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS indexed_documents (
+                    source TEXT PRIMARY KEY,
+                    doc_id TEXT,
+                    clause_count INTEGER NOT NULL,
+                    index_version INTEGER NOT NULL,
+                    layout TEXT NOT NULL DEFAULT 'single',
+                    indexed_at REAL NOT NULL
+                )
+                """)
+            # Registries created before the sharded layout existed hold single-layout documents
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(indexed_documents)")}
+            if "layout" not in columns:
+                conn.execute(
+                    "ALTER TABLE indexed_documents ADD COLUMN layout TEXT NOT NULL DEFAULT 'single'"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS indexed_documents_doc_id ON indexed_documents (doc_id)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _refresh(self) -> None:
+        """Reload the in-memory view if the database changed since it was loaded."""
+        conn = self._connect()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM indexed_documents").fetchall()
+        self._by_source = {row[0]: dict(zip(COLUMNS, row)) for row in rows}
+        self._data_version = data_version
+
+    def _apply(self, record: Optional[Dict[str, Any]], source: str) -> None:
+        """Apply this connection's own write to the in-memory view.
+
+        PRAGMA data_version only changes for commits made by other connections.
+        """
+        self._by_source.pop(source, None)
+        if record is not None:
+            self._by_source[source] = record
+
+    def is_indexed(self, source: str, doc_id: str) -> bool:
+        """Check if a revision (file hash) of a source file is indexed.
+
+        Only documents indexed under the current index version and layout count. The
+        same file under another name is indexed separately, as searches are scoped by
+        source file name.
+        """
+        with self._lock:
+            self._refresh()
+            record = self._by_source.get(source)
+        return (
+            record is not None
+            and record["doc_id"] == doc_id
+            and record["index_version"] == INDEX_VERSION
+            and record["layout"] == settings.VECTOR_STORE_LAYOUT
+        )
+
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        """Get the registry record of a source file, if it is indexed."""
+        with self._lock:
+            self._refresh()
+            record = self._by_source.get(source)
+        return dict(record) if record else None
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """Get the records of all indexed documents."""
+        with self._lock:
+            self._refresh()
+            return [dict(record) for record in self._by_source.values()]
+
+    def record(self, source: str, doc_id: Optional[str], clause_count: int) -> None:
+        """Record that a revision of a source file is indexed, replacing any earlier one."""
+        record = {
+            "source": source,
+            "doc_id": doc_id,
+            "clause_count": clause_count,
+            "index_version": INDEX_VERSION,
+            "layout": settings.VECTOR_STORE_LAYOUT,
+            "indexed_at": time.time(),
+        }
+        with self._lock:
+            self._refresh()
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO indexed_documents ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join(':' + column for column in COLUMNS)})",
+                    record,
+                )
+            self._apply(record, source)
+
+    def remove(self, source: str) -> bool:
+        """Remove a source file from the registry. Returns False if it was not recorded."""
+        with self._lock:
+            self._refresh()
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("DELETE FROM indexed_documents WHERE source = ?", (source,))
+            self._apply(None, source)
+            return cursor.rowcount > 0
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._data_version = None
+
+
+# Shared index registry, kept next to the vector database it describes
+index_registry = IndexRegistry(settings.CHROMA_PERSIST_DIR / "index_registry.sqlite3")
@@ -0,0 +1,387 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.sqlite import connect
+
+# Number of recent jobs used for the wait and run time averages
+HISTORY_SIZE = 100
+
+
+def make_worker_id() -> str:
+    """ID of a worker process: its host name and process ID."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """Durable job queue in SQLite, consumed by worker processes (see app.worker).
+
+    A worker claims the next job (lowest priority value, then oldest) and holds a
+    lease on it for ``visibility_timeout`` seconds, which it renews with heartbeats.
+    A job whose lease expires, e.g. because its worker crashed, is put back in the
+    queue and claimed again, up to ``max_attempts`` times in all. Every change runs
+    in an immediate transaction, so any number of API and worker processes can
+    share the queue.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        visibility_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        """Initialize the queue; the database is opened on first use."""
+        self.path = Path(path)
+        self.visibility_timeout = visibility_timeout or settings.WORKER_VISIBILITY_TIMEOUT
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.rejected = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS queued_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    enqueued_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS queued_jobs_next
+                    ON queued_jobs (status, priority, enqueued_at);
+                CREATE TABLE IF NOT EXISTS queue_workers (
+                    worker_id TEXT PRIMARY KEY,
+                    concurrency INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    heartbeat_at REAL NOT NULL
+                );
+                """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self, fn) -> Any:
+        """Run ``fn(conn)`` in an immediate transaction (caller holds the lock)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.commit()
+            return result
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def enqueue(
+        self,
+        job_id: str,
+        payload: Dict[str, Any],
+        kind: str = "analysis",
+        priority: int = 0,
+        max_queued: Optional[int] = None,
+    ) -> bool:
+        """
+        Add a job to the queue. A job that is already queued or running is left as is.
+
+        Returns:
+            False if ``max_queued`` jobs are already waiting (counted in ``rejected``)
+        """
+
+        def enqueue_job(conn: sqlite3.Connection) -> bool:
+            row = conn.execute(
+                "SELECT status FROM queued_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is not None and row[0] in ("queued", "running"):
+                return True
+            if max_queued is not None:
+                queued = conn.execute(
+                    "SELECT COUNT(*) FROM queued_jobs WHERE status = 'queued'"
+                ).fetchone()[0]
+                if queued >= max_queued:
+                    return False
+            conn.execute(
+                "INSERT OR REPLACE INTO queued_jobs "
+                "(job_id, kind, payload, priority, status, enqueued_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(payload), priority, time.time()),
+            )
+            return True
+
+        with self._lock:
+            enqueued = self._transaction(enqueue_job)
+            if not enqueued:
+                self.rejected += 1
+            return enqueued
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next queued job to a worker, or return None if the queue is empty."""
+
+        def claim_job(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            row = conn.execute(
+                "SELECT job_id, kind, payload, priority, attempts, enqueued_at FROM queued_jobs "
+                "WHERE status = 'queued' ORDER BY priority, enqueued_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE queued_jobs SET status = 'running', attempts = attempts + 1, "
+                "worker_id = ?, lease_expires_at = ?, started_at = ? WHERE job_id = ?",
+                (worker_id, now + self.visibility_timeout, now, row[0]),
+            )
+            return {
+                "job_id": row[0],
+                "kind": row[1],
+                "payload": json.loads(row[2]),
+                "priority": row[3],
+                "attempt": row[4] + 1,
+                "enqueued_at": row[5],
+            }
+
+        with self._lock:
+            return self._transaction(claim_job)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> str:
+        """
+        Renew a worker's lease on a job.
+
+        Returns:
+            "renewed", "cancelled" if the job was cancelled and the worker should stop
+            it, or "lost" if the lease expired and the job may run elsewhere
+        """
+
+        def renew(conn: sqlite3.Connection) -> str:
+            row = conn.execute(
+                "SELECT worker_id, status, cancel_requested FROM queued_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None or row[0] != worker_id or row[1] != "running":
+                return "lost"
+            if row[2]:
+                return "cancelled"
+            conn.execute(
+                "UPDATE queued_jobs SET lease_expires_at = ? WHERE job_id = ?",
+                (time.time() + self.visibility_timeout, job_id),
+            )
+            return "renewed"
+
+        with self._lock:
+            return self._transaction(renew)
+
+    def finish(
+        self, job_id: str, worker_id: str, status: str = "done", error: Optional[str] = None
+    ) -> bool:
+        """Record the outcome of a leased job.
+
+        Returns False if the worker no longer held the lease.
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE queued_jobs SET status = ?, error = ?, finished_at = ?, "
+                    "lease_expires_at = NULL "
+                    "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                    (status, error, time.time(), job_id, worker_id),
+                )
+            return cursor.rowcount > 0
+
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Put a leased job back in the queue at once, e.g. when its worker is stopped."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE queued_jobs SET status = 'queued', worker_id = NULL, "
+                    "lease_expires_at = NULL "
+                    "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                    (job_id, worker_id),
+                )
+            return cursor.rowcount > 0
+
+    def requeue_expired(self) -> List[Dict[str, Any]]:
+        """
+        Put jobs whose lease expired back in the queue.
+
+        Returns:
+            The jobs given up on after ``max_attempts`` attempts, now failed
+        """
+
+        def requeue(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+            now = time.time()
+            expired = conn.execute(
+                "SELECT job_id, kind, attempts, worker_id, cancel_requested FROM queued_jobs "
+                "WHERE status = 'running' AND lease_expires_at < ?",
+                (now,),
+            ).fetchall()
+            abandoned = []
+            for job_id, kind, attempts, worker_id, cancel_requested in expired:
+                if cancel_requested:
+                    conn.execute(
+                        "UPDATE queued_jobs SET status = 'cancelled', finished_at = ?, "
+                        "lease_expires_at = NULL WHERE job_id = ?",
+                        (now, job_id),
+                    )
+                elif attempts >= self.max_attempts:
+                    error = f"Abandoned by worker {worker_id} after {attempts} attempts"
+                    conn.execute(
+                        "UPDATE queued_jobs SET status = 'failed', error = ?, finished_at = ?, "
+                        "lease_expires_at = NULL WHERE job_id = ?",
+                        (error, now, job_id),
+                    )
+                    abandoned.append(
+                        {"job_id": job_id, "kind": kind, "attempts": attempts, "error": error}
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE queued_jobs SET status = 'queued', worker_id = NULL, "
+                        "lease_expires_at = NULL WHERE job_id = ?",
+                        (job_id,),
+                    )
+            return abandoned
+
+        with self._lock:
+            return self._transaction(requeue)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued job, or ask the worker running it to stop.
+
+        Returns:
+            "cancelled" for a queued job, "cancelling" for a running one, or None if
+            the job is not queued or running
+        """
+
+        def cancel_job(conn: sqlite3.Connection) -> Optional[str]:
+            row = conn.execute(
+                "SELECT status FROM queued_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None or row[0] not in ("queued", "running"):
+                return None
+            if row[0] == "queued":
+                conn.execute(
+                    "UPDATE queued_jobs SET status = 'cancelled', finished_at = ? WHERE job_id = ?",
+                    (time.time(), job_id),
+                )
+                return "cancelled"
+            conn.execute("UPDATE queued_jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+            return "cancelling"
+
+        with self._lock:
+            return self._transaction(cancel_job)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Get the 1-based position of a queued job, or None if it is not queued."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT priority, enqueued_at FROM queued_jobs "
+                "WHERE job_id = ? AND status = 'queued'",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM queued_jobs WHERE status = 'queued' "
+                "AND (priority < ? OR (priority = ? AND enqueued_at < ?))",
+                (row[0], row[0], row[1]),
+            ).fetchone()[0]
+            return ahead + 1
+
+    def register_worker(self, worker_id: str, concurrency: int) -> None:
+        """Record a live worker and how many jobs it runs at once."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO queue_workers "
+                    "(worker_id, concurrency, started_at, heartbeat_at) VALUES (?, ?, ?, ?)",
+                    (worker_id, concurrency, now, now),
+                )
+
+    def worker_heartbeat(self, worker_id: str) -> None:
+        """Record that a worker is still alive."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE queue_workers SET heartbeat_at = ? WHERE worker_id = ?",
+                    (time.time(), worker_id),
+                )
+
+    def unregister_worker(self, worker_id: str) -> None:
+        """Forget a worker that is shutting down."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM queue_workers WHERE worker_id = ?", (worker_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, live worker slots, recent wait and run times and job counts."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            counts = dict(
+                conn.execute("SELECT status, COUNT(*) FROM queued_jobs GROUP BY status").fetchall()
+            )
+            oldest = conn.execute(
+                "SELECT MIN(enqueued_at) FROM queued_jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+            slots = conn.execute(
+                "SELECT COALESCE(SUM(concurrency), 0) FROM queue_workers WHERE heartbeat_at >= ?",
+                (now - self.visibility_timeout,),
+            ).fetchone()[0]
+            recent = conn.execute(
+                "SELECT started_at - enqueued_at, finished_at - started_at FROM queued_jobs "
+                "WHERE status = 'done' ORDER BY finished_at DESC LIMIT ?",
+                (HISTORY_SIZE,),
+            ).fetchall()
+        waits = [wait for wait, _ in recent]
+        runs = [run for _, run in recent]
+        return {
+            "workers": slots,
+            "running": counts.get("running", 0),
+            "queued": counts.get("queued", 0),
+            "oldest_queued_wait": now - oldest if oldest else 0.0,
+            "average_wait": sum(waits) / len(waits) if waits else 0.0,
+            "max_wait": max(waits, default=0.0),
+            "average_run_time": sum(runs) / len(runs) if runs else 0.0,
+            "completed": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "cancelled": counts.get("cancelled", 0),
+        }
+
+    def estimate_retry_after(self) -> float:
+        """Estimate the seconds until a queue slot frees up."""
+        stats = self.stats()
+        average_run = stats["average_run_time"] or 30.0
+        return max(1.0, average_run / max(1, stats["workers"]))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared queue of analysis jobs for out-of-process workers
+job_queue = JobQueue(settings.JOB_QUEUE_PATH)
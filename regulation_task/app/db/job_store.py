@@ -0,0 +1,322 @@
+import abc
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.db.job_queue import make_worker_id
+from app.db.sqlite import connect
+
+# Statuses of jobs that have not ended; their owner keeps sending heartbeats
+ACTIVE_STATUSES = ("queued", "processing")
+
+
+def job_owner() -> str:
+    """Owner recorded on the jobs this process runs: its host name and process ID."""
+    return make_worker_id()
+
+
+def make_job_id(prefix: str) -> str:
+    """A new job ID: the prefix, the submission time in nanoseconds and random bytes.
+
+    IDs sort by submission time, and jobs submitted at the same moment get distinct IDs.
+    """
+    return f"{prefix}_{time.time_ns()}_{secrets.token_hex(4)}"
+
+
+def is_stale(state: Optional[Dict[str, Any]], stale_after: Optional[float] = None) -> bool:
+    """Whether a queued or processing job's owner stopped sending heartbeats, e.g. it was killed.
+
+    Jobs without an owner (e.g. waiting in the durable job queue) are never stale.
+    """
+    stale_after = settings.JOB_STALE_AFTER if stale_after is None else stale_after
+    return (
+        state is not None
+        and state.get("status") in ACTIVE_STATUSES
+        and state.get("owner") is not None
+        and (state.get("heartbeat_at") or 0) < time.time() - stale_after
+    )
+
+
+class JobStore(abc.ABC):
+    """Job state backend: the status of every analysis and ingest job.
+
+    A job's state is a JSON-serializable dict with at least a ``status``. Writes
+    merge fields into the stored state, and can be made conditional on the current
+    status, so a status transition is atomic: of two workers racing to move a job
+    out of ``queued``, only one succeeds.
+
+    A queued or processing job may record its ``owner`` (see ``job_owner``) and a
+    ``heartbeat_at`` time, which the owner renews with ``heartbeat`` while it runs.
+    """
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a job, or None if it is unknown."""
+
+    def get_status(self, job_id: str) -> Optional[str]:
+        """Get only the status of a job, or None if it is unknown."""
+        state = self.get(job_id)
+        return state["status"] if state else None
+
+    @abc.abstractmethod
+    def update(
+        self,
+        job_id: str,
+        fields: Dict[str, Any],
+        kind: str = "analysis",
+        from_statuses: Optional[Iterable[Optional[str]]] = None,
+        replace: bool = False,
+        stale_after: Optional[float] = None,
+    ) -> bool:
+        """Merge fields into a job's state, creating the job if needed.
+
+        With ``from_statuses``, the write only happens if the job's current status is
+        one of them (``None`` stands for a job that does not exist yet). With
+        ``stale_after``, a job whose owner sent no heartbeat for that many seconds
+        counts as not existing, so it can be taken over. With ``replace``, the fields
+        replace the stored state instead, e.g. when a job is submitted again under
+        the same ID.
+
+        Returns:
+            False if the job was not in one of ``from_statuses``
+        """
+
+    @abc.abstractmethod
+    def heartbeat(self, owner: Optional[str] = None) -> int:
+        """Renew the heartbeat of an owner's queued and processing jobs (by default this process's).
+
+        Returns:
+            The number of jobs renewed
+        """
+
+    @abc.abstractmethod
+    def delete(self, job_id: str) -> bool:
+        """Forget a job. Returns False if it was unknown."""
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class MemoryJobStore(JobStore):
+    """Job store in a bounded in-memory LRU, for a single process (e.g. tests)."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize an empty store keeping up to ``max_entries`` jobs."""
+        self.max_entries = max_entries or settings.JOB_STATUS_CACHE_SIZE
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a job, or None if it is unknown."""
+        with self._lock:
+            state = self._jobs.get(job_id)
+            return json.loads(json.dumps(state)) if state is not None else None
+
+    def update(
+        self,
+        job_id: str,
+        fields: Dict[str, Any],
+        kind: str = "analysis",
+        from_statuses: Optional[Iterable[Optional[str]]] = None,
+        replace: bool = False,
+        stale_after: Optional[float] = None,
+    ) -> bool:
+        """Merge fields into a job's state (see JobStore.update)."""
+        # Round-trip through JSON so callers see the same values as with SQLite
+        fields = json.loads(json.dumps(fields, default=str))
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if stale_after is not None and is_stale(state, stale_after):
+                state = None
+            if from_statuses is not None and (state["status"] if state else None) not in set(
+                from_statuses
+            ):
+                return False
+            self._jobs[job_id] = {**(state if state and not replace else {}), **fields}
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+            return True
+
+    def heartbeat(self, owner: Optional[str] = None) -> int:
+        """Renew the heartbeat of an owner's queued and processing jobs."""
+        owner = owner or job_owner()
+        now = time.time()
+        with self._lock:
+            states = [
+                state
+                for state in self._jobs.values()
+                if state.get("owner") == owner and state["status"] in ACTIVE_STATUSES
+            ]
+            for state in states:
+                state["heartbeat_at"] = now
+            return len(states)
+
+    def delete(self, job_id: str) -> bool:
+        """Forget a job. Returns False if it was unknown."""
+        with self._lock:
+            return self._jobs.pop(job_id, None) is not None
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in SQLite, shared by every worker process on the host.
+
+    Conditional writes run in an immediate transaction, which holds the database's
+    write lock from the status check to the write, so transitions are atomic across
+    threads and processes.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the store; the database is opened on first use."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+                """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Stores created before jobs recorded their owner
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_kind_status ON jobs (kind, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a job, or None if it is unknown."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT state FROM jobs WHERE job_id = ?", (job_id,))
+                .fetchone()
+            )
+        return json.loads(row[0]) if row else None
+
+    def get_status(self, job_id: str) -> Optional[str]:
+        """Get only the status of a job, without decoding its state."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,))
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def update(
+        self,
+        job_id: str,
+        fields: Dict[str, Any],
+        kind: str = "analysis",
+        from_statuses: Optional[Iterable[Optional[str]]] = None,
+        replace: bool = False,
+        stale_after: Optional[float] = None,
+    ) -> bool:
+        """Merge fields into a job's state (see JobStore.update)."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT status, state, owner, heartbeat_at FROM jobs WHERE job_id = ?",
+                    (job_id,),
+                ).fetchone()
+                if (
+                    row
+                    and stale_after is not None
+                    and is_stale(
+                        {"status": row[0], "owner": row[2], "heartbeat_at": row[3]}, stale_after
+                    )
+                ):
+                    row = None
+                if from_statuses is not None and (row[0] if row else None) not in set(
+                    from_statuses
+                ):
+                    conn.rollback()
+                    return False
+                state = {**(json.loads(row[1]) if row and not replace else {}), **fields}
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO jobs
+                        (job_id, kind, status, state, updated_at, owner, heartbeat_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        job_id,
+                        kind,
+                        state["status"],
+                        json.dumps(state, ensure_ascii=False, default=str),
+                        time.time(),
+                        state.get("owner"),
+                        state.get("heartbeat_at"),
+                    ),
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            return True
+
+    def heartbeat(self, owner: Optional[str] = None) -> int:
+        """Renew the heartbeat of an owner's queued and processing jobs."""
+        owner = owner or job_owner()
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(
+                    """
+                    UPDATE jobs SET heartbeat_at = ?, state = json_set(state, '$.heartbeat_at', ?)
+                    WHERE owner = ? AND status IN ('queued', 'processing')
+                    """,
+                    (now, now, owner),
+                ).rowcount
+
+    def delete(self, job_id: str) -> bool:
+        """Forget a job. Returns False if it was unknown."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)).rowcount > 0
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_job_store(backend: Optional[str] = None) -> JobStore:
+    """Create the job store selected by the JOB_STORE_BACKEND setting."""
+    backend = backend or settings.JOB_STORE_BACKEND
+    if backend == "sqlite":
+        return SQLiteJobStore(settings.JOB_STORE_PATH)
+    if backend == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown job store backend: {backend}")
+
+
+# Shared job store
+job_store = create_job_store()
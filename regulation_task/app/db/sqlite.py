@@ -0,0 +1,16 @@
+import sqlite3
+from pathlib import Path
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open a SQLite database that can be shared between threads and processes.
+
+    The database uses write-ahead logging so readers do not block the writer, and
+    waits for locks held by other connections instead of failing immediately.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
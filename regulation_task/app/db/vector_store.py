@@ -1,47 +1,43 @@
 import os
 import shutil
-import json
-from pathlib import Path
-from langchain_chroma import Chroma
-from langchain.schema import Document as LangchainDocument
-from typing import List, Dict, Any, Set
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Mapping, Optional, Set, Tuple
 
 from app.core.config import settings
-from app.models.embeddings import ClaudeEmbeddings
+from app.core.metrics import PIPELINE_STAGE_SECONDS
+from app.db.index_registry import index_registry
 
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+    from langchain_chroma import Chroma
 
-# Track which documents have been added to the vector database
-def get_indexed_documents_path() -> Path:
-    """Get the path to the file tracking indexed documents."""
-    return settings.CHROMA_PERSIST_DIR / "indexed_documents.json"
+# Maximum distance for a clause to count as relevant (lower score means higher similarity)
+RELEVANCE_SCORE_THRESHOLD = 0.75
 
+# Collection of all clauses in the single layout, and name prefix of the per-regulation
+# collections in the sharded layout (see VECTOR_STORE_LAYOUT)
+COLLECTION_NAME = "regulatory_clauses"
+SHARD_PREFIX = "regulation_"
 
-def get_indexed_documents() -> Set[str]:
-    """Get the set of document IDs that have been indexed."""
-    index_path = get_indexed_documents_path()
-    if index_path.exists():
-        try:
-            with open(index_path, "r", encoding="utf-8") as f:
-                return set(json.load(f))
-        except Exception as e:
-            print(f"Error loading indexed documents: {e}")
-    return set()
+# Shared database, opened on first use (see get_vector_db)
+_vector_db: Optional["Chroma"] = None
+_vector_db_lock = threading.Lock()
 
 
-def add_indexed_document(doc_id: str) -> None:
-    """Add a document ID to the indexed documents set."""
-    indexed_docs = get_indexed_documents()
-    indexed_docs.add(doc_id)
-    
-    index_path = get_indexed_documents_path()
-    with open(index_path, "w", encoding="utf-8") as f:
-        json.dump(list(indexed_docs), f)
-
-
-def setup_vector_db() -> Chroma:
+def setup_vector_db() -> "Chroma":
     """Set up and return a Chroma vector database."""
-    # Initialize embeddings
-    embeddings = ClaudeEmbeddings()
+    # Imported here: Chroma and its dependencies take about a second to import
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import Embeddings
+    from app.models.embedding_cache import CachedEmbeddings, embedding_store
+    from app.models.embeddings import ClaudeEmbeddings
+    
+    # Initialize embeddings, behind the persistent embedding cache
+    embeddings: Embeddings = ClaudeEmbeddings()
+    if settings.EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(embeddings, embedding_store)
     
     # Optionally clear existing vector DB to ensure consistent results
     # if os.path.exists(settings.CHROMA_PERSIST_DIR):
@@ -52,110 +48,399 @@ def setup_vector_db() -> Chroma:
     os.makedirs(settings.CHROMA_PERSIST_DIR, exist_ok=True)
     
     return Chroma(
-        collection_name="regulatory_clauses",
+        collection_name=COLLECTION_NAME,
         persist_directory=str(settings.CHROMA_PERSIST_DIR),
-        embedding_function=embeddings
+        embedding_function=embeddings,
     )
 
 
-def is_document_indexed(doc_id: str) -> bool:
-    """Check if a document has already been indexed in the vector database."""
-    indexed_docs = get_indexed_documents()
-    return doc_id in indexed_docs
+def get_vector_db() -> "Chroma":
+    """Get the shared Chroma vector database, opening it on first use."""
+    global _vector_db
+    if _vector_db is None:
+        with _vector_db_lock:
+            if _vector_db is None:
+                _vector_db = setup_vector_db()
+    return _vector_db
+
+
+def is_document_indexed(source: str, doc_id: str) -> bool:
+    """Check if this revision of a source document is already indexed in the vector database."""
+    return index_registry.is_indexed(source, doc_id)
+
+
+def make_clause_id(source: str, clause: str) -> str:
+    """Stable ID of a clause: a hash of its source and whitespace-normalized text."""
+    normalized = " ".join(clause.split())
+    return hashlib.sha256(f"{source}\n{normalized}".encode("utf-8")).hexdigest()[:32]
+
+
+def is_sharded() -> bool:
+    """Check if clauses are kept in one collection per regulation."""
+    return settings.VECTOR_STORE_LAYOUT == "sharded"
+
+
+def get_shard_name(source: str) -> str:
+    """Name of the collection holding a source document's clauses in the sharded layout."""
+    return SHARD_PREFIX + hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+
+
+def get_clause_collection(source: str, db: "Chroma", create: bool = True) -> Optional["Collection"]:
+    """Get the collection holding a source document's clauses.
+
+    In the single layout this is the shared collection. In the sharded layout it is
+    the document's own collection, created if needed unless ``create`` is False, in
+    which case None is returned for a document without one.
+    """
+    if not is_sharded():
+        return db._collection
+    name = get_shard_name(source)
+    if create:
+        return get_shard(source, db)
+    try:
+        return db._client.get_collection(name, embedding_function=None)
+    except Exception:
+        return None
+
+
+def get_shard(source: str, db: "Chroma") -> "Collection":
+    """Get a source document's own collection in the sharded layout, creating it if needed."""
+    return db._client.get_or_create_collection(
+        get_shard_name(source), metadata={"source": source}, embedding_function=None
+    )
+
+
+def get_shards(db: "Chroma", sources: Optional[Iterable[str]] = None) -> List["Collection"]:
+    """Get the per-regulation collections of the given source documents, or of all documents."""
+    if sources is None:
+        return [
+            collection
+            for collection in db._client.list_collections()
+            if collection.name.startswith(SHARD_PREFIX)
+        ]
+    collections = [
+        get_clause_collection(source, db, create=False) for source in dict.fromkeys(sources)
+    ]
+    return [collection for collection in collections if collection is not None]
+
 
+def get_indexed_clause_ids(source: str, db: "Chroma") -> Set[str]:
+    """Get the IDs of the clauses indexed for a source document."""
+    collection = get_clause_collection(source, db, create=False)
+    if collection is None:
+        return set()
+    return set(collection.get(where={"source": source}, include=[])["ids"])
 
-def add_regulatory_clauses_to_db(clauses: List[str], source: str, db: Chroma, doc_id: str = None) -> None:
-    """Add regulatory clauses to the vector database."""
+
+def _drop_shard(source: str, db: "Chroma") -> bool:
+    """Drop a document's collection in the sharded layout. Returns False if it had none."""
+    try:
+        db._client.delete_collection(get_shard_name(source))
+        return True
+    except Exception:
+        return False
+
+
+def remove_previous_layout_clauses(source: str, db: "Chroma") -> None:
+    """Delete a document's clauses from the layout it was indexed under, if it has changed since."""
+    record = index_registry.get(source)
+    if record is None or record["layout"] == settings.VECTOR_STORE_LAYOUT:
+        return
+    if record["layout"] == "sharded":
+        _drop_shard(source, db)
+    else:
+        db._collection.delete(where={"source": source})
+
+
+def delete_clauses(source: str, clause_ids: List[str], db: "Chroma") -> None:
+    """Delete clauses of a source document by ID."""
+    collection = get_clause_collection(source, db, create=False)
+    if collection is not None and clause_ids:
+        collection.delete(ids=clause_ids)
+
+
+def diff_clauses(
+    clauses: List[str], source: str, db: "Chroma"
+) -> Tuple[Dict[str, str], List[str], int]:
+    """Compare a document's clauses with the clauses indexed for its source.
+
+    Returns:
+        The clauses to add by ID, the IDs to delete and the number of distinct clauses
+    """
+    # Repeated clauses share an ID and are indexed once
+    clauses_by_id: Dict[str, str] = {}
+    for clause in clauses:
+        clauses_by_id.setdefault(make_clause_id(source, clause), clause)
+
+    existing_ids = get_indexed_clause_ids(source, db)
+    added = {
+        clause_id: clause
+        for clause_id, clause in clauses_by_id.items()
+        if clause_id not in existing_ids
+    }
+    removed_ids = [clause_id for clause_id in existing_ids if clause_id not in clauses_by_id]
+    return added, removed_ids, len(clauses_by_id)
+
+
+def get_max_batch_size(db: "Chroma") -> int:
+    """Get the most records Chroma accepts in one write."""
+    try:
+        return db._client.get_max_batch_size()
+    except Exception:
+        return 5000
+
+
+def write_clauses(
+    clauses: Dict[str, str], sources: Dict[str, str], db: "Chroma", batch_size: Optional[int] = None
+) -> None:
+    """Embed and upsert clauses by ID, in batches no larger than Chroma accepts.
+
+    In the sharded layout, each batch is split between the collections of the
+    clauses' source documents after it is embedded.
+
+    Args:
+        clauses: Clause text by clause ID
+        sources: Source file name by clause ID
+        db: The Chroma database instance
+        batch_size: Clauses per batch; defaults to Chroma's maximum batch size
+    """
+    max_batch_size = get_max_batch_size(db)
+    batch_size = min(batch_size or max_batch_size, max_batch_size)
+    ids = list(clauses)
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start : start + batch_size]
+        texts = [clauses[clause_id] for clause_id in batch_ids]
+        embeddings = _embed_texts(texts, db)
+        if is_sharded():
+            positions_by_source: Dict[str, List[int]] = {}
+            for position, clause_id in enumerate(batch_ids):
+                positions_by_source.setdefault(sources[clause_id], []).append(position)
+            groups = [
+                (get_shard(source, db), positions)
+                for source, positions in positions_by_source.items()
+            ]
+        else:
+            groups = [(db._collection, list(range(len(batch_ids))))]
+        with PIPELINE_STAGE_SECONDS.labels(stage="chroma_add").time():
+            for collection, positions in groups:
+                collection.upsert(
+                    ids=[batch_ids[i] for i in positions],
+                    embeddings=(
+                        embeddings
+                        if len(positions) == len(batch_ids)
+                        else [embeddings[i] for i in positions]
+                    ),
+                    documents=[texts[i] for i in positions],
+                    metadatas=[
+                        {
+                            "source": sources[batch_ids[i]],
+                            "clause_id": batch_ids[i],
+                            "type": "regulatory_clause",
+                        }
+                        for i in positions
+                    ],
+                )
+
+
+def add_regulatory_clauses_to_db(
+    clauses: List[str], source: str, db: "Chroma", doc_id: Optional[str] = None
+) -> Dict[str, int]:
+    """Index the clauses of a regulatory document, writing only what changed.
+
+    Clauses are keyed by content (see make_clause_id), so re-indexing a revised
+    document embeds and upserts only new or edited clauses, deletes clauses that
+    are no longer in it and leaves the rest untouched. Re-adding an unchanged
+    document writes nothing, even if the index registry was lost.
+
+    Returns:
+        Dict with the number of clauses added, removed and unchanged
+    """
     # If doc_id is provided, check if already indexed
-    if doc_id and is_document_indexed(doc_id):
+    if doc_id and is_document_indexed(source, doc_id):
         print(f"Document {doc_id} already indexed, skipping")
-        return
-    
-    documents = []
-    for i, clause in enumerate(clauses):
-        doc = LangchainDocument(
-            page_content=clause,
-            metadata={
-                "source": source,
-                "clause_id": i,
-                "type": "regulatory_clause",
-                "doc_id": doc_id
-            }
+        record = index_registry.get(source)
+        return {
+            "added": 0,
+            "removed": 0,
+            "unchanged": record["clause_count"] if record else len(clauses),
+        }
+
+    remove_previous_layout_clauses(source, db)
+    added, removed_ids, clause_count = diff_clauses(clauses, source, db)
+    if removed_ids:
+        delete_clauses(source, removed_ids, db)
+    if added:
+        write_clauses(added, dict.fromkeys(added, source), db)
+    index_registry.record(source, doc_id, clause_count=clause_count)
+
+    stats = {
+        "added": len(added),
+        "removed": len(removed_ids),
+        "unchanged": clause_count - len(added),
+    }
+    if added or removed_ids:
+        print(
+            f"Indexed {source}: {stats['added']} added, {stats['removed']} removed, "
+            f"{stats['unchanged']} unchanged clauses"
         )
-        documents.append(doc)
-    
-    if documents:
-        db.add_documents(documents)
-        
-        # Mark document as indexed if doc_id is provided
-        if doc_id:
-            add_indexed_document(doc_id)
+    return stats
 
 
-def find_relevant_clauses(sop_chunks: List[str], db: Chroma, top_k: int = 5) -> List[Dict[str, Any]]:
-    """Find regulatory clauses relevant to each SOP chunk."""
-    all_relevant_clauses = []
-    
-    for chunk in sop_chunks:
-        results = db.similarity_search_with_score(chunk, k=top_k)
-        
-        for doc, score in results:
-            if score < 0.75:  # Lower score means higher similarity
-                relevant_clause = {
-                    "clause": doc.page_content,
-                    "source": doc.metadata.get("source", "Unknown"),
-                    "relevance_score": score,
-                    "sop_chunk": chunk
-                }
-                all_relevant_clauses.append(relevant_clause)
-    
-    # Sort by relevance score and remove duplicates
-    all_relevant_clauses.sort(key=lambda x: x["relevance_score"])
-    
-    # Remove duplicates based on clause content
-    unique_clauses = []
-    seen_clauses = set()
-    
-    for clause_info in all_relevant_clauses:
-        clause_text = clause_info["clause"]
-        if clause_text not in seen_clauses:
-            seen_clauses.add(clause_text)
-            unique_clauses.append(clause_info)
-    
-    return unique_clauses
+def _embed_texts(texts: List[str], db: "Chroma") -> Any:
+    """Embed a batch of texts with the database's embedding function."""
+    embeddings = db.embeddings
+    if embeddings is None:
+        raise ValueError("The vector database has no embedding function")
+    if hasattr(embeddings, "embed_documents_array"):
+        return embeddings.embed_documents_array(texts)
+    return embeddings.embed_documents(texts)
+
+
+def _query_collection(
+    collection: "Collection",
+    query_embeddings: Any,
+    top_k: int,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+    """Search a collection with a batch of queries.
 
+    Returns:
+        The (clause, metadata, distance) hits of each query, nearest first
+    """
+    results: Mapping[str, Any] = collection.query(
+        query_embeddings=query_embeddings,
+        n_results=top_k,
+        where=where,
+        include=["documents", "metadatas", "distances"],
+    )
+    return [
+        list(zip(documents, metadatas, distances))
+        for documents, metadatas, distances in zip(
+            results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
+
+
+def _query_shards(
+    shards: List["Collection"], query_embeddings: Any, top_k: int
+) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+    """Search per-regulation collections in parallel and merge the nearest hits of each query."""
+    hits_by_query: List[List[Tuple[str, Dict[str, Any], float]]] = [
+        [] for _ in range(len(query_embeddings))
+    ]
+    if not shards:
+        return hits_by_query
+    with ThreadPoolExecutor(
+        max_workers=min(settings.VECTOR_SEARCH_WORKERS, len(shards))
+    ) as executor:
+        for shard_hits in executor.map(
+            lambda shard: _query_collection(shard, query_embeddings, top_k), shards
+        ):
+            for hits, query_hits in zip(hits_by_query, shard_hits):
+                hits.extend(query_hits)
+    return [sorted(hits, key=lambda hit: hit[2])[:top_k] for hits in hits_by_query]
+
+
+def find_relevant_clauses_by_chunk(
+    sop_chunks: List[str], db: "Chroma", top_k: int = 5, sources: Optional[List[str]] = None
+) -> List[List[Dict[str, Any]]]:
+    """Find regulatory clauses relevant to each SOP chunk, grouped per chunk.
+
+    All chunks are embedded in one batch and searched with a single multi-query
+    call against the collection, or against each regulation's collection in
+    parallel in the sharded layout. With ``sources``, only the clauses of those
+    regulatory documents (by file name) are searched.
+    """
+    if not sop_chunks:
+        return []
+    if sources is not None and not sources:
+        return [[] for _ in sop_chunks]
+
+    query_embeddings = _embed_texts(sop_chunks, db)
+    with PIPELINE_STAGE_SECONDS.labels(stage="chroma_search").time():
+        if is_sharded():
+            hits_by_chunk = _query_shards(get_shards(db, sources), query_embeddings, top_k)
+        else:
+            where = (
+                {"source": {"$in": list(dict.fromkeys(sources))}} if sources is not None else None
+            )
+            hits_by_chunk = _query_collection(db._collection, query_embeddings, top_k, where)
 
-def remove_document_from_db(doc_id: str, db: Chroma) -> bool:
+    clauses_by_chunk = []
+    for chunk, hits in zip(sop_chunks, hits_by_chunk):
+        chunk_clauses = []
+        for clause, metadata, score in hits:
+            if score < RELEVANCE_SCORE_THRESHOLD:
+                chunk_clauses.append(
+                    {
+                        "clause": clause,
+                        "source": (metadata or {}).get("source", "Unknown"),
+                        "relevance_score": score,
+                        "sop_chunk": chunk,
+                    }
+                )
+        clauses_by_chunk.append(chunk_clauses)
+
+    return clauses_by_chunk
+
+
+def rank_relevant_clauses(clauses_by_chunk: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge per-chunk hits into one list with the best hit per clause, most relevant first."""
+    # Keep the best hit per clause content; ties go to the earliest hit
+    best_hits: Dict[str, Tuple[Dict[str, Any], int]] = {}
+    position = 0
+    for chunk_clauses in clauses_by_chunk:
+        for clause_info in chunk_clauses:
+            best = best_hits.get(clause_info["clause"])
+            if best is None or clause_info["relevance_score"] < best[0]["relevance_score"]:
+                best_hits[clause_info["clause"]] = (clause_info, position)
+            position += 1
+
+    # Sort by relevance score, lower score means higher similarity
+    ranked = sorted(best_hits.values(), key=lambda hit: (hit[0]["relevance_score"], hit[1]))
+    return [clause_info for clause_info, _ in ranked]
+
+
+def find_relevant_clauses(
+    sop_chunks: List[str], db: "Chroma", top_k: int = 5, sources: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Find regulatory clauses relevant to each SOP chunk, optionally only in given documents."""
+    return rank_relevant_clauses(find_relevant_clauses_by_chunk(sop_chunks, db, top_k, sources))
+
+
+def remove_document_from_db(source: str, db: "Chroma") -> bool:
     """Remove a document and all its clauses from the vector database.
     
+    In the sharded layout the document's collection is dropped. Clauses left in
+    the previous layout, if the document was not re-indexed since the layout
+    changed, are removed as well.
+    
     Args:
-        doc_id: The document ID to remove
+        source: The document's file name, as stored in the clause metadata
         db: The Chroma database instance
         
     Returns:
         bool: True if the document was found and removed, False otherwise
     """
     try:
-        # Check if document is indexed
-        if not is_document_indexed(doc_id):
-            print(f"Document {doc_id} not found in index, nothing to remove")
-            return False
-            
         # Remove from Chroma DB
-        db.delete(where={"doc_id": doc_id})
+        remove_previous_layout_clauses(source, db)
+        if is_sharded():
+            found = _drop_shard(source, db)
+        else:
+            clause_ids = get_indexed_clause_ids(source, db)
+            found = bool(clause_ids)
+            if found:
+                db.delete(ids=list(clause_ids))
         
-        # Remove from indexed documents
-        indexed_docs = get_indexed_documents()
-        if doc_id in indexed_docs:
-            indexed_docs.remove(doc_id)
-            
-            # Save updated indexed documents
-            index_path = get_indexed_documents_path()
-            with open(index_path, "w", encoding="utf-8") as f:
-                json.dump(list(indexed_docs), f)
+        # Remove from the index registry
+        registered = index_registry.remove(source)
+        if not found and not registered:
+            print(f"Document {source} not found in index, nothing to remove")
+            return False
                 
-        print(f"Successfully removed document {doc_id} from vector database")
+        print(f"Successfully removed document {source} from vector database")
         return True
     except Exception as e:
-        print(f"Error removing document {doc_id} from vector database: {e}")
-        return False 
\ No newline at end of file
+        print(f"Error removing document {source} from vector database: {e}")
+        return False 
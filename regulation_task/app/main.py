@@ -1,4 +1,5 @@
 import os
+import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -7,7 +8,9 @@ from fastapi.responses import HTMLResponse
 
 from app.core.config import settings
 from app.api.api import api_router
+from app.api.endpoints import metrics
 from app.core.lifespan import lifespan
+from app.core.metrics import HTTP_REQUEST_SECONDS
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -26,10 +29,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+def _route_template(request: Request) -> str:
+    """Get the route template of a request, e.g. /api/reports/{job_id}, to label metrics by."""
+    if "endpoint" not in request.scope:
+        return "unmatched"
+    if "route" not in request.scope:
+        # Mounted apps such as static files are grouped by mount point
+        return f"{request.scope.get('root_path', '')}/{{path}}"
+    # FastAPI versions that include routers without copying their routes keep the
+    # route's path relative to its router, and the full path in the route context
+    route_context = request.scope.get("fastapi", {}).get("effective_route_context")
+    if route_context is not None:
+        return route_context.path
+    return request.scope["route"].path
+
+
+# Record the latency of every request by route template
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method, route=_route_template(request), status=status
+        ).observe(time.perf_counter() - start)
+
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
+# Include Prometheus metrics endpoint
+app.include_router(metrics.router)
+
 # Mount static files
+os.makedirs(settings.STATIC_DIR, exist_ok=True)
 app.mount("/static", StaticFiles(directory=str(settings.STATIC_DIR)), name="static")
 
 # Initialize templates
@@ -45,11 +83,11 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1 and sys.argv[1] == "--cli":
-        # Run in CLI mode
-        from app.cli import run_cli_analysis
-        import asyncio
-        asyncio.run(run_cli_analysis())
+        # Run in CLI mode (python -m app.cli starts faster, without the web stack)
+        from app.cli import main
+
+        main(sys.argv[2:])
     else:
         # Run in server mode
         print(f"Starting server on http://localhost:{settings.PORT}")
-        uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=settings.DEBUG) 
\ No newline at end of file
+        uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=settings.DEBUG) 
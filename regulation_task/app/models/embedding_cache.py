@@ -0,0 +1,240 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.db.sqlite import connect
+
+# Share of ``max_entries`` freed by each eviction, so a full store is counted and
+# trimmed once per that many writes rather than on every write
+EVICTION_FRACTION = 0.1
+
+
+def make_embedding_key(model: str, text: str) -> bytes:
+    """Key of a text's embedding: a 16-byte hash of the embedding model and the text."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()[:16]
+
+
+class EmbeddingStore:
+    """Persistent embedding store in SQLite.
+
+    Vectors are stored as zlib-compressed float32 bytes under binary keys, so an
+    entry takes a few hundred bytes for sparse vectors and is read back bit for bit.
+    The oldest entries are evicted once the store holds more than ``max_entries``,
+    down to ``EVICTION_FRACTION`` below it. Writes are counted in memory and the
+    table is only counted again when that count passes the limit; a store shared by
+    several processes can exceed it by what the others wrote since.
+    """
+
+    def __init__(self, path: Path, max_entries: int):
+        """Initialize the store; the database is opened on first use."""
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._count: Optional[int] = None  # Upper bound on the rows, until counted again
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key BLOB PRIMARY KEY,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Get the stored vectors of the keys that are present."""
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # Stay under SQLite's limit on query parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = conn.execute(
+                    "SELECT key, dim, vector FROM embeddings "
+                    f"WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, dim, vector in rows:
+                    found[bytes(key)] = np.frombuffer(
+                        zlib.decompress(vector), dtype=np.float32, count=dim
+                    )
+        return found
+
+    def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        """Store vectors, evicting the oldest entries once there are more than ``max_entries``."""
+        now = time.time()
+        rows = [
+            (
+                key,
+                vector.shape[0],
+                zlib.compress(np.ascontiguousarray(vector, dtype=np.float32).tobytes(), 1),
+                now,
+            )
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dim, vector, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                if self._count is None:
+                    self._count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                else:
+                    # Replaced keys are counted too, so this only overestimates
+                    self._count += len(rows)
+                if self._count > self.max_entries:
+                    self._count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self._count > self.max_entries:
+                    excess = self._count - int(self.max_entries * (1 - EVICTION_FRACTION))
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY created_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self._count -= excess
+
+    def clear(self) -> None:
+        """Remove every stored vector."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM embeddings")
+            self._count = 0
+
+    def count(self) -> int:
+        """Get the number of stored vectors."""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._count = None
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches vectors by text and embedding model.
+
+    Lookups go to an in-memory LRU first, then to the persistent store; only the
+    texts found in neither are embedded, in one batch, and then stored in both.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, store: EmbeddingStore, memory_entries: Optional[int] = None
+    ):
+        """Wrap an embeddings model; its ``model`` attribute (or class name) is part of the key."""
+        self.embeddings = embeddings
+        self.store = store
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+        self.memory_entries = (
+            settings.EMBEDDING_CACHE_MEMORY_ENTRIES if memory_entries is None else memory_entries
+        )
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _embed_missing(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with the wrapped model."""
+        if hasattr(self.embeddings, "embed_documents_array"):
+            return self.embeddings.embed_documents_array(texts)
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        """Put a vector in the in-memory LRU (caller holds the lock)."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into a float32 matrix, reusing cached vectors."""
+        if not texts:
+            return self._embed_missing(texts)
+        keys = [make_embedding_key(self.model, text) for text in texts]
+        vectors: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[key] = vector
+        memory_hits = len(vectors)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        stored = self.store.get_many(missing) if missing else {}
+        vectors.update(stored)
+
+        texts_by_key = dict(zip(keys, texts))
+        new_keys = [key for key in missing if key not in stored]
+        if new_keys:
+            matrix = self._embed_missing([texts_by_key[key] for key in new_keys])
+            computed = {key: row.copy() for key, row in zip(new_keys, matrix)}
+            self.store.put_many(computed)
+            vectors.update(computed)
+
+        with self._lock:
+            for key in missing:
+                self._remember(key, vectors[key])
+            self.hits += memory_hits
+            self.disk_hits += len(stored)
+            self.misses += len(new_keys)
+        for hit, count in ((True, memory_hits + len(stored)), (False, len(new_keys))):
+            if count:
+                record_cache_lookup("embeddings", hit=hit, count=count)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors."""
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing a cached vector."""
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the number of vectors held."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "stored_entries": self.store.count(),
+        }
+
+
+# Shared embedding store
+embedding_store = EmbeddingStore(
+    settings.EMBEDDING_CACHE_PATH, max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+)
@@ -1,39 +1,155 @@
 import hashlib
+import re
 import textwrap
-from typing import List
+from typing import Dict, List
 
-from langchain.embeddings.base import Embeddings
-from anthropic import Anthropic
+import numpy as np
+from langchain_core.embeddings import Embeddings
 
 from app.core.config import settings
+from app.core.metrics import PIPELINE_STAGE_SECONDS
+
+# Dimension of the hashed embedding space
+EMBEDDING_DIM = 1536
+
+# Width of the text pieces that are hashed into the embedding
+PIECE_WIDTH = 10
+
+# Identifies the embedding scheme in cache keys; change it when the vectors change
+EMBEDDING_MODEL = f"hashed-pieces-{PIECE_WIDTH}x{EMBEDDING_DIM}-v1"
+
+# Scale applied to a row with k active dimensions. Computed with the same float
+# arithmetic as the original per-text normalization so the vectors stay identical.
+_ROW_SCALES = np.array(
+    [0.0] + [1.0 / (float(k) ** 0.5) for k in range(1, EMBEDDING_DIM + 1)],
+    dtype=np.float64,
+).astype(np.float32)
+
+
+_PIECE_WRAPPER = textwrap.TextWrapper(width=PIECE_WIDTH)
+_SPACE_RUNS = re.compile(r"( +)")
+_WHITESPACE_TO_SPACE = str.maketrans("\n\x0b\x0c\r", "    ")
+
+
+def _wrap_pieces(text: str) -> List[str]:
+    """Split text exactly like ``textwrap.wrap(text, PIECE_WIDTH)``.
+
+    Text without hyphens (the common case) takes a fast path: whitespace is munged
+    the same way, chunks are plain space runs, and the greedy line filling of
+    ``TextWrapper`` is replayed on them. Hyphenated text uses ``TextWrapper`` itself.
+    """
+    if "-" in text:
+        return _PIECE_WRAPPER.wrap(text)
+
+    munged = text.expandtabs().translate(_WHITESPACE_TO_SPACE)
+    chunks = [chunk for chunk in _SPACE_RUNS.split(munged) if chunk]
+    pieces: List[str] = []
+    count = len(chunks)
+    i = 0
+    while i < count:
+        # One leading whitespace chunk is dropped on every line but the first
+        if pieces and chunks[i].strip() == "":
+            i += 1
+
+        line = []
+        line_len = 0
+        while i < count and line_len + len(chunks[i]) <= PIECE_WIDTH:
+            line.append(chunks[i])
+            line_len += len(chunks[i])
+            i += 1
+
+        # Words longer than the width are broken across lines
+        if i < count and len(chunks[i]) > PIECE_WIDTH:
+            space_left = PIECE_WIDTH - line_len
+            line.append(chunks[i][:space_left])
+            chunks[i] = chunks[i][space_left:]
+
+        if line and line[-1].strip() == "":
+            line.pop()
+        if line:
+            pieces.append("".join(line))
+    return pieces
+
+
+def _digests_to_indices(digests: bytes) -> np.ndarray:
+    """Reduce concatenated 16-byte md5 digests to embedding indices.
+
+    Equivalent to ``int(hexdigest, 16) % EMBEDDING_DIM`` for every digest, computed
+    for the whole batch at once with a modular Horner scheme over the digest bytes.
+    """
+    digest_bytes = np.frombuffer(digests, dtype=np.uint8).reshape(-1, 16).astype(np.int64)
+    indices = np.zeros(digest_bytes.shape[0], dtype=np.int64)
+    for column in range(16):
+        indices = (indices * 256 + digest_bytes[:, column]) % EMBEDDING_DIM
+    return indices
 
 
 class ClaudeEmbeddings(Embeddings):
     """Claude embeddings wrapper for Langchain."""
-    
+
+    model = EMBEDDING_MODEL
+
     def __init__(self, api_key: str = None):
         """Initialize with API key."""
         self.api_key = api_key or settings.CLAUDE_API_KEY
-        self.client = Anthropic(api_key=self.api_key)
-        
+        self._client = None
+
+    @property
+    def client(self):
+        """Claude client, created on first use (embedding does not call the API)."""
+        if self._client is None:
+            from anthropic import Anthropic
+
+            self._client = Anthropic(api_key=self.api_key)
+        return self._client
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into a single float32 matrix of shape (len(texts), 1536).
+
+        Every text is split into 10-character pieces, each distinct piece in the batch
+        is hashed once, and the hashes are reduced, scattered and normalized for the
+        whole batch in vectorized form.
+        """
+        with PIPELINE_STAGE_SECONDS.labels(stage="embedding").time():
+            return self._embed_batch(texts)
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts (see embed_documents_array)."""
+        matrix = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        if not texts:
+            return matrix
+
+        # Map each distinct piece to a slot so it is hashed only once per batch
+        piece_slots: Dict[str, int] = {}
+        rows: List[int] = []
+        slots: List[int] = []
+        for row, text in enumerate(texts):
+            for piece in _wrap_pieces(text):
+                slot = piece_slots.get(piece)
+                if slot is None:
+                    slot = len(piece_slots)
+                    piece_slots[piece] = slot
+                rows.append(row)
+                slots.append(slot)
+
+        if not rows:
+            return matrix
+
+        digests = b"".join(hashlib.md5(piece.encode()).digest() for piece in piece_slots)
+        piece_indices = _digests_to_indices(digests)
+
+        matrix[np.asarray(rows), piece_indices[np.asarray(slots)]] = 1.0
+
+        # Normalize: every active dimension is 1.0, so the norm is sqrt(active count)
+        active_counts = np.count_nonzero(matrix, axis=1)
+        matrix *= _ROW_SCALES[active_counts][:, np.newaxis]
+        return matrix
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed documents using Claude."""
-        embeddings = []
-        for text in texts:
-            # Create a deterministic embedding based on hash values
-            embedding = [0.0] * 1536
-            for i, chunk in enumerate(textwrap.wrap(text, 10)):
-                h = int(hashlib.md5(chunk.encode()).hexdigest(), 16)
-                idx = h % 1536
-                embedding[idx] = 1.0
-            # Normalize
-            magnitude = sum(x**2 for x in embedding) ** 0.5
-            if magnitude > 0:
-                embedding = [x/magnitude for x in embedding]
-            embeddings.append(embedding)
-        return embeddings
-    
+        return self.embed_documents_array(texts).tolist()
+
     def embed_query(self, text: str) -> List[float]:
         """Embed query using Claude."""
         # Use the same approach as for documents
-        return self.embed_documents([text])[0] 
\ No newline at end of file
+        return self.embed_documents([text])[0]
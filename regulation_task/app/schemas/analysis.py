@@ -6,6 +6,10 @@ class AnalysisRequest(BaseModel):
     """Request model for document analysis."""
     sop_file: str = Field(..., description="Path to the SOP file to analyze")
     regulatory_files: List[str] = Field(default=[], description="Paths to regulatory files to compare against")
+    priority: int = Field(default=0, description="Scheduling priority, lower values run first")
+    reuse: bool = Field(
+        default=True, description="Reuse an identical analysis that is running or completed"
+    )
 
 
 class AnalysisResponse(BaseModel):
@@ -21,6 +25,28 @@ class AnalysisResult(BaseModel):
     status: str = Field(..., description="Current status of the job")
     report: Optional[Dict[str, Any]] = Field(default=None, description="Analysis report if completed")
     error: Optional[str] = Field(default=None, description="Error message if failed")
+    queue_position: Optional[int] = Field(
+        default=None, description="Position in the job queue if queued"
+    )
+
+
+class JobQueueStats(BaseModel):
+    """Response model for job scheduler statistics."""
+
+    workers: int = Field(..., description="Number of jobs that can run at the same time")
+    running: int = Field(..., description="Jobs currently running")
+    queued: int = Field(..., description="Jobs waiting in the queue")
+    max_queue: int = Field(..., description="Queue capacity before submissions are rejected")
+    oldest_queued_wait: float = Field(
+        ..., description="Seconds the oldest queued job has been waiting"
+    )
+    average_wait: float = Field(..., description="Average queue wait of recent jobs in seconds")
+    max_wait: float = Field(..., description="Longest queue wait of recent jobs in seconds")
+    average_run_time: float = Field(..., description="Average run time of recent jobs in seconds")
+    completed: int = Field(..., description="Jobs completed since startup")
+    failed: int = Field(..., description="Jobs failed since startup")
+    cancelled: int = Field(..., description="Jobs cancelled since startup")
+    rejected: int = Field(..., description="Submissions rejected because the queue was full")
 
 
 class ComplianceIssue(BaseModel):
@@ -44,4 +70,4 @@ class AnalysisReport(BaseModel):
     discrepancies: List[ComplianceIssue] = Field(default=[], description="List of compliance issues")
     recommended_adjustments: List[RecommendedAdjustment] = Field(default=[], description="List of recommended adjustments")
     compliance_score: int = Field(..., description="Compliance score from 0-100")
-    relevant_clauses: Optional[List[Dict[str, Any]]] = Field(default=None, description="Relevant regulatory clauses") 
\ No newline at end of file
+    relevant_clauses: Optional[List[Dict[str, Any]]] = Field(default=None, description="Relevant regulatory clauses") 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 
 
@@ -16,10 +16,52 @@ class FileUploadResponse(BaseModel):
     path: str = Field(..., description="Path where the file was saved")
     size: Optional[int] = Field(default=None, description="Size of the file in bytes")
     message: Optional[str] = Field(default=None, description="Optional message about the upload status")
+    ingest_job_id: Optional[str] = Field(
+        default=None,
+        description=(
+            "Background ingest job indexing the document, see GET /api/files/ingest/{job_id}"
+        ),
+    )
+    ingest_status: Optional[str] = Field(
+        default=None, description="Status of the background ingest job"
+    )
 
 
 class FileDeleteResponse(BaseModel):
     """Response model for file deletion."""
     filename: str = Field(..., description="Name of the deleted file")
     success: bool = Field(..., description="Whether the deletion was successful")
-    message: str = Field(..., description="Message about the deletion status") 
\ No newline at end of file
+    message: str = Field(..., description="Message about the deletion status") 
+
+
+class IngestRequest(BaseModel):
+    """Request model for bulk ingestion of a regulation directory."""
+
+    directory: Optional[str] = Field(
+        default=None,
+        description=(
+            "Directory to ingest, within the data directory; "
+            "defaults to the regulations directory"
+        ),
+    )
+    force: bool = Field(default=False, description="Re-index documents that are already indexed")
+
+
+class IngestResponse(BaseModel):
+    """Response model for ingest job creation."""
+
+    job_id: str = Field(..., description="Unique identifier for the ingest job")
+    status: str = Field(..., description="Current status of the job")
+    message: str = Field(..., description="Human-readable status message")
+
+
+class IngestStatus(BaseModel):
+    """Response model for ingest job status."""
+
+    job_id: str = Field(..., description="Unique identifier for the ingest job")
+    status: str = Field(..., description="Current status of the job")
+    progress: Dict[str, Any] = Field(default={}, description="File and clause counts so far")
+    summary: Optional[Dict[str, Any]] = Field(
+        default=None, description="Counts, failures and clauses per second if completed"
+    )
+    error: Optional[str] = Field(default=None, description="Error message if failed")
@@ -3,30 +3,57 @@ import time
 import json
 import asyncio
 from pathlib import Path
-from typing import List, Dict, Any
-
-from fastapi import Depends, BackgroundTasks
+from typing import Iterable, List, Dict, Any, Optional
 
 from app.core.config import settings
-from app.db.vector_store import add_regulatory_clauses_to_db, find_relevant_clauses
+from app.db.job_queue import job_queue
+from app.db.job_store import ACTIVE_STATUSES, is_stale, job_owner, job_store
+from app.db.vector_store import (
+    add_regulatory_clauses_to_db,
+    find_relevant_clauses_by_chunk,
+    get_vector_db,
+    rank_relevant_clauses,
+)
 from app.services.document_service import process_regulatory_document, process_sop_document
+from app.services.ingestion_service import wait_for_document_ingest
+from app.services.job_progress import StageTracker, job_progress
+from app.services.job_scheduler import DuplicateJob, JobQueueFull, job_scheduler
 from app.services.llm_service import LLMService
-from app.utils.document_processing import get_file_hash
-
+from app.services.report_catalog import report_catalog
+from app.services.result_index import result_index
+from app.utils.document_processing import get_file_hash, group_chunks_into_sections
 
-# Background tasks storage (in-memory cache)
-background_tasks = {}
 
-
-def _save_job_status(job_id: str, status_data: Dict[str, Any]):
-    """Save job status to disk."""
-    status_file = settings.REPORTS_DIR / f"{job_id}_status.json"
-    with open(status_file, "w", encoding="utf-8") as f:
-        json.dump(status_data, f, ensure_ascii=False, indent=2)
+def _save_job_status(
+    job_id: str,
+    status_data: Dict[str, Any],
+    from_statuses: Optional[Iterable[Optional[str]]] = None,
+    replace: bool = False,
+) -> bool:
+    """
+    Save job status to the job store and publish it to progress subscribers.
+    
+    With ``from_statuses``, the status only changes if the job is in one of them,
+    e.g. a job cancelled by another worker is not moved to processing. Queued and
+    processing jobs are recorded as owned by this process, which renews their
+    heartbeat while it runs (unless the status sets another ``owner``).
+    
+    Returns:
+        False if the job was not in one of ``from_statuses``
+    """
+    if status_data["status"] in ACTIVE_STATUSES:
+        status_data = {"owner": job_owner(), "heartbeat_at": time.time(), **status_data}
+    if not job_store.update(
+        job_id, status_data, kind="analysis", from_statuses=from_statuses, replace=replace
+    ):
+        return False
+    fields = {"error": status_data["error"]} if "error" in status_data else {}
+    job_progress.set_status(job_id, status_data["status"], **fields)
+    return True
 
 
 def _load_job_status(job_id: str) -> Dict[str, Any]:
-    """Load job status from disk."""
+    """Load job status from a status file written before the job store existed."""
     status_file = settings.REPORTS_DIR / f"{job_id}_status.json"
     if not status_file.exists():
         return None
@@ -38,65 +65,125 @@ def _load_job_status(job_id: str) -> Dict[str, Any]:
         return None
 
 
+async def _process_regulatory_after_ingest(file_path: str) -> Dict[str, Any]:
+    """Process a regulatory document, first waiting for an upload ingest of it in flight."""
+    await wait_for_document_ingest(file_path)
+    return await process_regulatory_document(file_path)
+
+
 async def process_documents_and_analyze(
     sop_file: str, 
     regulatory_files: List[str],
     job_id: str,
-    llm_service: LLMService = None
+    llm_service: LLMService = None,
+    tracker: Optional[StageTracker] = None,
 ) -> Dict[str, Any]:
-    """Process all documents and perform analysis."""
+    """Process all documents and perform analysis, publishing progress stage by stage."""
+    if tracker is None:
+        tracker = StageTracker(job_id)
     try:
         # Initialize LLM service if not provided
         if llm_service is None:
             llm_service = LLMService()
         
-        # Process SOP document
-        sop_data = await process_sop_document(sop_file)
-        
-        # Process regulatory documents in parallel
-        regulatory_data_tasks = [process_regulatory_document(file) for file in regulatory_files]
-        regulatory_data_list = await asyncio.gather(*regulatory_data_tasks)
+        # Process the SOP and regulatory documents in parallel
+        with tracker.stage(
+            "extracting", documents_done=0, documents_total=len(regulatory_files) + 1
+        ):
+            documents_done = 0
+            
+            async def track_document(coro):
+                nonlocal documents_done
+                result = await coro
+                documents_done += 1
+                tracker.update(documents_done=documents_done)
+                return result
+            
+            sop_data, *regulatory_data_list = await asyncio.gather(
+                track_document(process_sop_document(sop_file)),
+                *[
+                    track_document(_process_regulatory_after_ingest(file))
+                    for file in regulatory_files
+                ],
+            )
         
         # Set up vector database
-        from app.main import app
-        db = app.state.vector_db
+        db = await asyncio.to_thread(get_vector_db)
         
         # Add regulatory clauses to vector database (only if not already indexed)
-        for reg_data in regulatory_data_list:
-            # Generate a unique document ID based on file hash
-            doc_id = get_file_hash(reg_data["file_path"])
-            
-            add_regulatory_clauses_to_db(
-                clauses=reg_data["clauses"],
-                source=reg_data["file_name"],
+        with tracker.stage(
+            "indexing",
+            documents_indexed=0,
+            clauses_total=sum(len(r["clauses"]) for r in regulatory_data_list),
+        ):
+            clauses_added = clauses_removed = 0
+            for i, reg_data in enumerate(regulatory_data_list):
+                # Generate a unique document ID based on file hash
+                doc_id = await asyncio.to_thread(get_file_hash, reg_data["file_path"])
+                
+                # Embedding and Chroma writes run in a thread to keep the event loop free
+                index_stats = await asyncio.to_thread(
+                    add_regulatory_clauses_to_db,
+                    clauses=reg_data["clauses"],
+                    source=reg_data["file_name"],
+                    db=db,
+                    doc_id=doc_id,
+                )
+                clauses_added += index_stats["added"]
+                clauses_removed += index_stats["removed"]
+                tracker.update(
+                    documents_indexed=i + 1,
+                    clauses_added=clauses_added,
+                    clauses_removed=clauses_removed,
+                )
+        
+        # Find relevant clauses for each SOP chunk, in the requested regulations only
+        with tracker.stage("retrieving", sop_chunks=len(sop_data["chunks"])):
+            clauses_by_chunk = await asyncio.to_thread(
+                find_relevant_clauses_by_chunk,
+                sop_chunks=sop_data["chunks"],
                 db=db,
-                doc_id=doc_id
+                top_k=settings.TOP_K_CLAUSES,
+                sources=[reg_data["file_name"] for reg_data in regulatory_data_list],
             )
+            relevant_clauses = rank_relevant_clauses(clauses_by_chunk)
+            tracker.update(relevant_clauses=len(relevant_clauses))
         
-        # Find relevant clauses for SOP
-        relevant_clauses = find_relevant_clauses(
-            sop_chunks=sop_data["chunks"], 
-            db=db,
-            top_k=settings.TOP_K_CLAUSES
-        )
+        # Analyze SOP with LLM, section by section in map-reduce mode
+        sections = []
+        if settings.ANALYSIS_MODE == "map_reduce":
+            sections = group_chunks_into_sections(sop_data["text"], sop_data["chunks"])
+            for section in sections:
+                section["clauses"] = rank_relevant_clauses(
+                    [clauses_by_chunk[i] for i in section["chunk_indices"]]
+                )
         
-        # Analyze SOP with LLM
-        analysis_result = await llm_service.analyze_sop_with_llm(sop_data["text"], relevant_clauses)
+        with tracker.stage("llm", sections_done=0, sections_total=max(len(sections), 1)):
+            if sections:
+                analysis_result = await llm_service.analyze_sop_sections(
+                    sections, on_section_done=lambda done: tracker.update(sections_done=done)
+                )
+            else:
+                analysis_result = await llm_service.analyze_sop_with_llm(
+                    sop_data["text"], relevant_clauses
+                )
+                tracker.update(sections_done=1)
         
         # Prepare final report
         report = {
             "job_id": job_id,
             "sop_file": Path(sop_file).name,
             "regulatory_files": [Path(file).name for file in regulatory_files],
+            "analysis_mode": "map_reduce" if sections else "single",
             "analysis": analysis_result,
             "relevant_clauses": relevant_clauses[:10],  # Include top 10 relevant clauses
-            "timestamp": time.time()
+            "timings": dict(tracker.timings),  # Seconds per stage, up to saving the report
+            "timestamp": time.time(),
         }
         
         # Save report
-        report_path = settings.REPORTS_DIR / f"{job_id}.json"
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        with tracker.stage("saving"):
+            report_catalog.write_report(job_id, report)
         
         return report
     
@@ -104,23 +191,37 @@ async def process_documents_and_analyze(
         error_report = {
             "job_id": job_id,
             "status": "failed",
-            "error": str(e)
+            "error": str(e),
+            "timings": dict(tracker.timings),
         }
         
         # Save error report
-        report_path = settings.REPORTS_DIR / f"{job_id}.json"
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(error_report, f, ensure_ascii=False, indent=2)
+        report_catalog.write_report(job_id, error_report)
         
         return error_report
 
 
-async def run_analysis_task(sop_file: str, regulatory_files: List[str], job_id: str):
-    """Run analysis task in background and update status."""
+def _is_reusable_report(report: Dict[str, Any]) -> bool:
+    """Check whether a report holds a successful analysis that identical jobs may reuse.
+
+    Map-reduce analyses where some sections failed are partial, so they are not reused.
+    """
+    analysis = report.get("analysis")
+    return analysis is not None and "error" not in analysis and not analysis.get("section_errors")
+
+
+async def run_analysis_task(
+    sop_file: str, regulatory_files: List[str], job_id: str, fingerprint: Optional[str] = None
+):
+    """Run analysis task in background and update status.
+    
+    Errors are recorded in the job status, then raised again for the job scheduler's stats.
+    """
     try:
         status_data = {"status": "processing", "start_time": time.time()}
-        background_tasks[job_id] = status_data
-        _save_job_status(job_id, status_data)
+        if not _save_job_status(job_id, status_data, from_statuses=("queued",)):
+            # Cancelled through another worker while queued
+            return
         
         result = await process_documents_and_analyze(sop_file, regulatory_files, job_id)
         
@@ -129,29 +230,186 @@ async def run_analysis_task(sop_file: str, regulatory_files: List[str], job_id:
             "result": result,
             "end_time": time.time()
         }
-        background_tasks[job_id] = status_data
-        _save_job_status(job_id, status_data)
+        completed = _save_job_status(job_id, status_data, from_statuses=("processing",))
+        
+        if completed and fingerprint and _is_reusable_report(result):
+            result_index.record_report(fingerprint, job_id)
+    except asyncio.CancelledError:
+        _save_job_status(
+            job_id,
+            {"status": "cancelled", "end_time": time.time()},
+            from_statuses=("queued", "processing"),
+        )
+        raise
     except Exception as e:
         status_data = {
             "status": "failed",
             "error": str(e),
             "end_time": time.time()
         }
-        background_tasks[job_id] = status_data
-        _save_job_status(job_id, status_data)
+        _save_job_status(job_id, status_data, from_statuses=("processing",))
+        raise
+    finally:
+        if fingerprint:
+            result_index.clear_running(fingerprint, job_id)
+
+
+def find_reusable_job(fingerprint: str) -> Optional[str]:
+    """
+    Find a job for an identical analysis: one still queued or running, or else a
+    completed report.
+    """
+    job_id = result_index.find_running(fingerprint)
+    if job_id is not None:
+        state = job_store.get(job_id)
+        if state is not None and state["status"] in ACTIVE_STATUSES and not is_stale(state):
+            return job_id
+    return result_index.find_report(fingerprint)
+
+
+def submit_analysis_job(
+    sop_file: str,
+    regulatory_files: List[str],
+    job_id: str,
+    priority: int = 0,
+    fingerprint: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Queue an analysis job on the job scheduler, or on the durable job queue for
+    worker processes when JOB_EXECUTION is "queue".
+    
+    With a fingerprint, identical requests can attach to the job while it is in
+    flight and reuse its report once it completes. Raises JobQueueFull when the
+    queue is at capacity, and DuplicateJob when a job with this ID already exists.
+    """
+    status_data = {"status": "queued", "queued_at": time.time()}
+    if settings.JOB_EXECUTION == "queue":
+        # Saved first, as a worker may claim the job as soon as it is enqueued. Progress
+        # is published in the worker, so events for it are streamed from the job store.
+        if not job_store.update(job_id, status_data, kind="analysis", from_statuses=(None,)):
+            raise DuplicateJob(f"Job already submitted: {job_id}")
+        payload = {
+            "sop_file": sop_file,
+            "regulatory_files": regulatory_files,
+            "fingerprint": fingerprint,
+        }
+        if not job_queue.enqueue(
+            job_id, payload, priority=priority, max_queued=settings.JOB_QUEUE_SIZE
+        ):
+            job_store.delete(job_id)
+            raise JobQueueFull(job_queue.estimate_retry_after())
+    else:
+        job_scheduler.submit(
+            job_id,
+            lambda: run_analysis_task(sop_file, regulatory_files, job_id, fingerprint),
+            priority=priority,
+        )
+        if not _save_job_status(job_id, status_data, from_statuses=(None,)):
+            # Another API worker already recorded a job with this ID
+            job_scheduler.cancel(job_id)
+            raise DuplicateJob(f"Job already submitted: {job_id}")
+    if fingerprint:
+        result_index.mark_running(fingerprint, job_id)
+    return status_data
+
+
+async def run_queued_analysis(job: Dict[str, Any]) -> Optional[str]:
+    """
+    Run an analysis job claimed from the durable job queue (see app.worker).
+    
+    Returns:
+        The job's status once the run ends; errors are raised after they are recorded
+    """
+    payload = job["payload"]
+    if job["attempt"] > 1:
+        # The worker that ran the job before stopped sending heartbeats
+        print(f"Retrying job {job['job_id']} (attempt {job['attempt']})")
+        requeued = {"status": "queued", "attempt": job["attempt"], "owner": None}
+        _save_job_status(job["job_id"], requeued, from_statuses=("processing",))
+    await run_analysis_task(
+        payload["sop_file"], payload["regulatory_files"], job["job_id"], payload.get("fingerprint")
+    )
+    return job_store.get_status(job["job_id"])
+
+
+def fail_abandoned_job(job_id: str, error: str) -> None:
+    """Record that a queued job was given up on after its workers stopped sending heartbeats."""
+    _save_job_status(
+        job_id,
+        {"status": "failed", "error": error, "end_time": time.time()},
+        from_statuses=("queued", "processing"),
+    )
+
+
+def cancel_analysis_job(job_id: str) -> bool:
+    """Cancel a queued or running analysis job. Returns False if the job is not active."""
+    job = job_scheduler.get(job_id)
+    if job is None and settings.JOB_EXECUTION == "queue":
+        # A worker process running the job stops it at its next heartbeat
+        outcome = job_queue.cancel(job_id)
+        if outcome == "cancelled":
+            cancelled = {"status": "cancelled", "end_time": time.time()}
+            _save_job_status(job_id, cancelled, from_statuses=("queued", "processing"))
+            result_index.forget_job(job_id)
+        return outcome is not None
+    if job is None:
+        # Queued on another API worker, which skips it when it is dequeued
+        if _save_job_status(
+            job_id, {"status": "cancelled", "end_time": time.time()}, from_statuses=("queued",)
+        ):
+            result_index.forget_job(job_id)
+            return True
+        return False
+    was_queued = job.status == "queued"
+    if not job_scheduler.cancel(job_id):
+        return False
+    
+    # Running jobs record their own cancellation when the task stops
+    if was_queued:
+        _save_job_status(
+            job_id, {"status": "cancelled", "end_time": time.time()}, from_statuses=("queued",)
+        )
+        result_index.forget_job(job_id)
+    return True
+
+
+def forget_analysis_job(job_id: str) -> None:
+    """Forget a job whose report was deleted."""
+    job_store.delete(job_id)
+    result_index.forget_job(job_id)
+
+
+def get_queue_position(job_id: str) -> Optional[int]:
+    """Get the position of a queued job (with the job scheduler, only jobs on this API worker)."""
+    if settings.JOB_EXECUTION == "queue":
+        return job_queue.position(job_id)
+    return job_scheduler.queue_position(job_id)
+
+
+def get_queue_stats() -> Dict[str, Any]:
+    """Get job queue depth, wait times and job counts of the job scheduler or the durable queue."""
+    if settings.JOB_EXECUTION == "queue":
+        return {
+            **job_queue.stats(),
+            "max_queue": settings.JOB_QUEUE_SIZE,
+            "rejected": job_queue.rejected,
+        }
+    return job_scheduler.stats()
 
 
 def get_job_status(job_id: str) -> Dict[str, Any]:
-    """Get the status of a job."""
-    # First check in-memory cache
-    if job_id in background_tasks:
-        return background_tasks[job_id]
+    """Get the status of a job, whichever worker runs it."""
+    # First check the job store
+    status_data = job_store.get(job_id)
+    if status_data:
+        if status_data["status"] == "queued":
+            return {**status_data, "queue_position": get_queue_position(job_id)}
+        return status_data
     
-    # If not in memory, try to load from disk
+    # If not in the store, try a status file from before the job store
     status_data = _load_job_status(job_id)
     if status_data:
-        # Update in-memory cache
-        background_tasks[job_id] = status_data
+        job_store.update(job_id, status_data, kind="analysis", from_statuses=(None,))
         return status_data
     
     # Check if the final report exists
@@ -175,10 +433,9 @@ def get_job_status(job_id: str) -> Dict[str, Any]:
                     "end_time": report_data.get("timestamp", time.time())
                 }
             
-            background_tasks[job_id] = status_data
-            _save_job_status(job_id, status_data)
+            job_store.update(job_id, status_data, kind="analysis", from_statuses=(None,))
             return status_data
         except Exception:
             pass
     
-    return None 
\ No newline at end of file
+    return None 
@@ -0,0 +1,78 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+
+def _warm_worker() -> None:
+    """Import the document parsing libraries once when a worker process starts."""
+    import fitz  # type: ignore[import-untyped]  # noqa: F401
+    import docx  # noqa: F401
+
+    import app.utils.document_processing  # noqa: F401
+
+
+def _noop() -> None:
+    """Task used to force worker processes to start."""
+
+
+class ExtractionPool:
+    """Managed process pool for CPU-bound document extraction.
+
+    Workers are spawned with the parsing libraries already imported, and the number
+    of tasks submitted at once is capped so large jobs cannot flood the pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        """Initialize the pool; worker processes are started lazily or by ``start``."""
+        self.max_workers = settings.EXTRACTION_WORKERS if max_workers is None else max_workers
+        self.max_in_flight = max_in_flight or settings.EXTRACTION_MAX_IN_FLIGHT
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """The underlying process pool, or None when extraction runs in threads."""
+        if self.max_workers <= 0:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        return self._executor
+
+    def start(self) -> None:
+        """Start and warm up all worker processes ahead of the first job."""
+        executor = self.executor
+        if executor is not None:
+            for future in [executor.submit(_noop) for _ in range(self.max_workers)]:
+                future.result()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the in-flight limiter bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` in the pool without blocking the event loop."""
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes, cancelling tasks that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# Shared extraction pool
+extraction_pool = ExtractionPool()
@@ -0,0 +1,422 @@
+import asyncio
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.db.index_registry import index_registry
+from app.db.job_store import ACTIVE_STATUSES, job_owner, job_store
+from app.db.vector_store import (
+    add_regulatory_clauses_to_db,
+    delete_clauses,
+    diff_clauses,
+    get_max_batch_size,
+    is_document_indexed,
+    remove_previous_layout_clauses,
+    write_clauses,
+)
+from app.services.document_service import process_regulatory_document
+from app.services.job_progress import TERMINAL_STATUSES, StageTracker, job_progress
+from app.services.job_scheduler import DuplicateJob, JobQueueFull, job_scheduler
+from app.utils.document_processing import get_file_hash
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+# File types ingested from a directory
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc")
+
+# Single-document ingests queued or running on this worker, by resolved file path; each
+# future is resolved when its ingest ends
+_document_ingests: Dict[str, "asyncio.Future[None]"] = {}
+
+
+def list_regulatory_files(directory: Path) -> List[str]:
+    """List the supported documents in a directory, sorted by name."""
+    return sorted(
+        str(Path(directory) / name)
+        for name in os.listdir(directory)
+        if Path(name).suffix.lower() in SUPPORTED_EXTENSIONS
+        and os.path.isfile(Path(directory) / name)
+    )
+
+
+async def _extract(file_path: str, doc_id: str) -> Dict[str, Any]:
+    """Extract a document's clauses, returning the error instead of raising it."""
+    try:
+        return {
+            "file_path": file_path,
+            "doc_id": doc_id,
+            "data": await process_regulatory_document(file_path),
+        }
+    except Exception as e:
+        return {"file_path": file_path, "doc_id": doc_id, "error": str(e)}
+
+
+async def ingest_directory(
+    directory: Path,
+    db: "Chroma",
+    force: bool = False,
+    batch_size: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Extract and index every regulatory document in a directory.
+
+    Documents are extracted in parallel on the extraction pool, and their new or
+    changed clauses are embedded and written to Chroma in batches of up to
+    ``batch_size`` clauses (by default the most Chroma accepts in one write). A
+    document is recorded in the index registry once all of its clauses are written,
+    so a run that fails part-way resumes where it stopped: documents already indexed
+    are skipped unless ``force`` is set. A document that fails does not stop the run.
+
+    Returns:
+        Summary with file counts, failures, clause counts and clauses per second
+    """
+    start = time.perf_counter()
+    batch_size = min(
+        batch_size or settings.INGEST_BATCH_SIZE or get_max_batch_size(db), get_max_batch_size(db)
+    )
+    files = await asyncio.to_thread(list_regulatory_files, directory)
+    doc_ids = await asyncio.to_thread(lambda: [get_file_hash(file) for file in files])
+    pending = [
+        (file, doc_id)
+        for file, doc_id in zip(files, doc_ids)
+        if force or not is_document_indexed(Path(file).name, doc_id)
+    ]
+
+    counts = {
+        "files_total": len(files),
+        "files_skipped": len(files) - len(pending),
+        "files_indexed": 0,
+        "files_failed": 0,
+        "clauses_added": 0,
+        "clauses_removed": 0,
+        "clauses_indexed": 0,
+    }
+    failures: List[Dict[str, str]] = []
+    buffer: Dict[str, str] = {}
+    buffer_sources: Dict[str, str] = {}
+    buffered_documents: List[Dict[str, Any]] = []
+
+    def report_progress(progress: Dict[str, Any]):
+        if on_progress is not None:
+            on_progress(progress)
+
+    def fail(file_path: str, error: str) -> Dict[str, Any]:
+        counts["files_failed"] += 1
+        failures.append({"file": file_path, "error": error})
+        return {**counts, "file": file_path}
+
+    def flush() -> List[Dict[str, Any]]:
+        """Write the buffered clauses, then record the documents they belong to (runs in a thread).
+
+        Returns the progress after each document, to be reported from the event loop.
+        """
+        progress = []
+        try:
+            write_clauses(buffer, buffer_sources, db, batch_size)
+        except Exception as e:
+            for document in buffered_documents:
+                progress.append(fail(document["file_path"], f"Error writing clauses: {e}"))
+        else:
+            for document in buffered_documents:
+                index_registry.record(
+                    document["source"], document["doc_id"], document["clause_count"]
+                )
+                counts["files_indexed"] += 1
+                counts["clauses_added"] += document["added"]
+                counts["clauses_indexed"] += document["clause_count"]
+                progress.append({**counts, "file": document["file_path"]})
+        buffer.clear()
+        buffer_sources.clear()
+        buffered_documents.clear()
+        return progress
+
+    for extraction in asyncio.as_completed([_extract(file, doc_id) for file, doc_id in pending]):
+        result = await extraction
+        file_path = result["file_path"]
+        if "error" in result:
+            report_progress(fail(file_path, result["error"]))
+            continue
+        if not result["data"]["clauses"]:
+            # Unreadable files extract as empty text; they are retried on the next run
+            report_progress(fail(file_path, "No clauses extracted"))
+            continue
+
+        source = result["data"]["file_name"]
+        try:
+            await asyncio.to_thread(remove_previous_layout_clauses, source, db)
+            added, removed_ids, clause_count = await asyncio.to_thread(
+                diff_clauses, result["data"]["clauses"], source, db
+            )
+            if removed_ids:
+                await asyncio.to_thread(delete_clauses, source, removed_ids, db)
+        except Exception as e:
+            report_progress(fail(file_path, f"Error reading the index: {e}"))
+            continue
+        counts["clauses_removed"] += len(removed_ids)
+        buffer.update(added)
+        buffer_sources.update(dict.fromkeys(added, source))
+        buffered_documents.append(
+            {
+                "file_path": file_path,
+                "source": source,
+                "doc_id": result["doc_id"],
+                "clause_count": clause_count,
+                "added": len(added),
+            }
+        )
+        if len(buffer) >= batch_size:
+            for progress in await asyncio.to_thread(flush):
+                report_progress(progress)
+    if buffered_documents:
+        for progress in await asyncio.to_thread(flush):
+            report_progress(progress)
+
+    seconds = time.perf_counter() - start
+    return {
+        **counts,
+        "directory": str(directory),
+        "failures": failures,
+        "batch_size": batch_size,
+        "seconds": seconds,
+        "clauses_per_second": counts["clauses_indexed"] / seconds if seconds > 0 else 0.0,
+    }
+
+
+def _save_ingest_status(
+    job_id: str,
+    status_data: Dict[str, Any],
+    from_statuses: Optional[Iterable[Optional[str]]] = None,
+    replace: bool = False,
+    stale_after: Optional[float] = None,
+) -> bool:
+    """Save an ingest job status to the job store and publish it to progress subscribers.
+
+    Queued and processing jobs are recorded as owned by this process, like analyses.
+    Returns False if the job was not in one of ``from_statuses`` (see JobStore.update).
+    """
+    if status_data["status"] in ACTIVE_STATUSES:
+        status_data = {"owner": job_owner(), "heartbeat_at": time.time(), **status_data}
+    if not job_store.update(
+        job_id,
+        status_data,
+        kind="ingest",
+        from_statuses=from_statuses,
+        replace=replace,
+        stale_after=stale_after,
+    ):
+        return False
+    fields = {"error": status_data["error"]} if "error" in status_data else {}
+    job_progress.set_status(job_id, status_data["status"], **fields)
+    return True
+
+
+async def run_ingest_task(directory: Path, db: "Chroma", job_id: str, force: bool = False):
+    """Run a bulk ingest in the background and update its status, raising errors once recorded."""
+    tracker = StageTracker(job_id)
+    try:
+        if not _save_ingest_status(
+            job_id, {"status": "processing", "start_time": time.time()}, ("queued",)
+        ):
+            return
+        with tracker.stage("ingesting"):
+            summary = await ingest_directory(
+                directory,
+                db,
+                force=force,
+                on_progress=lambda counts: tracker.update(
+                    **{k: v for k, v in counts.items() if k != "file"}
+                ),
+            )
+        status_data = {"status": "completed", "summary": summary, "end_time": time.time()}
+        _save_ingest_status(job_id, status_data, ("processing",))
+    except asyncio.CancelledError:
+        _save_ingest_status(
+            job_id, {"status": "cancelled", "end_time": time.time()}, ("queued", "processing")
+        )
+        raise
+    except Exception as e:
+        _save_ingest_status(
+            job_id, {"status": "failed", "error": str(e), "end_time": time.time()}, ("processing",)
+        )
+        raise
+
+
+def submit_ingest_job(
+    directory: Path, db: "Chroma", job_id: str, force: bool = False
+) -> Dict[str, Any]:
+    """
+    Queue a bulk ingest on the job scheduler, behind waiting analyses.
+
+    Raises JobQueueFull when the queue is at capacity, and DuplicateJob when a job
+    with this ID already exists.
+    """
+    job_scheduler.submit(job_id, lambda: run_ingest_task(directory, db, job_id, force), priority=10)
+    status_data = {"status": "queued", "directory": str(directory), "queued_at": time.time()}
+    if not _save_ingest_status(job_id, status_data, from_statuses=(None,)):
+        # Another API worker already recorded a job with this ID
+        job_scheduler.cancel(job_id)
+        raise DuplicateJob(f"Job already submitted: {job_id}")
+    return status_data
+
+
+def get_ingest_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get the status of an ingest job, with its latest progress if it runs on this worker."""
+    status_data = job_store.get(job_id)
+    if status_data is None:
+        return None
+    snapshot = job_progress.snapshot(job_id)
+    return {**status_data, "progress": snapshot["counts"] if snapshot else {}}
+
+
+def document_ingest_id(file_path: str) -> str:
+    """Job ID of the ingest of a single document."""
+    key = str(Path(file_path).resolve())
+    return f"ingest_doc_{hashlib.md5(key.encode()).hexdigest()[:16]}"
+
+
+async def _run_document_ingest(
+    file_path: str, db: "Chroma", job_id: str, doc_id: Optional[str], done: "asyncio.Future[None]"
+):
+    """Extract and index one document, recording the outcome in its ingest status.
+
+    Errors are raised again once recorded, so the job scheduler counts the failure.
+    """
+    tracker = StageTracker(job_id)
+    try:
+        if not _save_ingest_status(
+            job_id, {"status": "processing", "start_time": time.time()}, ("queued",)
+        ):
+            return
+        with tracker.stage("extracting"):
+            data = await process_regulatory_document(file_path)
+        with tracker.stage("indexing", clauses_total=len(data["clauses"])):
+            if doc_id is None:
+                doc_id = await asyncio.to_thread(get_file_hash, file_path)
+            indexing = asyncio.ensure_future(
+                asyncio.to_thread(
+                    add_regulatory_clauses_to_db, data["clauses"], data["file_name"], db, doc_id
+                )
+            )
+            try:
+                stats = await asyncio.shield(indexing)
+            except asyncio.CancelledError:
+                # The thread cannot be stopped; let its writes finish so the document
+                # can be cleaned up after
+                await asyncio.wait([indexing])
+                raise
+            tracker.update(clauses_added=stats["added"], clauses_removed=stats["removed"])
+        summary = {"file": data["file_name"], "clauses": len(data["clauses"]), **stats}
+        status_data = {"status": "completed", "summary": summary, "end_time": time.time()}
+        _save_ingest_status(job_id, status_data, ("processing",))
+    except asyncio.CancelledError:
+        _save_ingest_status(
+            job_id, {"status": "cancelled", "end_time": time.time()}, ("queued", "processing")
+        )
+        raise
+    except Exception as e:
+        _save_ingest_status(
+            job_id, {"status": "failed", "error": str(e), "end_time": time.time()}, ("processing",)
+        )
+        raise
+    finally:
+        _finish_document_ingest(file_path, done)
+
+
+def _finish_document_ingest(file_path: str, done: "asyncio.Future[None]") -> None:
+    """Record that a document's ingest ended, waking up the callers waiting for it."""
+    if not done.done():
+        done.set_result(None)
+    key = str(Path(file_path).resolve())
+    if _document_ingests.get(key) is done:
+        del _document_ingests[key]
+
+
+def start_document_ingest(
+    file_path: str, db: "Chroma", doc_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Extract and index a document in the background, e.g. right after it is uploaded.
+
+    The ingest is queued on the job scheduler, behind waiting analyses. A document
+    that is already indexed or being ingested is not ingested again. An ingest left
+    queued or processing by a process that stopped sending heartbeats (e.g. it was
+    killed) is started again.
+    Returns the ingest job's ID and status; raises JobQueueFull when the queue is at capacity.
+    """
+    key = str(Path(file_path).resolve())
+    job_id = document_ingest_id(file_path)
+    in_flight = _document_ingests.get(key)
+    # The scheduler forgets the job just after the ingest wakes up its waiters
+    if (in_flight is not None and not in_flight.done()) or job_scheduler.get(job_id) is not None:
+        return {"job_id": job_id, **(job_store.get(job_id) or {"status": "processing"})}
+    if doc_id and is_document_indexed(Path(file_path).name, doc_id):
+        status_data: Dict[str, Any] = {
+            "status": "completed",
+            "summary": {"file": Path(file_path).name, "already_indexed": True},
+        }
+        _save_ingest_status(job_id, status_data, replace=True)
+        return {"job_id": job_id, **status_data}
+
+    status_data = {"status": "queued", "file": Path(file_path).name, "queued_at": time.time()}
+    if not _save_ingest_status(
+        job_id,
+        status_data,
+        (None, *TERMINAL_STATUSES),
+        replace=True,
+        stale_after=settings.JOB_STALE_AFTER,
+    ):
+        # Being ingested by another worker
+        return {"job_id": job_id, **(job_store.get(job_id) or {"status": "processing"})}
+    done = asyncio.get_running_loop().create_future()
+    try:
+        job_scheduler.submit(
+            job_id,
+            lambda: _run_document_ingest(str(file_path), db, job_id, doc_id, done),
+            priority=10,
+        )
+    except JobQueueFull as e:
+        _save_ingest_status(
+            job_id, {"status": "failed", "error": str(e), "end_time": time.time()}, ("queued",)
+        )
+        raise
+    _document_ingests[key] = done
+    return {"job_id": job_id, "status": "queued"}
+
+
+async def wait_for_document_ingest(file_path: str) -> None:
+    """Wait for a running ingest of a document, so callers reuse its work instead of repeating it.
+
+    An ingest still queued is not waited for: the caller may hold the scheduler slot it needs.
+    """
+    done = _document_ingests.get(str(Path(file_path).resolve()))
+    job = job_scheduler.get(document_ingest_id(file_path))
+    if done is not None and job is not None and job.status == "running":
+        await asyncio.shield(done)
+
+
+async def cancel_document_ingest(file_path: str) -> bool:
+    """Cancel an in-flight ingest of a document, e.g. when the document is deleted.
+
+    Returns once the ingest has stopped and its index writes have finished, so the
+    document's clauses can be removed without the ingest adding them back.
+    """
+    done = _document_ingests.get(str(Path(file_path).resolve()))
+    if done is None or done.done():
+        return False
+    job_id = document_ingest_id(file_path)
+    job = job_scheduler.get(job_id)
+    was_queued = job is not None and job.status == "queued"
+    if not job_scheduler.cancel(job_id):
+        return False
+
+    # Running ingests record their own cancellation when the task stops
+    if was_queued:
+        _save_ingest_status(job_id, {"status": "cancelled", "end_time": time.time()}, ("queued",))
+        _finish_document_ingest(file_path, done)
+    await asyncio.shield(done)
+    return True
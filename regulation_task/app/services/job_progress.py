@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import JOB_STAGE_SECONDS
+
+# Pipeline stages, in the order a job goes through them
+STAGES = ("extracting", "indexing", "retrieving", "llm", "saving")
+
+# Job statuses after which no more events are published
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobProgressHub:
+    """Fan-out of job progress events to streaming subscribers.
+
+    The latest state of every job is kept (finished jobs in a bounded LRU) so a
+    client that subscribes late first receives a snapshot, then live events.
+    Events must be published from the event loop.
+    """
+
+    def __init__(self, max_finished: Optional[int] = None):
+        """Initialize an empty hub."""
+        self.max_finished = max_finished or settings.JOB_STATUS_CACHE_SIZE
+        self._states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Record an event in the job's state and send it to the job's subscribers."""
+        state = self._states.setdefault(
+            job_id, {"job_id": job_id, "status": "queued", "timings": {}, "counts": {}}
+        )
+        for key in ("status", "stage", "stage_status"):
+            if key in event:
+                state[key] = event[key]
+        state["timings"].update(event.get("timings", {}))
+        state["counts"].update(event.get("counts", {}))
+        state["updated_at"] = event["time"] = time.time()
+        event = {"job_id": job_id, **event}
+
+        self._states.move_to_end(job_id)
+        self._trim()
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+    def set_status(self, job_id: str, status: str, **fields: Any) -> None:
+        """Publish a job status change (queued, processing, completed, ...)."""
+        self.publish(job_id, {"event": "status", "status": status, **fields})
+
+    def snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the latest known state of a job."""
+        state = self._states.get(job_id)
+        if state is None:
+            return None
+        return {**state, "timings": dict(state["timings"]), "counts": dict(state["counts"])}
+
+    async def subscribe(
+        self, job_id: str, heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the job's snapshot, then its events until it finishes.
+
+        ``None`` is yielded after ``heartbeat`` seconds without events, so callers can
+        keep idle connections alive.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            snapshot = self.snapshot(job_id)
+            if snapshot is not None:
+                yield {"event": "snapshot", **snapshot}
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.get("event") == "status" and event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def _trim(self) -> None:
+        """Forget the oldest finished jobs beyond ``max_finished``."""
+        finished = [
+            job_id
+            for job_id, state in self._states.items()
+            if state["status"] in TERMINAL_STATUSES and job_id not in self._subscribers
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._states[job_id]
+
+
+class StageTracker:
+    """Times the stages of one job and publishes their progress."""
+
+    def __init__(self, job_id: str, hub: Optional[JobProgressHub] = None):
+        """Initialize a tracker for a job."""
+        self.job_id = job_id
+        self.hub = hub or job_progress
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, Any] = {}
+        self.current: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str, **counts: Any) -> Iterator["StageTracker"]:
+        """Time a stage, publishing when it starts and when it ends."""
+        self.current = name
+        self.counts.update(counts)
+        self.hub.publish(
+            self.job_id,
+            {"event": "stage", "stage": name, "stage_status": "started", "counts": counts},
+        )
+        start = time.perf_counter()
+        stage_status = "failed"
+        try:
+            yield self
+            stage_status = "completed"
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            JOB_STAGE_SECONDS.labels(stage=name).observe(self.timings[name])
+            self.hub.publish(
+                self.job_id,
+                {
+                    "event": "stage",
+                    "stage": name,
+                    "stage_status": stage_status,
+                    "timings": {name: self.timings[name]},
+                },
+            )
+
+    def update(self, **counts: Any) -> None:
+        """Publish partial counts for the current stage."""
+        self.counts.update(counts)
+        self.hub.publish(
+            self.job_id, {"event": "progress", "stage": self.current, "counts": counts}
+        )
+
+
+# Shared progress hub
+job_progress = JobProgressHub()
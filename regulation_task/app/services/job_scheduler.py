@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+    def __init__(self, retry_after: float):
+        """Initialize with the suggested number of seconds to wait before retrying."""
+        super().__init__(f"Job queue is full, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class DuplicateJob(Exception):
+    """Raised when a job is submitted under the ID of a job that already exists."""
+
+
+class Job:
+    """A unit of work tracked by the scheduler."""
+
+    def __init__(self, job_id: str, run: Callable[[], Awaitable[Any]], priority: int = 0):
+        """Initialize a queued job; ``run`` is called to create the job's coroutine."""
+        self.job_id = job_id
+        self.run = run
+        self.priority = priority
+        self.sequence = 0
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent in the queue so far (or before starting)."""
+        return (self.started_at or time.time()) - self.submitted_at
+
+
+class JobScheduler:
+    """In-process job scheduler with a bounded worker pool and a priority queue.
+
+    Jobs run in order of priority (lower first), then submission order. Submissions
+    are rejected with ``JobQueueFull`` once ``max_queue`` jobs are waiting, and
+    queued or running jobs can be cancelled.
+    """
+
+    # Number of recent jobs used for the wait and run time averages
+    HISTORY_SIZE = 100
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        """Initialize the scheduler; workers are started by ``start``."""
+        self.max_workers = max_workers or settings.JOB_WORKERS
+        self.max_queue = max_queue or settings.JOB_QUEUE_SIZE
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, Job] = {}
+        self._sequence = itertools.count()
+        self._queued = 0
+        self._stopping = False
+        self._wait_times: Deque[float] = deque(maxlen=self.HISTORY_SIZE)
+        self._run_times: Deque[float] = deque(maxlen=self.HISTORY_SIZE)
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker pool has been started."""
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self._workers:
+            return
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._queue = queue
+        self._stopping = False
+        self._workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.max_workers)]
+
+    async def stop(self) -> None:
+        """Cancel queued and running jobs and stop the workers."""
+        self._stopping = True
+        for job in list(self._jobs.values()):
+            self.cancel(job.job_id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, job_id: str, run: Callable[[], Awaitable[Any]], priority: int = 0) -> Job:
+        """Queue a job.
+
+        Raises:
+            JobQueueFull: The queue is at capacity
+            DuplicateJob: A queued or running job has the same ID
+        """
+        if self._queue is None:
+            raise RuntimeError("Job scheduler is not running")
+        if job_id in self._jobs:
+            raise DuplicateJob(f"Job already submitted: {job_id}")
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise JobQueueFull(self.estimate_retry_after())
+
+        job = Job(job_id, run, priority)
+        job.sequence = next(self._sequence)
+        self._jobs[job_id] = job
+        self._queued += 1
+        self._queue.put_nowait((priority, job.sequence, job))
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if the job is not active."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.status == "queued":
+            # The worker that dequeues it will skip it
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self._queued -= 1
+            self.cancelled += 1
+            del self._jobs[job_id]
+            return True
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+            return True
+        return False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get an active (queued or running) job."""
+        return self._jobs.get(job_id)
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Get the 1-based position of a queued job, or None if it is not queued."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status != "queued":
+            return None
+        ahead = [
+            other
+            for other in self._jobs.values()
+            if other.status == "queued"
+            and (other.priority, other.sequence) < (job.priority, job.sequence)
+        ]
+        return len(ahead) + 1
+
+    def estimate_retry_after(self) -> float:
+        """Estimate the seconds until a queue slot frees up."""
+        average_run = sum(self._run_times) / len(self._run_times) if self._run_times else 30.0
+        return max(1.0, average_run / self.max_workers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, worker usage and recent wait and run times."""
+        now = time.time()
+        queued = [job for job in self._jobs.values() if job.status == "queued"]
+        running = [job for job in self._jobs.values() if job.status == "running"]
+        return {
+            "workers": self.max_workers,
+            "running": len(running),
+            "queued": len(queued),
+            "max_queue": self.max_queue,
+            "oldest_queued_wait": max((now - job.submitted_at for job in queued), default=0.0),
+            "average_wait": (
+                sum(self._wait_times) / len(self._wait_times) if self._wait_times else 0.0
+            ),
+            "max_wait": max(self._wait_times, default=0.0),
+            "average_run_time": (
+                sum(self._run_times) / len(self._run_times) if self._run_times else 0.0
+            ),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+    async def _worker(self, queue: asyncio.PriorityQueue) -> None:
+        """Run jobs from the queue one at a time until cancelled."""
+        while True:
+            _, _, job = await queue.get()
+            if job.status != "queued":
+                continue
+
+            self._queued -= 1
+            job.status = "running"
+            job.started_at = time.time()
+            self._wait_times.append(job.wait_time)
+            job.task = asyncio.create_task(job.run())
+            try:
+                await asyncio.shield(job.task)
+                job.status = "completed"
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                self.cancelled += 1
+                if self._stopping or not job.task.cancelled():
+                    # The worker itself is being stopped
+                    job.task.cancel()
+                    raise
+            except Exception as e:
+                print(f"Job {job.job_id} failed: {e}")
+                job.status = "failed"
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                self._run_times.append(job.finished_at - job.started_at)
+                self._jobs.pop(job.job_id, None)
+
+
+# Shared scheduler for analysis jobs
+job_scheduler = JobScheduler()
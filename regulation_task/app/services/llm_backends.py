@@ -0,0 +1,304 @@
+import abc
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.utils.context_packer import count_tokens, truncate_to_tokens
+
+if TYPE_CHECKING:
+    import anthropic
+    from anthropic import AsyncAnthropic
+
+
+# Shared async clients by event loop, then API key, so every request reuses the same
+# connection pool; a loop's clients are forgotten once the loop is garbage collected
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncAnthropic]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Shared local backend, so its rate limit window and counters span all services
+_local_backend: Optional["LocalLLMBackend"] = None
+
+
+def get_async_client(api_key: str) -> "AsyncAnthropic":
+    """Get the shared async Claude client for an API key."""
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get(api_key)
+    if client is None:
+        # Imported on first use: the Claude SDK takes about half a second to import
+        import anthropic
+
+        client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=settings.CLAUDE_BASE_URL,
+            timeout=anthropic.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+            max_retries=settings.LLM_MAX_RETRIES,
+        )
+        loop_clients[api_key] = client
+    return client
+
+
+async def close_llm_clients() -> None:
+    """Close the shared clients created on the running event loop."""
+    for client in _clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.close()
+
+
+class LLMBackend(abc.ABC):
+    """A model backend: sends one prompt and returns the text of the reply."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def complete(
+        self, model: str, system: str, prompt: str, max_tokens: int, temperature: float
+    ) -> str:
+        """Get the model's reply to a prompt."""
+
+
+class AnthropicBackend(LLMBackend):
+    """The Claude Messages API."""
+
+    name = "anthropic"
+
+    def __init__(self, api_key: str):
+        """Initialize with API key."""
+        self.api_key = api_key
+
+    async def complete(
+        self, model: str, system: str, prompt: str, max_tokens: int, temperature: float
+    ) -> str:
+        """Send the prompt to Claude; the client retries rate limits and server errors."""
+        response = await get_async_client(self.api_key).messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return "".join(block.text for block in response.content if block.type == "text")
+
+
+# Clauses as they appear in the analysis prompt (see context_packer.format_clause)
+_CLAUSE_RE = re.compile(
+    r"Clause (\d+) \(from (.*?)\):\n(.*?)(?=\n\nClause \d+ \(from |\n*\Z)", re.DOTALL
+)
+_WORD_RE = re.compile(r"[a-z]{5,}")
+
+
+class LocalLLMBackend(LLMBackend):
+    """
+    Deterministic offline stand-in for Claude, for load testing without network.
+
+    Replies are schema-valid analyses derived from the prompt: a clause counts as
+    covered when most of its key words appear in the SOP text. Latency, server
+    errors, 429s and token limits are simulated from settings, and the same prompt
+    always gets the same latency and failures. Failed calls are retried like the
+    Claude client does, up to ``LLM_MAX_RETRIES`` times.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        """Initialize the backend from the LOCAL_LLM_* settings."""
+        self.seed = settings.LOCAL_LLM_SEED
+        self.latency = settings.LOCAL_LLM_LATENCY
+        self.latency_mean = settings.LOCAL_LLM_LATENCY_MEAN
+        self.latency_stddev = settings.LOCAL_LLM_LATENCY_STDDEV
+        self.latency_per_1k_tokens = settings.LOCAL_LLM_LATENCY_PER_1K_TOKENS
+        self.error_rate = settings.LOCAL_LLM_ERROR_RATE
+        self.rate_limit_rate = settings.LOCAL_LLM_RATE_LIMIT_RATE
+        self.requests_per_minute = settings.LOCAL_LLM_REQUESTS_PER_MINUTE
+        self.context_tokens = settings.LOCAL_LLM_CONTEXT_TOKENS
+        self.max_retries = settings.LLM_MAX_RETRIES
+        if self.latency not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown local LLM latency distribution: {self.latency}")
+
+        self._lock = threading.Lock()
+        self._request_times: Deque[float] = deque()
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "rate_limited": 0,
+            "errors": 0,
+            "retries": 0,
+            "truncated": 0,
+        }
+
+    def _rng(self, prompt: str, attempt: int) -> random.Random:
+        """Random source for one attempt at a prompt."""
+        digest = hashlib.sha256(f"{self.seed}:{attempt}:{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _sample_latency(self, rng: random.Random, prompt_tokens: int) -> float:
+        """Draw a call latency in seconds from the configured distribution."""
+        mean, stddev = self.latency_mean, self.latency_stddev
+        if self.latency == "fixed":
+            latency = mean
+        elif self.latency == "uniform":
+            latency = rng.uniform(mean - stddev, mean + stddev)
+        elif self.latency == "normal":
+            latency = rng.gauss(mean, stddev)
+        else:
+            # Log-normal with the given mean and standard deviation: a long tail of slow calls
+            sigma2 = math.log1p((stddev / mean) ** 2) if mean > 0 else 0.0
+            latency = (
+                rng.lognormvariate(math.log(mean) - sigma2 / 2, sigma2**0.5) if mean > 0 else 0.0
+            )
+        return max(0.0, latency) + self.latency_per_1k_tokens * prompt_tokens / 1000
+
+    def _over_rate_limit(self) -> bool:
+        """Record a request, returning True if it exceeds the requests-per-minute limit."""
+        if self.requests_per_minute <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._request_times and now - self._request_times[0] >= 60:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.requests_per_minute:
+                return True
+            self._request_times.append(now)
+            return False
+
+    def _retry_after(self) -> float:
+        """Seconds until the requests-per-minute window has room again."""
+        with self._lock:
+            if not self._request_times or len(self._request_times) < self.requests_per_minute:
+                return 1.0
+            return max(0.0, 60 - (time.monotonic() - self._request_times[0]))
+
+    @staticmethod
+    def _error(
+        status: int, message: str, headers: Optional[Dict[str, str]] = None
+    ) -> "anthropic.APIStatusError":
+        """Build the error the Claude client raises for an HTTP status."""
+        import anthropic
+        import httpx
+
+        request = httpx.Request("POST", "http://local-llm/v1/messages")
+        response = httpx.Response(status, headers=headers, request=request)
+        body = {"type": "error", "error": {"type": "local_error", "message": message}}
+        error_types = {
+            400: anthropic.BadRequestError,
+            429: anthropic.RateLimitError,
+        }
+        return error_types.get(status, anthropic.InternalServerError)(
+            message, response=response, body=body
+        )
+
+    async def _attempt(self, prompt: str, system: str, max_tokens: int, attempt: int) -> str:
+        """Make one simulated call, raising the error a failed call would."""
+        self.stats["requests"] += 1
+        rng = self._rng(prompt, attempt)
+        prompt_tokens = count_tokens(system) + count_tokens(prompt)
+        if prompt_tokens > self.context_tokens:
+            raise self._error(
+                400, f"prompt is too long: {prompt_tokens} tokens > {self.context_tokens} maximum"
+            )
+
+        if self._over_rate_limit() or rng.random() < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            raise self._error(
+                429, "rate limit exceeded", {"retry-after": f"{self._retry_after():.0f}"}
+            )
+
+        await asyncio.sleep(self._sample_latency(rng, prompt_tokens))
+        if rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            raise self._error(500, "simulated server error")
+
+        reply = json.dumps(build_local_analysis(prompt), indent=2)
+        if count_tokens(reply) > max_tokens:
+            # Like a reply that stops at max_tokens: the JSON is cut off
+            self.stats["truncated"] += 1
+            reply = truncate_to_tokens(reply, max_tokens)
+        self.stats["completed"] += 1
+        return reply
+
+    async def complete(
+        self, model: str, system: str, prompt: str, max_tokens: int, temperature: float
+    ) -> str:
+        """Simulate a call, retrying 429s and server errors with backoff."""
+        import anthropic
+
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(prompt, system, max_tokens, attempt)
+            except (anthropic.RateLimitError, anthropic.InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                retry_after = e.response.headers.get("retry-after")
+                backoff = min(0.5 * 2**attempt, 8.0) * (1 - 0.25 * random.random())
+                await asyncio.sleep(
+                    float(retry_after) if retry_after and float(retry_after) <= 60 else backoff
+                )
+                attempt += 1
+
+
+def build_local_analysis(prompt: str) -> Dict[str, Any]:
+    """Build a deterministic analysis of an analysis prompt's SOP against its clauses."""
+    clauses_part, _, sop_part = prompt.partition("REGULATORY CLAUSES:")[2].partition(
+        "\nSOP DOCUMENT"
+    )
+    sop_text = sop_part.split("\nPlease analyze the SOP", 1)[0].lower()
+    sop_words = set(_WORD_RE.findall(sop_text))
+
+    discrepancies: List[Dict[str, Any]] = []
+    adjustments: List[Dict[str, Any]] = []
+    clauses = _CLAUSE_RE.findall(clauses_part)
+    covered = 0
+    for number, source, clause in clauses:
+        words = set(_WORD_RE.findall(clause.lower()))
+        coverage = len(words & sop_words) / len(words) if words else 1.0
+        if coverage >= 0.5:
+            covered += 1
+            continue
+        summary = " ".join(clause.split())[:160]
+        discrepancies.append(
+            {
+                "regulatory_reference": f"Clause {number} ({source})",
+                "issue": f"The SOP does not address: {summary}",
+                "severity": "High" if coverage < 0.2 else "Medium" if coverage < 0.35 else "Low",
+            }
+        )
+        adjustments.append(
+            {
+                "section": f"Clause {number}",
+                "current_text": None,
+                "suggested_text": summary,
+                "explanation": f"Adds the requirement of clause {number} from {source}.",
+            }
+        )
+
+    score = round(100 * covered / len(clauses)) if clauses else 100
+    return {
+        "compliance_summary": (
+            f"The SOP addresses {covered} of {len(clauses)} relevant regulatory clauses."
+        ),
+        "discrepancies": discrepancies,
+        "recommended_adjustments": adjustments,
+        "compliance_score": score,
+    }
+
+
+def get_llm_backend(api_key: str) -> LLMBackend:
+    """Get the backend selected by the LLM_BACKEND setting."""
+    global _local_backend
+    if settings.LLM_BACKEND == "anthropic":
+        return AnthropicBackend(api_key)
+    if settings.LLM_BACKEND == "local":
+        if _local_backend is None:
+            _local_backend = LocalLLMBackend()
+        return _local_backend
+    raise ValueError(f"Unknown LLM backend: {settings.LLM_BACKEND}")
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.db.sqlite import connect
+
+# Share of ``max_bytes`` freed by each eviction, so a full cache is summed and
+# trimmed once per that many bytes written rather than on every write
+EVICTION_FRACTION = 0.1
+
+
+def normalize_prompt(text: str) -> str:
+    """Normalize line endings and trailing whitespace so equivalent prompts share a key."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_cache_key(model: str, system: str, prompt: str, **params: Any) -> str:
+    """Build a content-addressed key from the normalized request."""
+    request = {
+        "model": model,
+        "system": normalize_prompt(system),
+        "prompt": normalize_prompt(prompt),
+        "params": params,
+    }
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Persistent cache of model responses stored in SQLite.
+
+    Entries expire after ``ttl`` seconds, and the least recently used entries are
+    evicted once the stored responses exceed ``max_bytes``, down to
+    ``EVICTION_FRACTION`` below it. The stored size is tracked in memory and only
+    summed again when it passes ``max_bytes``, to account for other processes'
+    evictions.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl: float):
+        """Initialize the cache; the database is opened on first use."""
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total = 0  # Bytes stored: summed on connect, then updated on every write
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._total = self._sum_sizes(conn)
+        return self._conn
+
+    @staticmethod
+    def _sum_sizes(conn: sqlite3.Connection) -> int:
+        """Sum the sizes of all stored responses (a full table scan)."""
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created_at, size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl > 0 and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self._total -= row[2]
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str, model: str = "") -> None:
+        """Store a response and evict entries that are expired or over the size limit."""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            replaced = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._total += size - (replaced[0] if replaced else 0)
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete expired entries, then the least recently used ones if over max_bytes."""
+        if self.ttl > 0:
+            expired = conn.execute(
+                "DELETE FROM responses WHERE created_at < ? RETURNING size", (now - self.ttl,)
+            ).fetchall()
+            self._total -= sum(size for size, in expired)
+            self.evictions += len(expired)
+
+        if self._total > self.max_bytes:
+            self._total = self._sum_sizes(conn)
+        if self._total <= self.max_bytes:
+            return
+        excess = self._total - int(self.max_bytes * (1 - EVICTION_FRACTION))
+        stale_keys = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if excess <= 0:
+                break
+            stale_keys.append((key,))
+            excess -= size
+            self._total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+        self.evictions += len(stale_keys)
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._total = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the current size of the cache."""
+        with self._lock:
+            entries, size = (
+                self._connect()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses")
+                .fetchone()
+            )
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared response cache
+llm_cache = LLMResponseCache(
+    settings.LLM_CACHE_PATH,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    ttl=settings.LLM_CACHE_TTL,
+)
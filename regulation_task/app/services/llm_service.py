@@ -1,30 +1,168 @@
 import re
 import json
-from typing import List, Dict, Any
-
-from anthropic import Anthropic
-import anthropic
+import asyncio
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
 from app.core.config import settings
+from app.core.metrics import PIPELINE_STAGE_SECONDS, record_cache_lookup
+from app.services.llm_backends import LLMBackend, get_llm_backend
+from app.services.llm_cache import llm_cache, make_cache_key
+from app.utils.context_packer import count_tokens, pack_context
+
+# Global limit on model calls in flight, bound to the event loop that created it
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Get the global limiter on in-flight model calls."""
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+def parse_json_response(content: str) -> Dict[str, Any]:
+    """Extract the JSON object from a model reply."""
+    # Find JSON in the response
+    json_match = re.search(r"```json\s*([\s\S]*?)\s*```|({[\s\S]*})", content)
+    if json_match:
+        json_str = json_match.group(1) or json_match.group(2)
+        return json.loads(json_str)
+    
+    # If no JSON formatting, try to parse the whole response
+    return json.loads(content)
+
+
+def _normalize_key(*values: Any) -> Tuple[str, ...]:
+    """Build a case- and whitespace-insensitive key for deduplicating findings."""
+    return tuple(" ".join(str(value or "").lower().split()) for value in values)
+
+
+def merge_section_analyses(results: List[Dict[str, Any]], weights: List[int]) -> Dict[str, Any]:
+    """
+    Reduce per-section analyses into one report.
+    
+    Discrepancies and adjustments are concatenated with duplicates removed, and the
+    compliance score is the average of the section scores weighted by section length.
+    Sections whose analysis failed are listed but do not count towards the score.
+    Token counts are kept per section and summed under ``context``.
+    """
+    merged: Dict[str, Any] = {
+        "compliance_summary": "",
+        "discrepancies": [],
+        "recommended_adjustments": [],
+        "compliance_score": 0,
+        "sections": [],
+        "context": {},
+    }
+    summaries = []
+    errors = []
+    seen_discrepancies = set()
+    seen_adjustments = set()
+    weighted_score = 0.0
+    total_weight = 0
+    
+    for i, (result, weight) in enumerate(zip(results, weights)):
+        section_info: Dict[str, Any] = {"section": i + 1, "weight": weight}
+        merged["sections"].append(section_info)
+        
+        if "context" in result:
+            section_info["context"] = result["context"]
+            for key, value in result["context"].items():
+                if isinstance(value, int) and not isinstance(value, bool):
+                    merged["context"][key] = merged["context"].get(key, 0) + value
+        
+        if "error" in result:
+            section_info["error"] = result["error"]
+            errors.append(f"Section {i + 1}: {result['error']}")
+            continue
+        
+        try:
+            score = float(result.get("compliance_score", 0))
+        except (TypeError, ValueError):
+            score = None
+        section_info["compliance_score"] = score
+        if score is not None:
+            weighted_score += score * weight
+            total_weight += weight
+        
+        if result.get("compliance_summary"):
+            summaries.append((i + 1, result["compliance_summary"]))
+        
+        for discrepancy in result.get("discrepancies", []):
+            key = _normalize_key(discrepancy.get("regulatory_reference"), discrepancy.get("issue"))
+            if key not in seen_discrepancies:
+                seen_discrepancies.add(key)
+                merged["discrepancies"].append({**discrepancy, "sop_section": i + 1})
+        
+        for adjustment in result.get("recommended_adjustments", []):
+            key = _normalize_key(adjustment.get("section"), adjustment.get("suggested_text"))
+            if key not in seen_adjustments:
+                seen_adjustments.add(key)
+                merged["recommended_adjustments"].append({**adjustment, "sop_section": i + 1})
+    
+    if not summaries and errors:
+        merged["compliance_summary"] = "Error in analysis"
+        merged["error"] = "; ".join(errors)
+        return merged
+    
+    if len(summaries) == 1 and len(results) == 1:
+        merged["compliance_summary"] = summaries[0][1]
+    else:
+        merged["compliance_summary"] = "\n".join(
+            f"Section {index}: {summary}" for index, summary in summaries
+        )
+    if total_weight:
+        merged["compliance_score"] = round(weighted_score / total_weight)
+    if errors:
+        merged["section_errors"] = errors
+    
+    # Most severe discrepancies first, keeping section order within a severity
+    severity_rank = {"high": 0, "medium": 1, "low": 2}
+    merged["discrepancies"].sort(
+        key=lambda d: severity_rank.get(str(d.get("severity", "")).lower(), 3)
+    )
+    return merged
 
 
 class LLMService:
     """Service for interacting with Claude LLM."""
     
-    def __init__(self, api_key: str = None):
-        """Initialize with API key."""
+    def __init__(self, api_key: Optional[str] = None, backend: Optional[LLMBackend] = None):
+        """Initialize with API key and the backend selected by settings (or the one given)."""
         self.api_key = api_key or settings.CLAUDE_API_KEY
-        self.client = Anthropic(api_key=self.api_key)
         self.model = settings.CLAUDE_MODEL
+        self.backend = backend or get_llm_backend(self.api_key)
     
-    async def analyze_sop_with_llm(self, sop_text: str, relevant_clauses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def analyze_sop_with_llm(
+        self,
+        sop_text: str,
+        relevant_clauses: List[Dict[str, Any]],
+        section: Optional[Tuple[int, int]] = None,
+    ) -> Dict[str, Any]:
         """
         Use Claude to analyze the SOP against relevant regulatory clauses.
+        
+        When ``section`` is given as (index, total), ``sop_text`` is one section of a
+        larger SOP, analyzed against the clauses retrieved for it. The SOP text and the
+        clauses are packed into the context token budget, and the token counts are
+        returned under ``context``.
         """
-        # Prepare the clauses for the prompt
-        clauses_text = ""
-        for i, clause_info in enumerate(relevant_clauses[:20]):  # Limit to top 20 to avoid token limits
-            clauses_text += f"Clause {i+1} (from {clause_info['source']}):\n{clause_info['clause']}\n\n"
+        if section is None:
+            sop_heading = "SOP DOCUMENT:"
+        else:
+            sop_heading = (
+                f"SOP DOCUMENT (section {section[0] + 1} of {section[1]}; "
+                "analyze only this section):"
+            )
+        
+        # Fit the most relevant clauses and as much SOP text as possible into the budget
+        context = pack_context(sop_text, relevant_clauses)
+        clauses_text = context.clauses_text
+        sop_text = context.sop_text
         
         # Create the prompt for Claude
         prompt = f"""You are a regulatory compliance expert. I need you to analyze a Standard Operating Procedure (SOP) document against relevant regulatory clauses.
@@ -32,8 +170,8 @@ class LLMService:
 REGULATORY CLAUSES:
 {clauses_text}
 
-SOP DOCUMENT:
-{sop_text[:10000]}  # Truncate if needed to fit token limits
+{sop_heading}
+{sop_text}
 
 Please analyze the SOP against these regulatory clauses and provide:
 1. A summary of compliance status
@@ -63,29 +201,13 @@ Format your response as JSON with the following structure:
 }}
 """
 
+        token_stats = {**context.stats, "prompt_tokens": count_tokens(prompt)}
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=settings.MAX_TOKENS,
-                temperature=settings.TEMPERATURE,
+            analysis_result = await self.complete_json(
+                prompt,
                 system="You are a regulatory compliance expert who provides detailed analysis in JSON format.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
             )
-            
-            # Extract the JSON from the response
-            content = response.content[0].text
-            
-            # Find JSON in the response
-            json_match = re.search(r'```json\s*([\s\S]*?)\s*```|({[\s\S]*})', content)
-            if json_match:
-                json_str = json_match.group(1) or json_match.group(2)
-                analysis_result = json.loads(json_str)
-            else:
-                # If no JSON formatting, try to parse the whole response
-                analysis_result = json.loads(content)
-                
+            analysis_result["context"] = token_stats
             return analysis_result
         
         except Exception as e:
@@ -95,5 +217,76 @@ Format your response as JSON with the following structure:
                 "discrepancies": [],
                 "recommended_adjustments": [],
                 "compliance_score": 0,
-                "error": str(e)
-            } 
\ No newline at end of file
+                "error": str(e),
+                "context": token_stats,
+            } 
+    
+    async def complete_json(self, prompt: str, system: str) -> Dict[str, Any]:
+        """
+        Send a prompt to Claude and parse the JSON in the reply.
+        
+        Replies are cached by normalized prompt, model and parameters, and only
+        replies that parse are stored. Cache reads and writes run in a thread, off
+        the event loop.
+        """
+        # Replies from stand-in backends must never be served as the real model's
+        cache_model = (
+            self.model if self.backend.name == "anthropic" else f"{self.backend.name}/{self.model}"
+        )
+        cache_key = make_cache_key(
+            cache_model,
+            system,
+            prompt,
+            max_tokens=settings.MAX_TOKENS,
+            temperature=settings.TEMPERATURE,
+        )
+        if settings.LLM_CACHE_ENABLED:
+            cached = await asyncio.to_thread(llm_cache.get, cache_key)
+            record_cache_lookup("llm", hit=cached is not None)
+            if cached is not None:
+                return parse_json_response(cached)
+        
+        async with get_llm_semaphore():
+            with PIPELINE_STAGE_SECONDS.labels(stage="llm_call").time():
+                content = await self.backend.complete(
+                    model=self.model,
+                    system=system,
+                    prompt=prompt,
+                    max_tokens=settings.MAX_TOKENS,
+                    temperature=settings.TEMPERATURE,
+                )
+        
+        result = parse_json_response(content)
+        if settings.LLM_CACHE_ENABLED:
+            await asyncio.to_thread(llm_cache.set, cache_key, content, model=cache_model)
+        return result
+    
+    async def analyze_sop_sections(
+        self,
+        sections: List[Dict[str, Any]],
+        on_section_done: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Map-reduce analysis: analyze every SOP section in parallel against its own
+        clauses, then merge the section results.
+        
+        Each section is a dict with the section ``text`` and its relevant ``clauses``.
+        ``on_section_done`` is called with the number of finished sections.
+        """
+        total = len(sections)
+        done = 0
+        
+        async def analyze_section(i: int, section: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal done
+            result = await self.analyze_sop_with_llm(
+                section["text"], section["clauses"], section=(i, total)
+            )
+            done += 1
+            if on_section_done is not None:
+                on_section_done(done)
+            return result
+        
+        results = await asyncio.gather(
+            *[analyze_section(i, section) for i, section in enumerate(sections)]
+        )
+        return merge_section_analyses(results, [len(section["text"]) for section in sections])
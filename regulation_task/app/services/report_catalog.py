@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import PIPELINE_STAGE_SECONDS
+from app.db.sqlite import connect
+
+# Columns list_reports may sort by
+SORT_COLUMNS = ("timestamp", "compliance_score", "sop_file", "status", "job_id")
+
+
+def is_report_file(file_name: str) -> bool:
+    """Check whether a file in the reports directory is a report (not a job status)."""
+    return file_name.endswith(".json") and not file_name.endswith("_status.json")
+
+
+def summarize_report(job_id: str, report_data: Dict[str, Any], mtime: float) -> Dict[str, Any]:
+    """Extract the summary fields of a report."""
+    # Extract compliance score from analysis if available
+    compliance_score = None
+    if "analysis" in report_data and "compliance_score" in report_data["analysis"]:
+        compliance_score = report_data["analysis"]["compliance_score"]
+    elif "compliance_score" in report_data:
+        compliance_score = report_data["compliance_score"]
+
+    return {
+        "job_id": report_data.get("job_id", job_id),
+        "sop_file": report_data.get("sop_file", "Unknown"),
+        "timestamp": report_data.get("timestamp", mtime),
+        "status": "completed" if "analysis" in report_data else "failed",
+        "compliance_score": compliance_score,
+    }
+
+
+class ReportCatalog:
+    """SQLite catalog of report summaries, kept in step with the report files.
+
+    Reports are written and deleted through the catalog, so listing reports never
+    has to open the report files. If the catalog database is missing, it is rebuilt
+    from the files in the reports directory on first use.
+    """
+
+    def __init__(self, path: Path, reports_dir: Path):
+        """Initialize the catalog; the database is opened on first use."""
+        self.path = Path(path)
+        self.reports_dir = Path(reports_dir)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating the schema and rebuilding the catalog if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    job_id TEXT PRIMARY KEY,
+                    sop_file TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    compliance_score INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS reports_timestamp ON reports (timestamp);
+                CREATE INDEX IF NOT EXISTS reports_sop_file ON reports (sop_file, timestamp);
+                CREATE INDEX IF NOT EXISTS reports_status ON reports (status, timestamp);
+                CREATE INDEX IF NOT EXISTS reports_score ON reports (compliance_score);
+                CREATE TABLE IF NOT EXISTS catalog_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """)
+            conn.commit()
+            self._conn = conn
+
+            built = conn.execute("SELECT value FROM catalog_meta WHERE key = 'built'").fetchone()
+            if built is None:
+                self.rebuild()
+        return self._conn
+
+    def rebuild(self) -> int:
+        """Rebuild the catalog from the report files on disk. Returns the number of reports."""
+        with self._lock:
+            conn = self._connect() if self._conn is None else self._conn
+            summaries = []
+            for file_name in os.listdir(self.reports_dir):
+                if not is_report_file(file_name):
+                    continue
+                file_path = self.reports_dir / file_name
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        report_data = json.load(f)
+                    job_id = file_name[: -len(".json")]
+                    summary = summarize_report(job_id, report_data, os.path.getmtime(file_path))
+                    summaries.append({**summary, "job_id": job_id})
+                except Exception as e:
+                    print(f"Error reading report {file_name}: {e}")
+
+            with conn:
+                conn.execute("DELETE FROM reports")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO reports "
+                    "(job_id, sop_file, timestamp, status, compliance_score) "
+                    "VALUES (:job_id, :sop_file, :timestamp, :status, :compliance_score)",
+                    summaries,
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('built', '1')"
+                )
+            return len(summaries)
+
+    def write_report(self, job_id: str, report_data: Dict[str, Any]) -> Path:
+        """Write a report file atomically and record its summary."""
+        with PIPELINE_STAGE_SECONDS.labels(stage="report_write").time():
+            return self._write_report(job_id, report_data)
+
+    def _write_report(self, job_id: str, report_data: Dict[str, Any]) -> Path:
+        """Write a report file and upsert its summary (see write_report)."""
+        report_path = self.reports_dir / f"{job_id}.json"
+        fd, tmp_path = tempfile.mkstemp(dir=self.reports_dir, prefix=f".{job_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(report_data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, report_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        summary = summarize_report(job_id, report_data, os.path.getmtime(report_path))
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO reports "
+                    "(job_id, sop_file, timestamp, status, compliance_score) "
+                    "VALUES (:job_id, :sop_file, :timestamp, :status, :compliance_score)",
+                    {**summary, "job_id": job_id},
+                )
+        return report_path
+
+    def delete_report(self, job_id: str) -> bool:
+        """Delete a report, its status file and its summary. Returns False if nothing existed."""
+        report_path = self.reports_dir / f"{job_id}.json"
+        status_path = self.reports_dir / f"{job_id}_status.json"
+        found = False
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("DELETE FROM reports WHERE job_id = ?", (job_id,))
+                found = cursor.rowcount > 0
+                for path in (report_path, status_path):
+                    if path.exists():
+                        os.remove(path)
+                        found = True
+        return found
+
+    def find_job_ids(self, sop_file: str) -> List[str]:
+        """Get the job IDs of all reports for an SOP file name."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute("SELECT job_id FROM reports WHERE sop_file = ?", (sop_file,))
+                .fetchall()
+            )
+        return [row[0] for row in rows]
+
+    def list_reports(
+        self,
+        offset: int = 0,
+        limit: int = 100,
+        sort: str = "timestamp",
+        descending: bool = True,
+        sop_file: Optional[str] = None,
+        status: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Get a page of report summaries and the total number of matching reports."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort reports by {sort!r}")
+
+        conditions = []
+        params: List[Any] = []
+        if sop_file is not None:
+            conditions.append("sop_file = ?")
+            params.append(sop_file)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if min_score is not None:
+            conditions.append("compliance_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("compliance_score <= ?")
+            params.append(max_score)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM reports {where}", params).fetchone()[0]
+            rows = conn.execute(
+                "SELECT job_id, sop_file, timestamp, status, compliance_score "
+                f"FROM reports {where} "
+                f"ORDER BY {sort} {direction}, job_id {direction} LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+
+        columns = ("job_id", "sop_file", "timestamp", "status", "compliance_score")
+        return [dict(zip(columns, row)) for row in rows], total
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared report catalog
+report_catalog = ReportCatalog(settings.REPORT_INDEX_PATH, settings.REPORTS_DIR)
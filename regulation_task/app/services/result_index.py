@@ -0,0 +1,171 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db.sqlite import connect
+from app.utils.document_processing import get_file_hash
+
+# Bump when a change to the pipeline should stop old reports from being reused
+FINGERPRINT_VERSION = 1
+
+# Settings that change the result of an analysis
+FINGERPRINT_SETTINGS = (
+    "LLM_BACKEND",
+    "CLAUDE_MODEL",
+    "MAX_TOKENS",
+    "TEMPERATURE",
+    "CHUNK_SIZE",
+    "CHUNK_OVERLAP",
+    "TOP_K_CLAUSES",
+    "ANALYSIS_MODE",
+    "ANALYSIS_SECTION_CHARS",
+    "CONTEXT_TOKEN_BUDGET",
+    "CONTEXT_SOP_SHARE",
+    "CONTEXT_DEDUP_THRESHOLD",
+)
+
+
+def compute_analysis_fingerprint(sop_file: str, regulatory_files: List[str]) -> str:
+    """
+    Fingerprint an analysis by the content of its documents and the model settings.
+
+    The regulatory files are unordered, and file names and paths do not matter.
+    """
+    request = {
+        "version": FINGERPRINT_VERSION,
+        "sop": get_file_hash(sop_file),
+        "regulations": sorted(get_file_hash(file) for file in regulatory_files),
+        "settings": {name: getattr(settings, name) for name in FINGERPRINT_SETTINGS},
+    }
+    payload = json.dumps(request, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisResultIndex:
+    """Maps analysis fingerprints to completed reports and to jobs in flight.
+
+    Both are recorded in SQLite, so completed reports are reused across restarts and
+    identical requests to different API workers attach to the same job in flight.
+    A job in flight may have been abandoned; callers check its status in the job store.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the index; the database is opened on first use."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            conn = connect(self.path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_fingerprints (
+                    fingerprint TEXT PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS analysis_fingerprints_job_id "
+                "ON analysis_fingerprints (job_id)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS running_analyses (
+                    fingerprint TEXT PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                )
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS running_analyses_job_id ON running_analyses (job_id)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def find_report(self, fingerprint: str) -> Optional[str]:
+        """Get the job ID of a completed report with this fingerprint, if it still exists."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT job_id FROM analysis_fingerprints WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not (settings.REPORTS_DIR / f"{row[0]}.json").exists():
+                # The report was removed outside the API
+                conn.execute(
+                    "DELETE FROM analysis_fingerprints WHERE fingerprint = ?", (fingerprint,)
+                )
+                conn.commit()
+                return None
+            return row[0]
+
+    def record_report(self, fingerprint: str, job_id: str) -> None:
+        """Record a completed report for a fingerprint."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_fingerprints (fingerprint, job_id, created_at) "
+                "VALUES (?, ?, ?)",
+                (fingerprint, job_id, time.time()),
+            )
+            conn.commit()
+
+    def forget_job(self, job_id: str) -> None:
+        """Remove every fingerprint pointing at a job, e.g. when its report is deleted."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM analysis_fingerprints WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM running_analyses WHERE job_id = ?", (job_id,))
+            conn.commit()
+
+    def find_running(self, fingerprint: str) -> Optional[str]:
+        """Get the job ID of a queued or running job with this fingerprint, on any worker."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT job_id FROM running_analyses WHERE fingerprint = ?", (fingerprint,)
+                )
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def mark_running(self, fingerprint: str, job_id: str) -> None:
+        """Record that a job for this fingerprint is queued or running."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO running_analyses (fingerprint, job_id, started_at) "
+                "VALUES (?, ?, ?)",
+                (fingerprint, job_id, time.time()),
+            )
+            conn.commit()
+
+    def clear_running(self, fingerprint: str, job_id: str) -> None:
+        """Record that a job for this fingerprint has finished."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM running_analyses WHERE fingerprint = ? AND job_id = ?",
+                (fingerprint, job_id),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared fingerprint index
+result_index = AnalysisResultIndex(settings.REPORT_INDEX_PATH)
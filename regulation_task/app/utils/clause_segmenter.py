@@ -0,0 +1,180 @@
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union
+
+# Clauses shorter than this (after stripping) are discarded
+MIN_CLAUSE_LENGTH = 50
+
+# Paragraphs used by the fallback must be longer than this
+MIN_FALLBACK_PARAGRAPH_LENGTH = 100
+
+# Every token starts with a line break, so the scan jumps from line to line and only
+# inspects the start of each line. A blank line is a paragraph break; a line starting
+# with a Section/§, Article/Regulation/Rule or numbered heading starts a clause.
+_TOKEN_RE = re.compile(
+    r"""
+    \n(?:
+        (?P<parabreak>[ \t]*(?=\n))
+      | [ \t]*(?:
+            (?P<section>(?:Section|§+)[ \t]*\d+(?:\.\d+)*)
+          | (?P<article>(?:Article|Regulation|Rule)[ \t]+\d+(?:\.\d+)*)
+          | (?P<numbered>\d+(?:\.\d+)*\.?(?:[ \t]+|[ \t]*\n[ \t]*)(?=[A-Z]))
+        )
+    )
+    """,
+    re.VERBOSE,
+)
+
+_OBLIGATION_RE = re.compile(
+    r"\b(?:must|shall|should|required|requirement|comply|compliance|mandatory)", re.IGNORECASE
+)
+
+_FALLBACK_KEYWORD_RE = re.compile(
+    r"\b(?:must|shall|should|required|requirement|comply|compliance|mandatory|regulation)",
+    re.IGNORECASE,
+)
+
+
+class ClauseSpan(NamedTuple):
+    """A clause found in a document, with offsets into the full text."""
+
+    start: int
+    end: int
+    kind: str
+    text: str
+
+
+class ClauseSegmenter:
+    """Single-pass, incremental regulatory clause segmenter.
+
+    Text is fed in pieces (e.g. one PDF page at a time) and scanned once, line start
+    by line start. A clause starts at a heading and runs to the next heading. Text
+    before the first heading is split into paragraphs, and paragraphs containing
+    obligation keywords become clauses. Spans never overlap.
+    """
+
+    def __init__(self):
+        """Initialize an empty segmenter."""
+        # A virtual line break at offset -1 lets a heading on the first line match
+        self._buffer = "\n"
+        self._base = -1  # Absolute offset of self._buffer[0]
+        self._scan_pos = -1
+        self._segment_start = 0
+        self._segment_kind: Optional[str] = None  # None until the first heading
+        self._paragraph_start = 0
+        self._emitted = 0
+        self._fallback: List[ClauseSpan] = []
+        self._closed = False
+
+    def feed(self, text: str) -> List[ClauseSpan]:
+        """Add text and return the clauses completed by it."""
+        if self._closed:
+            raise ValueError("Cannot feed a closed segmenter")
+        self._buffer += text
+
+        # A token needs at most the rest of its line and the start of the next one, so
+        # tokens starting before the second-to-last line break can be decided now.
+        last_break = self._buffer.rfind("\n")
+        safe_end = self._base + self._buffer.rfind("\n", 0, last_break)
+        spans = self._scan(safe_end)
+        self._compact()
+        return spans
+
+    def close(self) -> List[ClauseSpan]:
+        """Finish the document and return the remaining clauses."""
+        if self._closed:
+            return []
+        end = self._base + len(self._buffer)
+        spans = self._scan(None)
+        self._close_paragraph(end)
+        spans.extend(self._close_segment(end))
+        self._closed = True
+
+        # Nothing matched the clause patterns: fall back to obligation paragraphs
+        if self._emitted == 0:
+            spans.extend(self._fallback)
+        self._fallback = []
+        return spans
+
+    def _scan(self, safe_end: Optional[int]) -> List[ClauseSpan]:
+        """Process the tokens starting before ``safe_end`` (absolute; None for all)."""
+        spans: List[ClauseSpan] = []
+        resume = self._scan_pos
+        for match in _TOKEN_RE.finditer(self._buffer, self._scan_pos - self._base):
+            start = self._base + match.start()
+            if safe_end is not None and start >= safe_end:
+                break
+            resume = self._base + match.end()
+
+            kind = match.lastgroup
+            if kind == "parabreak":
+                self._close_paragraph(start)
+                self._paragraph_start = resume
+                if self._segment_kind is None:
+                    spans.extend(self._close_segment(start))
+                    self._segment_start = resume
+            else:
+                spans.extend(self._close_segment(start))
+                self._segment_start = start + 1
+                self._segment_kind = kind
+
+        if safe_end is not None:
+            resume = max(resume, safe_end)
+        self._scan_pos = resume
+        return spans
+
+    def _compact(self) -> None:
+        """Drop buffered text that no open segment, paragraph or pending token needs."""
+        keep_from = min(self._segment_start, self._paragraph_start, self._scan_pos) - self._base
+        # Keep the line break in front of the first pending token
+        keep_from = self._buffer.rfind("\n", 0, keep_from + 1)
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._base += keep_from
+
+    def _make_span(self, start: int, end: int, kind: str) -> Optional[ClauseSpan]:
+        """Build a span for [start, end) with surrounding whitespace trimmed."""
+        raw = self._buffer[start - self._base : end - self._base]
+        text = raw.strip()
+        if not text:
+            return None
+        leading = len(raw) - len(raw.lstrip())
+        return ClauseSpan(start + leading, start + leading + len(text), kind, text)
+
+    def _close_segment(self, end: int) -> List[ClauseSpan]:
+        """Close the current segment at ``end`` and return it if it is a clause."""
+        kind = self._segment_kind or "obligation"
+        self._segment_kind = None
+        span = self._make_span(self._segment_start, end, kind)
+        if span is None or len(span.text) <= MIN_CLAUSE_LENGTH:
+            return []
+        if kind == "obligation" and not _OBLIGATION_RE.search(span.text):
+            return []
+        self._emitted += 1
+        self._fallback = []
+        return [span]
+
+    def _close_paragraph(self, end: int) -> None:
+        """Close the current paragraph, keeping it as a fallback candidate if needed."""
+        if self._emitted:
+            return
+        span = self._make_span(self._paragraph_start, end, "paragraph")
+        if (
+            span is not None
+            and len(span.text) > MIN_FALLBACK_PARAGRAPH_LENGTH
+            and _FALLBACK_KEYWORD_RE.search(span.text)
+        ):
+            self._fallback.append(span)
+
+
+def iter_clause_spans(text: Union[str, Iterable[str]]) -> Iterator[ClauseSpan]:
+    """Yield clause spans from a text or from an iterable of text pieces as they arrive."""
+    segmenter = ClauseSegmenter()
+    pieces = [text] if isinstance(text, str) else text
+    for piece in pieces:
+        yield from segmenter.feed(piece)
+    yield from segmenter.close()
+
+
+def segment_regulatory_clauses(text: Union[str, Iterable[str]]) -> List[ClauseSpan]:
+    """Segment a text (or text pieces) into non-overlapping clause spans."""
+    return list(iter_clause_spans(text))
@@ -0,0 +1,141 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+
+# Characters per token assumed when the tokenizer is unavailable
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> Optional[Any]:
+    """Load the tiktoken encoding, or None if it cannot be loaded (e.g. offline)."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+    except Exception as e:
+        print(f"Tokenizer unavailable, estimating token counts from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a text."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most ``max_tokens`` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * CHARS_PER_TOKEN_ESTIMATE]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def format_clause(number: int, clause_info: Dict[str, Any]) -> str:
+    """Format a clause the way it appears in the analysis prompt."""
+    return f"Clause {number} (from {clause_info['source']}):\n{clause_info['clause']}\n\n"
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    """Word trigrams of a text, ignoring case and punctuation."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i : i + 3]) for i in range(len(words) - 2)}
+
+
+def dedupe_clauses(
+    clauses: List[Dict[str, Any]], threshold: Optional[float] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Drop clauses that are near-identical to a clause earlier in the list.
+
+    Two clauses are near-identical when the Jaccard similarity of their word
+    trigrams is at least ``threshold``. Returns the kept clauses and the number dropped.
+    """
+    threshold = settings.CONTEXT_DEDUP_THRESHOLD if threshold is None else threshold
+    kept = []
+    kept_shingles: List[Set[Tuple[str, ...]]] = []
+    dropped = 0
+    for clause_info in clauses:
+        shingles = _shingles(clause_info["clause"])
+        if any(
+            len(shingles & other) / max(len(shingles | other), 1) >= threshold
+            for other in kept_shingles
+        ):
+            dropped += 1
+            continue
+        kept.append(clause_info)
+        kept_shingles.append(shingles)
+    return kept, dropped
+
+
+class PackedContext(NamedTuple):
+    """SOP text and clauses selected to fit a token budget."""
+
+    sop_text: str
+    clauses_text: str
+    clauses: List[Dict[str, Any]]
+    stats: Dict[str, Any]
+
+
+def pack_context(
+    sop_text: str,
+    relevant_clauses: List[Dict[str, Any]],
+    budget: Optional[int] = None,
+    sop_share: Optional[float] = None,
+) -> PackedContext:
+    """
+    Fit SOP text and the most relevant clauses into a token budget.
+
+    Up to ``sop_share`` of the budget is reserved for the SOP. Clauses, most relevant
+    first and with near-duplicates removed, are then added greedily while they fit,
+    and the SOP text gets whatever budget the clauses leave unused.
+    """
+    budget = budget or settings.CONTEXT_TOKEN_BUDGET
+    sop_share = settings.CONTEXT_SOP_SHARE if sop_share is None else sop_share
+
+    sop_tokens = count_tokens(sop_text)
+    sop_reserve = min(sop_tokens, int(budget * sop_share))
+
+    clauses, duplicates = dedupe_clauses(relevant_clauses)
+    clause_budget = budget - sop_reserve
+    clause_tokens = 0
+    included: List[Dict[str, Any]] = []
+    clause_parts = []
+    for clause_info in clauses:
+        formatted = format_clause(len(included) + 1, clause_info)
+        tokens = count_tokens(formatted)
+        if clause_tokens + tokens > clause_budget:
+            continue
+        included.append(clause_info)
+        clause_parts.append(formatted)
+        clause_tokens += tokens
+
+    sop_budget = budget - clause_tokens
+    packed_sop = sop_text if sop_tokens <= sop_budget else truncate_to_tokens(sop_text, sop_budget)
+    packed_sop_tokens = sop_tokens if packed_sop is sop_text else count_tokens(packed_sop)
+
+    stats = {
+        "token_budget": budget,
+        "sop_tokens": packed_sop_tokens,
+        "sop_tokens_total": sop_tokens,
+        "sop_truncated": packed_sop is not sop_text,
+        "clause_tokens": clause_tokens,
+        "clauses_included": len(included),
+        "clauses_dropped_duplicate": duplicates,
+        "clauses_dropped_budget": len(clauses) - len(included),
+    }
+    return PackedContext(packed_sop, "".join(clause_parts), included, stats)
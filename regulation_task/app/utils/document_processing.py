@@ -1,18 +1,13 @@
-import re
 import time
 import hashlib
 import json
 import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from functools import lru_cache
 
-import fitz  # PyMuPDF
-from docx import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-
 from app.core.config import settings
-
+from app.utils.clause_segmenter import iter_clause_spans
 
 def get_file_hash(file_path: str) -> str:
     """Generate a hash for a file to use as a unique identifier."""
@@ -46,14 +41,45 @@ def has_file_changed(file_path: str, stored_metadata: Dict[str, Any]) -> bool:
     return False
 
 
+def iter_pdf_pages(
+    file_path: str, start_page: int = 0, end_page: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for each page of a PDF, reading one page at a time."""
+    import fitz  # PyMuPDF, imported on first use to keep startup fast
+    
+    with fitz.open(file_path) as doc:
+        end_page = doc.page_count if end_page is None else min(end_page, doc.page_count)
+        for page_number in range(start_page, end_page):
+            yield page_number, doc.load_page(page_number).get_text()
+
+
+def extract_pdf_page_range(file_path: str, start_page: int, end_page: int) -> List[str]:
+    """Extract the text of pages [start_page, end_page) of a PDF, one string per page."""
+    return [text for _, text in iter_pdf_pages(file_path, start_page, end_page)]
+
+
+def get_pdf_page_count(file_path: str) -> int:
+    """Get the number of pages in a PDF."""
+    import fitz
+    
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def split_page_ranges(
+    page_count: int, parts: int, min_pages: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """Split pages into at most ``parts`` contiguous ranges of at least ``min_pages`` pages."""
+    min_pages = min_pages or settings.PDF_PAGES_PER_TASK
+    parts = max(1, min(parts, page_count // max(min_pages, 1)))
+    bounds = [page_count * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts)]
+
+
 def extract_text_from_pdf(file_path: str) -> str:
     """Extract text from a PDF file."""
     try:
-        doc = fitz.open(file_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
+        return "".join(text for _, text in iter_pdf_pages(file_path))
     except Exception as e:
         print(f"Error extracting text from PDF {file_path}: {e}")
         return ""
@@ -62,6 +88,8 @@ def extract_text_from_pdf(file_path: str) -> str:
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from a DOCX file."""
     try:
+        from docx import Document
+        
         doc = Document(file_path)
         text = ""
         for para in doc.paragraphs:
@@ -91,6 +119,8 @@ def extract_text_from_file(file_path: str) -> str:
 
 def split_text_into_chunks(text: str, chunk_size: int = None, chunk_overlap: int = None) -> List[str]:
     """Split text into chunks for processing."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    
     chunk_size = chunk_size or settings.CHUNK_SIZE
     chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
     
@@ -102,37 +132,85 @@ def split_text_into_chunks(text: str, chunk_size: int = None, chunk_overlap: int
     return text_splitter.split_text(text)
 
 
-def extract_regulatory_clauses(text: str) -> List[str]:
+def group_chunks_into_sections(
+    text: str, chunks: List[str], max_chars: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Group consecutive chunks into balanced sections of at most ``max_chars`` characters.
+
+    Each section records the indices of its chunks and its text, which is the span of
+    the original text covered by those chunks (so chunk overlaps are not repeated
+    within a section).
+    """
+    max_chars = max_chars or settings.ANALYSIS_SECTION_CHARS
+    if not chunks:
+        return []
+
+    # Locate each chunk in the text; chunks are in order and overlap by at most CHUNK_OVERLAP
+    offsets: List[Optional[Tuple[int, int]]] = []
+    cursor = 0
+    for chunk in chunks:
+        start = text.find(chunk, cursor)
+        if start < 0:
+            offsets.append(None)
+            continue
+        offsets.append((start, start + len(chunk)))
+        cursor = max(start + 1, start + len(chunk) - settings.CHUNK_OVERLAP)
+
+    # Without offsets for every chunk, lay the chunks end to end instead
+    positions = [offset for offset in offsets if offset is not None]
+    if len(positions) < len(chunks):
+        positions = []
+        position = 0
+        for chunk in chunks:
+            positions.append((position, position + len(chunk)))
+            position += len(chunk)
+
+    # Split into equal stretches of text, adding sections until every one fits
+    base = positions[0][0]
+    total = positions[-1][1] - base
+    section_count = max(1, -(-total // max_chars))
+    while True:
+        size = total / section_count
+        groups: List[List[int]] = [[] for _ in range(section_count)]
+        for index, (start, end) in enumerate(positions):
+            groups[min(section_count - 1, int(((start + end) / 2 - base) / size))].append(index)
+        groups = [group for group in groups if group]
+        fits = all(
+            positions[group[-1]][1] - positions[group[0]][0] <= max_chars for group in groups
+        )
+        if fits or section_count >= len(chunks):
+            break
+        section_count += 1
+
+    return [_make_section(text, chunks, offsets, group) for group in groups]
+
+
+def _make_section(
+    text: str, chunks: List[str], offsets: List[Any], indices: List[int]
+) -> Dict[str, Any]:
+    """Build a section from chunk indices, using the original text when the chunks were located."""
+    spans = [offsets[i] for i in indices]
+    if all(spans):
+        section_text = text[spans[0][0] : spans[-1][1]]
+    else:
+        section_text = "\n".join(chunks[i] for i in indices)
+    return {"chunk_indices": indices, "text": section_text}
+
+
+def extract_regulatory_clauses(text: Union[str, Iterable[str]]) -> List[str]:
     """
     Extract regulatory clauses from text.
     This function identifies sections that appear to be regulatory requirements.
+    The text can also be given as an iterable of pieces (e.g. PDF pages) that are
+    segmented as they arrive. Identical clauses are only returned once.
     """
-    # Common patterns for regulatory clauses
-    patterns = [
-        r"(?:Section|§)\s+\d+(?:\.\d+)*\s*[:.-]\s*[A-Z].*?(?=(?:Section|§)\s+\d+|\Z)",
-        r"\d+(?:\.\d+)*\s+[A-Z].*?(?=\d+(?:\.\d+)*\s+[A-Z]|\Z)",
-        r"(?:Article|Regulation|Rule)\s+\d+(?:\.\d+)*\s*[:.-]\s*[A-Z].*?(?=(?:Article|Regulation|Rule)\s+\d+|\Z)",
-        r"(?:must|shall|should|required|requirement|comply|compliance|mandatory).*?(?=\n\n|\Z)",
-    ]
-    
     clauses = []
-    for pattern in patterns:
-        matches = re.finditer(pattern, text, re.DOTALL | re.MULTILINE)
-        for match in matches:
-            clause = match.group(0).strip()
-            if len(clause) > 50:  # Filter out very short matches
-                clauses.append(clause)
-    
-    # If no clauses found with regex, use a simpler paragraph-based approach
-    if not clauses:
-        paragraphs = text.split('\n\n')
-        for para in paragraphs:
-            para = para.strip()
-            if len(para) > 100 and any(keyword in para.lower() for keyword in 
-                                      ['must', 'shall', 'should', 'required', 'requirement', 
-                                       'comply', 'compliance', 'mandatory', 'regulation']):
-                clauses.append(para)
-    
+    seen_clauses = set()
+    for span in iter_clause_spans(text):
+        if span.text not in seen_clauses:
+            seen_clauses.add(span.text)
+            clauses.append(span.text)
     return clauses
 
 
@@ -186,4 +264,4 @@ def load_processed_file(file_path: str) -> Dict[str, Any]:
     if Path(processed_path).exists():
         with open(processed_path, "r", encoding="utf-8") as f:
             return json.load(f)
-    return {} 
\ No newline at end of file
+    return {} 
@@ -0,0 +1,208 @@
+import os
+import sys
+import signal
+import asyncio
+import argparse
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import ensure_data_dirs, settings
+from app.db.job_queue import JobQueue, job_queue, make_worker_id
+from app.db.job_store import job_store
+from app.services.analysis_service import fail_abandoned_job, run_queued_analysis
+from app.services.extraction_pool import extraction_pool
+from app.services.llm_backends import close_llm_clients
+
+
+class AnalysisWorker:
+    """Runs analysis jobs from the durable job queue, outside the API process.
+
+    Up to ``concurrency`` jobs run at once. The lease of every running job is renewed
+    each WORKER_HEARTBEAT_INTERVAL seconds, and a job cancelled through the API is
+    stopped at its next heartbeat. Jobs abandoned by crashed workers are put back in
+    the queue (or failed after JOB_MAX_ATTEMPTS runs) by whichever worker polls next.
+
+    On the first SIGINT/SIGTERM the worker stops claiming jobs and lets running ones
+    finish; on the second it hands them back to the queue and exits.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        queue: Optional[JobQueue] = None,
+    ):
+        """Initialize a worker; it starts polling when ``run`` is called."""
+        self.worker_id = worker_id or make_worker_id()
+        self.concurrency = concurrency or settings.JOB_WORKERS
+        self.queue = queue or job_queue
+        self.jobs_run = 0
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping: Optional[asyncio.Event] = None
+
+    def _poll(self) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Requeue expired jobs and claim the next one (runs in a thread)."""
+        abandoned = self.queue.requeue_expired()
+        return abandoned, self.queue.claim(self.worker_id)
+
+    async def run(self, max_jobs: Optional[int] = None) -> int:
+        """Run jobs until stopped, or until ``max_jobs`` jobs have been claimed.
+
+        Returns:
+            The number of jobs run
+        """
+        self._stopping = asyncio.Event()
+        ensure_data_dirs()
+        await asyncio.to_thread(extraction_pool.start)
+        await asyncio.to_thread(self.queue.register_worker, self.worker_id, self.concurrency)
+        print(f"Worker {self.worker_id} started with {self.concurrency} slots")
+
+        slots = asyncio.Semaphore(self.concurrency)
+        beat = asyncio.create_task(self._beat())
+        try:
+            while not self._stopping.is_set() and (max_jobs is None or self.jobs_run < max_jobs):
+                await slots.acquire()
+                if self._stopping.is_set():
+                    slots.release()
+                    break
+                abandoned, job = await asyncio.to_thread(self._poll)
+                for abandoned_job in abandoned:
+                    print(f"Job {abandoned_job['job_id']} failed: {abandoned_job['error']}")
+                    fail_abandoned_job(abandoned_job["job_id"], abandoned_job["error"])
+                if job is None:
+                    slots.release()
+                    try:
+                        await asyncio.wait_for(
+                            self._stopping.wait(), timeout=settings.WORKER_POLL_INTERVAL
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                self.jobs_run += 1
+                task = asyncio.create_task(self._run_job(job))
+                self._running[job["job_id"]] = task
+                task.add_done_callback(functools.partial(self._job_done, job["job_id"], slots))
+
+            # Let running jobs finish
+            if self._running:
+                print(f"Waiting for {len(self._running)} running jobs to finish")
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+        finally:
+            beat.cancel()
+            await asyncio.to_thread(self.queue.unregister_worker, self.worker_id)
+            extraction_pool.shutdown()
+            await close_llm_clients()
+        print(f"Worker {self.worker_id} stopped after {self.jobs_run} jobs")
+        return self.jobs_run
+
+    def stop(self) -> None:
+        """Stop claiming jobs; running jobs finish first."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def abandon(self) -> None:
+        """Hand the running jobs back to the queue at once, so other workers run them."""
+        for job_id in list(self._running):
+            self.queue.release(job_id, self.worker_id)
+
+    def _job_done(self, job_id: str, slots: asyncio.Semaphore, task: asyncio.Task) -> None:
+        """Forget a job that ended and free its slot."""
+        self._running.pop(job_id, None)
+        slots.release()
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        """Run a claimed job while renewing its lease, then record its outcome."""
+        job_id = job["job_id"]
+        current = asyncio.current_task()
+        if current is None:
+            raise RuntimeError("Jobs must run in a task, so a heartbeat can cancel them")
+        print(f"Running job {job_id} (attempt {job['attempt']})")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, current))
+        status, error = "done", None
+        try:
+            final_status = await run_queued_analysis(job)
+            if final_status in ("failed", "cancelled"):
+                status = final_status
+        except asyncio.CancelledError:
+            # Cancelled through the API, see _heartbeat
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", str(e)
+            print(f"Job {job_id} failed: {e}")
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.queue.finish, job_id, self.worker_id, status, error)
+
+    async def _heartbeat(self, job_id: str, task: asyncio.Task) -> None:
+        """Renew a job's lease until it ends, cancelling the job if it is cancelled in the queue."""
+        while True:
+            await asyncio.sleep(settings.WORKER_HEARTBEAT_INTERVAL)
+            lease = await asyncio.to_thread(self.queue.heartbeat, job_id, self.worker_id)
+            if lease == "cancelled":
+                task.cancel()
+                return
+            if lease == "lost":
+                # Another worker may be running it now; this run's result still counts
+                # if it finishes first
+                print(f"Warning: Lost the lease on job {job_id}")
+                return
+
+    async def _beat(self) -> None:
+        """Record that this worker and its jobs are alive, for the queue stats and job store."""
+        while True:
+            await asyncio.sleep(settings.WORKER_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(self.queue.worker_heartbeat, self.worker_id)
+                await asyncio.to_thread(job_store.heartbeat)
+            except Exception as e:
+                print(f"Warning: Could not record worker heartbeat: {e}")
+
+
+async def run_worker(
+    worker_id: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    max_jobs: Optional[int] = None,
+):
+    """Run an analysis worker until it is stopped by SIGINT or SIGTERM."""
+    worker = AnalysisWorker(worker_id, concurrency)
+    loop = asyncio.get_running_loop()
+
+    def handle_signal():
+        if worker._stopping is not None and worker._stopping.is_set():
+            print("Stopping now; running jobs are handed back to the queue")
+            worker.abandon()
+            os._exit(1)
+        print("Stopping after the running jobs finish (signal again to stop now)")
+        worker.stop()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, handle_signal)
+        except NotImplementedError:
+            # Not supported on Windows; Ctrl+C stops the worker at once
+            pass
+    return await worker.run(max_jobs)
+
+
+def main(argv=None):
+    """Run an analysis worker: ``python -m app.worker [--concurrency N] [--worker-id ID]``.
+
+    Workers take analysis jobs from the durable job queue that the API fills when
+    JOB_EXECUTION is "queue". Any number of workers can run next to the API processes.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Analysis job worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help=f"jobs run at once (default: JOB_WORKERS, {settings.JOB_WORKERS})",
+    )
+    parser.add_argument("--worker-id", help="worker name in the queue (default: host:pid)")
+    parser.add_argument("--max-jobs", type=int, help="exit after running this many jobs")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    asyncio.run(run_worker(args.worker_id, args.concurrency, args.max_jobs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Regression and benchmark harness for regulatory clause extraction.
+
+Compares the single-pass clause segmenter against the original four-regex extractor
+on the PDFs in data/regulations and on a synthetic backtracking-prone text.
+
+Parity criterion: for every document, at least ``--min-recall`` (default 95%) of the
+unique legacy heading clauses that begin a line must begin a new clause too. The run
+exits with status 1 when a document falls short or a span invariant breaks.
+
+Clause counts are expected to differ and are not part of the criterion: the legacy
+numbered pattern also matches numbers in the middle of a line (e.g. "802.11 The ...",
+hence IEEE 30 vs 11 and NFPA 2334 vs 1317), and its obligation pattern overlaps the
+heading clauses. The new segmenter only starts clauses at line starts and also accepts
+"1." list items, which the legacy pattern misses (29 CFR 86 vs 369).
+
+PDF page headers are handled as follows. A legacy heading that is a page number
+followed by the running header ("241 / Environmental Protection Agency / § 63.760")
+counts as recalled when the new clause starts right after it: the segmenter drops the
+header lines as too short to be a clause and starts at the "§" line. A bare page number
+or table cell followed by a blank line ("1 / / CONTENTS", "06 / / PSMP") is not a
+heading and is left out of the reference. A known miss is a numbered term followed by
+a blank line ("3.2.14 / / R.M.S.-responding instrument" in IEC 60051-1).
+
+Usage:
+    python -m benchmarks.bench_clauses [--dir data/regulations] [--repeat 3] [--min-recall 0.95]
+"""
+
+import argparse
+import bisect
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Set
+
+from app.core.config import settings
+from app.utils.clause_segmenter import MIN_CLAUSE_LENGTH, segment_regulatory_clauses
+from app.utils.document_processing import (
+    extract_regulatory_clauses,
+    extract_text_from_file,
+    iter_pdf_pages,
+)
+
+LEGACY_HEADING_PATTERNS = [
+    r"(?:Section|§)\s+\d+(?:\.\d+)*\s*[:.-]\s*[A-Z].*?(?=(?:Section|§)\s+\d+|\Z)",
+    r"\d+(?:\.\d+)*\s+[A-Z].*?(?=\d+(?:\.\d+)*\s+[A-Z]|\Z)",
+    r"(?:Article|Regulation|Rule)\s+\d+(?:\.\d+)*\s*[:.-]\s*[A-Z].*?"
+    r"(?=(?:Article|Regulation|Rule)\s+\d+|\Z)",
+]
+LEGACY_PATTERNS = LEGACY_HEADING_PATTERNS + [
+    r"(?:must|shall|should|required|requirement|comply|compliance|mandatory).*?(?=\n\n|\Z)",
+]
+
+# A page number or table cell: a bare integer on its line, followed by a blank line
+PAGE_NUMBER_RE = re.compile(r"\d+[ \t]*\n[ \t]*\n")
+
+
+def legacy_extract_regulatory_clauses(text: str) -> List[str]:
+    """The original four-pass extractor, kept as the regression reference."""
+    clauses = []
+    for pattern in LEGACY_PATTERNS:
+        for match in re.finditer(pattern, text, re.DOTALL | re.MULTILINE):
+            clause = match.group(0).strip()
+            if len(clause) > 50:
+                clauses.append(clause)
+
+    if not clauses:
+        for para in text.split("\n\n"):
+            para = para.strip()
+            if len(para) > 100 and any(
+                keyword in para.lower()
+                for keyword in [
+                    "must",
+                    "shall",
+                    "should",
+                    "required",
+                    "requirement",
+                    "comply",
+                    "compliance",
+                    "mandatory",
+                    "regulation",
+                ]
+            ):
+                clauses.append(para)
+    return clauses
+
+
+def legacy_line_heading_starts(text: str) -> Dict[str, Set[int]]:
+    """Offsets of the legacy heading clauses that begin at the start of a line, by clause text.
+
+    Page numbers and table cells followed by a blank line are left out (see the module docstring).
+    """
+    starts: Dict[str, Set[int]] = {}
+    for pattern in LEGACY_HEADING_PATTERNS:
+        for match in re.finditer(pattern, text, re.DOTALL):
+            at_line_start = match.start() == 0 or text[match.start() - 1] == "\n"
+            clause = match.group(0).strip()
+            if at_line_start and len(clause) > 50 and not PAGE_NUMBER_RE.match(text, match.start()):
+                starts.setdefault(clause, set()).add(match.start())
+    return starts
+
+
+def heading_recall(text: str, heading_starts: Dict[str, Set[int]]) -> int:
+    """Count the unique legacy heading clauses that begin a new clause.
+
+    A heading also counts when the new clause starts after text too short to be a
+    clause, e.g. a page number and running header in front of a "§" line.
+    """
+    new_starts = sorted(span.start for span in segment_regulatory_clauses(text))
+
+    def recalled(start: int) -> bool:
+        i = bisect.bisect_left(new_starts, start)
+        return i < len(new_starts) and len(text[start : new_starts[i]].strip()) <= MIN_CLAUSE_LENGTH
+
+    return sum(any(recalled(start) for start in starts) for starts in heading_starts.values())
+
+
+def best_time(fn: Callable[[str], object], text: str, repeat: int) -> float:
+    """Return the best wall-clock time over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_spans(name: str, text: str, pieces: List[str]) -> List[str]:
+    """Check span invariants and streaming parity, returning a list of problems."""
+    problems = []
+    spans = segment_regulatory_clauses(text)
+    previous_end = 0
+    for span in spans:
+        if text[span.start : span.end] != span.text:
+            problems.append(f"{name}: span offsets do not match text at {span.start}")
+        if span.start < previous_end:
+            problems.append(f"{name}: overlapping spans at {span.start}")
+        previous_end = span.end
+    if segment_regulatory_clauses(pieces) != spans:
+        problems.append(f"{name}: streamed segmentation differs from whole-text segmentation")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dir",
+        type=Path,
+        default=settings.REGULATORY_DOCS_DIR,
+        help="Directory of regulatory documents",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation")
+    parser.add_argument(
+        "--min-recall",
+        type=float,
+        default=0.95,
+        help="Share of unique legacy heading clauses each document must recall",
+    )
+    args = parser.parse_args()
+
+    problems = []
+    total_legacy = total_new = 0.0
+    header = (
+        f"{'document':<40} {'legacy':>9} {'new':>9} {'speedup':>8} "
+        f"{'legacy#':>8} {'unique#':>8} {'new#':>6} {'headings':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for path in sorted(args.dir.iterdir()):
+        if path.suffix.lower() not in (".pdf", ".docx"):
+            continue
+        text = extract_text_from_file(str(path))
+        if path.suffix.lower() == ".pdf":
+            pieces = [page_text for _, page_text in iter_pdf_pages(str(path))]
+        else:
+            pieces = text.splitlines(keepends=True)
+
+        legacy_clauses = legacy_extract_regulatory_clauses(text)
+        new_clauses = extract_regulatory_clauses(text)
+        legacy_time = best_time(legacy_extract_regulatory_clauses, text, args.repeat)
+        new_time = best_time(extract_regulatory_clauses, text, args.repeat)
+        total_legacy += legacy_time
+        total_new += new_time
+
+        # Parity on real headings: legacy clauses starting a line must start a new span
+        heading_starts = legacy_line_heading_starts(text)
+        recalled = heading_recall(text, heading_starts)
+        if heading_starts and recalled / len(heading_starts) < args.min_recall:
+            problems.append(
+                f"{path.name}: recalled {recalled}/{len(heading_starts)} unique heading clauses, "
+                f"below {args.min_recall:.0%}"
+            )
+
+        problems.extend(check_spans(path.name, text, pieces))
+        print(
+            f"{path.name[:40]:<40} {legacy_time * 1000:>7.1f}ms {new_time * 1000:>7.1f}ms "
+            f"{legacy_time / max(new_time, 1e-9):>7.1f}x {len(legacy_clauses):>8} "
+            f"{len(set(legacy_clauses)):>8} {len(new_clauses):>6} "
+            f"{recalled:>4}/{len(heading_starts):<4}"
+        )
+
+    print("-" * len(header))
+    print(
+        f"{'total':<40} {total_legacy * 1000:>7.1f}ms {total_new * 1000:>7.1f}ms "
+        f"{total_legacy / max(total_new, 1e-9):>7.1f}x"
+    )
+
+    # Long dotted number runs (e.g. tables) make the legacy lookaheads backtrack
+    print("\nSynthetic numeric table:")
+    for size in (1000, 2000, 4000):
+        text = "1 Table of values " + "1." * size + "\n"
+        legacy_time = best_time(legacy_extract_regulatory_clauses, text, 1)
+        new_time = best_time(extract_regulatory_clauses, text, 1)
+        print(
+            f"  {size:>5} numbers: legacy {legacy_time * 1000:>8.1f}ms, "
+            f"new {new_time * 1000:>6.2f}ms"
+        )
+
+    if problems:
+        print("\nProblems:")
+        for problem in problems:
+            print(f"  {problem}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
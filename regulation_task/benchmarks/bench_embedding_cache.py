@@ -0,0 +1,89 @@
+"""
+Benchmark of the persistent embedding cache on regulatory clauses.
+
+Embeds the clauses of a synthetic regulation directly, then through the cache three
+times: cold (every text embedded and stored), from disk (a fresh in-memory LRU over
+the same store, as after a restart) and from memory.
+
+Usage:
+    python -m benchmarks.bench_embedding_cache [--size large] [--repeat 3] [--output results.json]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from app.models.embedding_cache import CachedEmbeddings, EmbeddingStore
+from app.models.embeddings import ClaudeEmbeddings
+from app.utils.document_processing import extract_regulatory_clauses
+from benchmarks.corpus import SIZES, blocks_to_text, generate_regulation
+from benchmarks.harness import make_result, measure, print_results, write_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="large", help="Corpus size")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--output", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    text = "\n".join(
+        blocks_to_text(generate_regulation(SIZES[args.size], seed=seed)) for seed in range(4)
+    )
+    texts = extract_regulatory_clauses(text)
+    embeddings = ClaudeEmbeddings(api_key="benchmark")
+    params = {"size": args.size, "texts": len(texts)}
+
+    results = [
+        make_result(
+            f"embedding_cache.uncached.{args.size}",
+            measure(lambda: embeddings.embed_documents_array(texts), args.repeat),
+            params,
+        )
+    ]
+    with tempfile.TemporaryDirectory(prefix="bench_embedding_cache_") as tmp:
+        stores = []
+
+        def cold():
+            store = EmbeddingStore(
+                Path(tmp) / f"cold_{len(stores)}.sqlite3", max_entries=len(texts)
+            )
+            stores.append(store)
+            CachedEmbeddings(embeddings, store).embed_documents_array(texts)
+
+        results.append(
+            make_result(f"embedding_cache.cold.{args.size}", measure(cold, args.repeat), params)
+        )
+        store = stores[-1]
+        results.append(
+            make_result(
+                f"embedding_cache.disk.{args.size}",
+                measure(
+                    lambda: CachedEmbeddings(embeddings, store).embed_documents_array(texts),
+                    args.repeat,
+                ),
+                params,
+                bytes=store.path.stat().st_size,
+            )
+        )
+        cached = CachedEmbeddings(embeddings, store, memory_entries=len(texts))
+        cached.embed_documents_array(texts)
+        results.append(
+            make_result(
+                f"embedding_cache.memory.{args.size}",
+                measure(lambda: cached.embed_documents_array(texts), args.repeat),
+                params,
+                **cached.stats(),
+            )
+        )
+        for store in stores:
+            store.close()
+
+    print_results(results)
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the batched ClaudeEmbeddings engine against the original per-text implementation.
+
+Usage:
+    python -m benchmarks.bench_embeddings [--texts 2000] [--repeat 3]
+"""
+
+import argparse
+import hashlib
+import random
+import textwrap
+import time
+from typing import List
+
+import numpy as np
+
+from app.models.embeddings import ClaudeEmbeddings
+
+WORDS = [
+    "shall",
+    "must",
+    "operator",
+    "pressure",
+    "vessel",
+    "inspection",
+    "interval",
+    "records",
+    "maintain",
+    "employer",
+    "hazard",
+    "analysis",
+    "procedure",
+    "section",
+    "requirement",
+    "equipment",
+    "relief",
+    "device",
+    "thickness",
+    "corrosion",
+    "authorized",
+    "inspector",
+    "documentation",
+    "training",
+    "emergency",
+    "shutdown",
+    "compliance",
+    "permit",
+    "testing",
+]
+
+
+def legacy_embed_documents(texts: List[str]) -> List[List[float]]:
+    """The original pure-Python implementation, kept as the parity reference."""
+    embeddings = []
+    for text in texts:
+        embedding = [0.0] * 1536
+        for i, chunk in enumerate(textwrap.wrap(text, 10)):
+            h = int(hashlib.md5(chunk.encode()).hexdigest(), 16)
+            idx = h % 1536
+            embedding[idx] = 1.0
+        magnitude = sum(x**2 for x in embedding) ** 0.5
+        if magnitude > 0:
+            embedding = [x / magnitude for x in embedding]
+        embeddings.append(embedding)
+    return embeddings
+
+
+def make_texts(count: int, seed: int = 0) -> List[str]:
+    """Generate clause-like texts of 20-200 words."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(20, 200))]
+        texts.append(f"{i}.{rng.randint(1, 20)} " + " ".join(words).capitalize() + ".")
+    return texts
+
+
+def time_call(fn, texts: List[str], repeat: int) -> float:
+    """Return the best wall-clock time over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=2000, help="Number of texts per batch")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation")
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    embeddings = ClaudeEmbeddings(api_key="benchmark")
+
+    # Chroma persists float32 vectors, so parity is checked at that precision
+    legacy = np.asarray(legacy_embed_documents(texts), dtype=np.float32)
+    batched = embeddings.embed_documents_array(texts)
+    parity = bool(np.array_equal(legacy, batched))
+
+    legacy_time = time_call(legacy_embed_documents, texts, args.repeat)
+    batched_time = time_call(embeddings.embed_documents, texts, args.repeat)
+
+    print(f"texts:    {len(texts)}")
+    print(f"parity:   {'OK' if parity else 'MISMATCH'}")
+    print(f"legacy:   {legacy_time:.3f}s ({len(texts) / legacy_time:,.0f} texts/s)")
+    print(f"batched:  {batched_time:.3f}s ({len(texts) / batched_time:,.0f} texts/s)")
+    print(f"speedup:  {legacy_time / batched_time:.1f}x")
+
+    if not parity:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
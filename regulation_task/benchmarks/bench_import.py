@@ -0,0 +1,154 @@
+"""
+Benchmark of cold import times of the application's entry points.
+
+Each entry point is imported in a fresh interpreter under ``python -X importtime``,
+so the timings include everything a cold start pays for. Results list the slowest
+third-party packages and which heavy libraries (web stack, Chroma, parsers, Claude
+SDK) were imported; they should only load when first used.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat 5] [--top 8] [--output results.json]
+                                      [--compare baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks.harness import (
+    RESULTS_DIR,
+    compare_results,
+    load_results,
+    make_result,
+    print_comparison,
+    print_results,
+    summarize_times,
+    write_results,
+)
+
+# Entry points: settings only, the CLI and the web app
+MODULES = ("app.core.config", "app.cli", "app.main")
+
+# Libraries that are slow to import and should be imported on first use
+HEAVY_PACKAGES = (
+    "fastapi",
+    "uvicorn",
+    "jinja2",
+    "langchain",
+    "langchain_chroma",
+    "langchain_text_splitters",
+    "chromadb",
+    "fitz",
+    "docx",
+    "anthropic",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$")
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def import_once(module: str) -> Tuple[float, Dict[str, float]]:
+    """Import a module in a fresh interpreter.
+
+    Returns:
+        The module's cumulative import time and the cumulative import time of every
+        third-party package it pulled in, in seconds
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("CLAUDE_API_KEY", "benchmark")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_DIR,
+        env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, name = int(match.group(1)) / 1e6, match.group(2)
+        if name == module:
+            total = cumulative
+        elif "." not in name and name not in sys.stdlib_module_names:
+            # A package is imported once, wherever it is first needed
+            packages[name] = cumulative
+    return total, packages
+
+
+def run_module(module: str, repeat: int, top: int) -> Dict:
+    """Time the cold import of a module ``repeat`` times."""
+    times: List[float] = []
+    packages: Dict[str, float] = {}
+    for _ in range(repeat):
+        total, run_packages = import_once(module)
+        times.append(total)
+        packages = run_packages
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return make_result(
+        f"import.{module}",
+        summarize_times(times),
+        {"module": module},
+        slowest_packages={name: round(seconds, 4) for name, seconds in slowest},
+        heavy_packages=sorted(name for name in packages if name in HEAVY_PACKAGES),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument(
+        "--top", type=int, default=8, help="Slowest packages to list per entry point"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Result file (default: benchmarks/results/<time>.json)"
+    )
+    parser.add_argument("--compare", type=Path, help="Baseline result file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown of the median that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    results = [run_module(module, args.repeat, args.top) for module in MODULES]
+
+    print_results(results)
+    for result in results:
+        slowest = ", ".join(
+            f"{name} {seconds * 1000:.0f}ms"
+            for name, seconds in result["extra"]["slowest_packages"].items()
+        )
+        print(f"\n{result['params']['module']}: {slowest}")
+        print(
+            f"  heavy libraries imported: {', '.join(result['extra']['heavy_packages']) or 'none'}"
+        )
+
+    output = args.output or RESULTS_DIR / f"import_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    write_results(output, results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        comparisons = compare_results(
+            load_results(args.compare), load_results(output), args.threshold
+        )
+        print(f"\nCompared with {args.compare}:")
+        print_comparison(comparisons)
+        if any(c["regression"] for c in comparisons):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
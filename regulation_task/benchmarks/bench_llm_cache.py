@@ -0,0 +1,67 @@
+"""
+Measure repeated SOP analyses with and without the LLM response cache.
+
+Runs the same analysis several times against the local fake Messages API, using a
+throwaway cache database, and reports the time per run and the cache counters.
+
+Usage:
+    python -m benchmarks.bench_llm_cache [--runs 5] [--latency 2.0]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.llm_backends import close_llm_clients
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_service import LLMService
+from benchmarks.bench_llm_concurrency import CLAUSES, SOP_TEXT
+from benchmarks.fake_anthropic import FakeAnthropicServer
+
+
+async def run_analyses(runs: int) -> list:
+    """Analyze the same SOP ``runs`` times, returning the duration of each run."""
+    service = LLMService(api_key="benchmark")
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await service.analyze_sop_with_llm(SOP_TEXT, CLAUSES)
+        durations.append(time.perf_counter() - start)
+        if "error" in result:
+            raise SystemExit(f"analysis failed: {result['error']}")
+    await close_llm_clients()
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Repeated analyses per mode")
+    parser.add_argument("--latency", type=float, default=2.0, help="Fake API latency in seconds")
+    args = parser.parse_args()
+
+    server = FakeAnthropicServer(latency=args.latency).start()
+    settings.CLAUDE_BASE_URL = server.base_url
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(Path(tmp) / "llm.sqlite3", max_bytes=1024 * 1024, ttl=3600)
+        llm_service.llm_cache = cache
+        try:
+            for enabled in (False, True):
+                settings.LLM_CACHE_ENABLED = enabled
+                server.reset_stats()
+                durations = asyncio.run(run_analyses(args.runs))
+                runs = ", ".join(f"{d * 1000:.1f}ms" for d in durations)
+                print(
+                    f"cache {'on ' if enabled else 'off'}: {runs}  (API calls: {server.requests})"
+                )
+            print(f"\ncache stats: {cache.stats()}")
+        finally:
+            cache.close()
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
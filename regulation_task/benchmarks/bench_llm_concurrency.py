@@ -0,0 +1,109 @@
+"""
+Measure LLMService throughput and event-loop responsiveness under concurrency.
+
+Runs against a local fake Messages API server, comparing the old blocking call
+pattern with the pooled async client at several concurrency limits.
+
+Usage:
+    python -m benchmarks.bench_llm_concurrency [--calls 16] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Tuple
+
+from anthropic import Anthropic
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.llm_backends import close_llm_clients
+from app.services.llm_service import LLMService
+from benchmarks.fake_anthropic import FakeAnthropicServer
+
+SOP_TEXT = "1. Purpose\nOperators shall inspect pressure vessels before start-up.\n" * 20
+CLAUSES = [
+    {
+        "clause": "6.4 Inspection intervals shall not exceed ten years.",
+        "source": "REG-API 510 2022.pdf",
+    },
+]
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Return the worst delay seen by a periodic timer while ``stop`` is unset."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run_blocking(calls: int, base_url: str) -> None:
+    """The previous pattern: a synchronous client called from async code."""
+    client = Anthropic(api_key="benchmark", base_url=base_url)
+
+    async def call():
+        client.messages.create(
+            model=settings.CLAUDE_MODEL,
+            max_tokens=settings.MAX_TOKENS,
+            messages=[{"role": "user", "content": SOP_TEXT}],
+        )
+
+    await asyncio.gather(*[call() for _ in range(calls)])
+
+
+async def run_async(calls: int) -> None:
+    """Concurrent analyses through the pooled async client."""
+    service = LLMService(api_key="benchmark")
+    await asyncio.gather(*[service.analyze_sop_with_llm(SOP_TEXT, CLAUSES) for _ in range(calls)])
+    await close_llm_clients()
+
+
+async def timed(coro_factory) -> Tuple[float, float]:
+    """Run a workload while measuring wall time and event-loop lag."""
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await lag_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=16, help="Concurrent analyses per run")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake API latency in seconds")
+    args = parser.parse_args()
+
+    server = FakeAnthropicServer(latency=args.latency).start()
+    settings.CLAUDE_BASE_URL = server.base_url
+    settings.LLM_CACHE_ENABLED = False
+    print(f"fake API at {server.base_url}, latency {args.latency}s, {args.calls} calls\n")
+    print(f"{'mode':<18} {'wall':>8} {'calls/s':>8} {'peak in flight':>15} {'max loop lag':>13}")
+
+    try:
+        server.reset_stats()
+        elapsed, lag = asyncio.run(timed(lambda: run_blocking(args.calls, server.base_url)))
+        print(
+            f"{'blocking (old)':<18} {elapsed:>7.2f}s {args.calls / elapsed:>8.1f} "
+            f"{server.peak_in_flight:>15} {lag * 1000:>11.0f}ms"
+        )
+
+        for limit in (1, 4, 16):
+            settings.LLM_MAX_CONCURRENCY = limit
+            llm_service._semaphore = None
+            server.reset_stats()
+            elapsed, lag = asyncio.run(timed(lambda: run_async(args.calls)))
+            print(
+                f"{f'async, limit {limit}':<18} {elapsed:>7.2f}s {args.calls / elapsed:>8.1f} "
+                f"{server.peak_in_flight:>15} {lag * 1000:>11.0f}ms"
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
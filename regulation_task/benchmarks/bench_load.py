@@ -0,0 +1,165 @@
+"""
+Offline load test of the job scheduler and LLM concurrency limit with the local LLM backend.
+
+Submits a burst of map-reduce analysis jobs to a JobScheduler, with every model call
+answered by the deterministic local backend (simulated latency, errors and 429s),
+and reports job throughput, job latency percentiles and the backend's counters for
+each combination of job workers and LLM concurrency limit.
+
+Usage:
+    python -m benchmarks.bench_load [--jobs 40] [--sections 4] [--workers 1,2,4]
+                                    [--llm-concurrency 2,4,8] [--latency 0.5] [--error-rate 0.02]
+                                    [--rate-limit-rate 0.02] [--rpm 0] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from functools import partial
+from pathlib import Path
+
+from app.core.config import settings
+from app.services import llm_backends, llm_service
+from app.services.job_scheduler import JobScheduler
+from app.services.llm_service import LLMService
+from benchmarks.harness import make_result, summarize_times, write_results
+
+
+def make_sections(job: int, count: int):
+    """Distinct SOP sections and clauses for one job, so no two prompts are alike."""
+    return [
+        {
+            "text": f"Job {job} section {i}: operators record the pressure relief valve setting "
+            f"every shift and file the calibration certificate in the logbook.",
+            "clauses": [
+                {
+                    "clause": f"Clause {job}.{i}: the operator shall record the pressure relief "
+                    f"valve setting and retain calibration certificates for {i + 2} years.",
+                    "source": "REG.pdf",
+                    "relevance_score": 0.3,
+                }
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+async def run_load(jobs: int, sections: int, workers: int, llm_concurrency: int):
+    """Run a burst of jobs and return (wall time, job latencies, failed sections, backend stats)."""
+    settings.LLM_MAX_CONCURRENCY = llm_concurrency
+    llm_service._semaphore = None
+    llm_backends._local_backend = None
+    service = LLMService(api_key="benchmark")
+    if not isinstance(service.backend, llm_backends.LocalLLMBackend):
+        raise SystemExit("bench_load needs the local LLM backend (LLM_BACKEND=local)")
+    backend = service.backend
+
+    scheduler = JobScheduler(max_workers=workers, max_queue=jobs)
+    await scheduler.start()
+    latencies = []
+    failed_sections = 0
+    all_done = asyncio.Event()
+
+    async def run_job(job: int, submitted: float):
+        nonlocal failed_sections
+        try:
+            result = await service.analyze_sop_sections(make_sections(job, sections))
+            failed_sections += len(result.get("section_errors", [])) + (
+                sections if "error" in result else 0
+            )
+        finally:
+            latencies.append(time.perf_counter() - submitted)
+            if len(latencies) == jobs:
+                all_done.set()
+
+    start = time.perf_counter()
+    for job in range(jobs):
+        scheduler.submit(f"load_{job}", partial(run_job, job, time.perf_counter()))
+    await all_done.wait()
+    elapsed = time.perf_counter() - start
+    await scheduler.stop()
+    return elapsed, latencies, failed_sections, dict(backend.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=40, help="Jobs submitted at once")
+    parser.add_argument(
+        "--sections", type=int, default=4, help="SOP sections (model calls) per job"
+    )
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated job worker counts")
+    parser.add_argument(
+        "--llm-concurrency", default="2,4,8", help="Comma-separated LLM concurrency limits"
+    )
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean model latency in seconds")
+    parser.add_argument(
+        "--distribution", default="lognormal", help="fixed, uniform, normal or lognormal"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.02, help="Share of calls failing with 500"
+    )
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.02, help="Share of calls rejected with 429"
+    )
+    parser.add_argument(
+        "--rpm", type=int, default=0, help="Requests per minute before 429s (0 is unlimited)"
+    )
+    parser.add_argument("--output", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    settings.LLM_BACKEND = "local"
+    settings.LLM_CACHE_ENABLED = False
+    settings.LOCAL_LLM_LATENCY = args.distribution
+    settings.LOCAL_LLM_LATENCY_MEAN = args.latency
+    settings.LOCAL_LLM_LATENCY_STDDEV = args.latency / 2
+    settings.LOCAL_LLM_ERROR_RATE = args.error_rate
+    settings.LOCAL_LLM_RATE_LIMIT_RATE = args.rate_limit_rate
+    settings.LOCAL_LLM_REQUESTS_PER_MINUTE = args.rpm
+
+    print(
+        f"{args.jobs} jobs x {args.sections} sections, {args.distribution} latency "
+        f"mean {args.latency}s, {args.error_rate:.0%} errors, {args.rate_limit_rate:.0%} 429s\n"
+    )
+    print(
+        f"{'workers':>7} {'llm':>4} {'wall':>8} {'jobs/min':>9} {'p50':>7} {'p95':>7} "
+        f"{'calls':>6} {'retries':>7} {'429s':>5} {'failed':>6}"
+    )
+    results = []
+    for workers in (int(value) for value in args.workers.split(",")):
+        for llm_concurrency in (int(value) for value in args.llm_concurrency.split(",")):
+            elapsed, latencies, failed, stats = asyncio.run(
+                run_load(args.jobs, args.sections, workers, llm_concurrency)
+            )
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(
+                f"{workers:>7} {llm_concurrency:>4} {elapsed:>7.2f}s "
+                f"{args.jobs / elapsed * 60:>9.1f} {statistics.median(latencies):>6.2f}s "
+                f"{p95:>6.2f}s {stats['requests']:>6} "
+                f"{stats['retries']:>7} {stats['rate_limited']:>5} {failed:>6}"
+            )
+            results.append(
+                make_result(
+                    f"load.workers{workers}.llm{llm_concurrency}",
+                    summarize_times(latencies),
+                    {
+                        "jobs": args.jobs,
+                        "sections": args.sections,
+                        "workers": workers,
+                        "llm_concurrency": llm_concurrency,
+                        "latency": args.latency,
+                    },
+                    wall_time=elapsed,
+                    jobs_per_minute=args.jobs / elapsed * 60,
+                    failed_sections=failed,
+                    backend=stats,
+                )
+            )
+
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
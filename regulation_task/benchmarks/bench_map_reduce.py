@@ -0,0 +1,120 @@
+"""
+Compare single-prompt and map-reduce SOP analysis on a long synthetic SOP.
+
+Uses the local fake Messages API with a latency that grows with prompt length, and
+reports wall time and how much of the SOP each mode actually sent to the model.
+
+Usage:
+    python -m benchmarks.bench_map_reduce [--sop-chars 60000] [--latency-per-1k 0.1]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.db.vector_store import rank_relevant_clauses
+from app.services.llm_backends import close_llm_clients
+from app.services.llm_service import LLMService
+from app.utils.document_processing import group_chunks_into_sections, split_text_into_chunks
+from benchmarks.fake_anthropic import FakeAnthropicServer
+
+PARAGRAPH = (
+    "{n}. Inspection step {n}\n"
+    "Operators shall record the vessel pressure, verify relief valve settings and "
+    "sign the inspection log before returning equipment {n} to service.\n\n"
+)
+
+
+def make_sop(chars: int) -> str:
+    """Build a numbered SOP of roughly ``chars`` characters."""
+    parts = []
+    total = 0
+    n = 1
+    while total < chars:
+        parts.append(PARAGRAPH.format(n=n))
+        total += len(parts[-1])
+        n += 1
+    return "".join(parts)
+
+
+def fake_clauses(chunks):
+    """One distinct stand-in clause per chunk, as retrieval would return them."""
+    return [
+        [
+            {
+                "clause": f"Clause for chunk {i}: records shall be kept.",
+                "source": "REG.pdf",
+                "relevance_score": 0.5,
+                "sop_chunk": chunk,
+            }
+        ]
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+async def run(mode: str, sop_text: str, chunks, clauses_by_chunk):
+    """Analyze the SOP in the given mode and return (seconds, chars sent, result)."""
+    service = LLMService(api_key="benchmark")
+    start = time.perf_counter()
+    if mode == "single":
+        result = await service.analyze_sop_with_llm(
+            sop_text, rank_relevant_clauses(clauses_by_chunk)
+        )
+        sent = min(len(sop_text), 10000)
+    else:
+        sections = group_chunks_into_sections(sop_text, chunks)
+        for section in sections:
+            section["clauses"] = rank_relevant_clauses(
+                [clauses_by_chunk[i] for i in section["chunk_indices"]]
+            )
+        result = await service.analyze_sop_sections(sections)
+        sent = sum(len(section["text"]) for section in sections)
+    elapsed = time.perf_counter() - start
+    await close_llm_clients()
+    return elapsed, sent, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sop-chars", type=int, default=60000, help="Size of the synthetic SOP")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="Fixed fake API latency in seconds"
+    )
+    parser.add_argument(
+        "--latency-per-1k",
+        type=float,
+        default=0.1,
+        help="Extra fake API latency per 1000 prompt characters",
+    )
+    args = parser.parse_args()
+
+    sop_text = make_sop(args.sop_chars)
+    chunks = split_text_into_chunks(sop_text)
+    clauses_by_chunk = fake_clauses(chunks)
+
+    server = FakeAnthropicServer(
+        latency=args.latency, latency_per_1k_chars=args.latency_per_1k
+    ).start()
+    settings.CLAUDE_BASE_URL = server.base_url
+    settings.LLM_CACHE_ENABLED = False
+    settings.LLM_MAX_CONCURRENCY = 16
+    print(f"SOP: {len(sop_text)} chars, {len(chunks)} chunks\n")
+    print(f"{'mode':<12} {'wall':>8} {'API calls':>10} {'SOP coverage':>13} {'score':>6}")
+    try:
+        for mode in ("single", "map_reduce"):
+            server.reset_stats()
+            elapsed, sent, result = asyncio.run(run(mode, sop_text, chunks, clauses_by_chunk))
+            if "error" in result:
+                raise SystemExit(f"{mode} analysis failed: {result['error']}")
+            coverage = min(sent, len(sop_text)) / len(sop_text)
+            print(
+                f"{mode:<12} {elapsed:>7.2f}s {server.requests:>10} {coverage:>12.0%} "
+                f"{result.get('compliance_score'):>6}"
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
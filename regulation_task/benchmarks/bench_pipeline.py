@@ -0,0 +1,124 @@
+"""
+End-to-end pipeline benchmark with a stubbed LLM.
+
+Runs process_documents_and_analyze on a synthetic corpus against the local fake
+Messages API. The first run is cold (extraction and indexing); later runs reuse the
+processed documents and the index. All data directories point at a scratch
+directory, so the real data directory is never touched.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--size medium] [--count 3] [--runs 3]
+        [--output results.json]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.corpus import SIZES, generate_corpus
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from benchmarks.harness import make_result, print_results, summarize_times, write_results
+
+
+def isolate_data_dirs(work_dir: Path) -> None:
+    """Point the app's data directories at ``work_dir``; must run before importing app modules.
+
+    Environment variables are used (rather than patching settings) so extraction pool
+    workers, which import the app afresh, see the same directories.
+    """
+    for name in ("PROCESSED_DIR", "REPORTS_DIR", "CHROMA_PERSIST_DIR"):
+        path = work_dir / name.lower()
+        path.mkdir(parents=True, exist_ok=True)
+        os.environ[name] = str(path)
+    os.environ["REPORT_INDEX_PATH"] = str(work_dir / "report_index.sqlite3")
+    os.environ["EMBEDDING_CACHE_PATH"] = str(work_dir / "embeddings.sqlite3")
+    os.environ["JOB_STORE_PATH"] = str(work_dir / "jobs.sqlite3")
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("CLAUDE_API_KEY", "benchmark")
+
+
+async def run_pipeline(
+    corpus: Dict[str, List[Path]], runs: int, latency: float
+) -> List[Dict[str, Any]]:
+    """Run the pipeline ``runs`` times and return cold and warm results."""
+    from app.core.config import ensure_data_dirs, settings
+    from app.db.vector_store import get_vector_db
+    from app.services.analysis_service import process_documents_and_analyze
+    from app.services.extraction_pool import extraction_pool
+    from app.services.llm_backends import close_llm_clients
+
+    server = FakeAnthropicServer(latency=latency).start()
+    settings.CLAUDE_BASE_URL = server.base_url
+    ensure_data_dirs()
+    get_vector_db()
+    extraction_pool.start()
+
+    sop_file = str(corpus["sop"][0])
+    regulatory_files = [str(path) for path in corpus["regulations"]]
+    times, reports = [], []
+    try:
+        for run in range(runs):
+            start = time.perf_counter()
+            report = await process_documents_and_analyze(sop_file, regulatory_files, f"bench_{run}")
+            times.append(time.perf_counter() - start)
+            if "error" in report:
+                raise RuntimeError(f"Pipeline failed: {report['error']}")
+            reports.append(report)
+    finally:
+        extraction_pool.shutdown()
+        await close_llm_clients()
+        server.stop()
+
+    params = {"documents": len(regulatory_files), "llm_latency": latency}
+    results = [
+        make_result(
+            "pipeline.cold", summarize_times(times[:1]), params, stages=reports[0]["timings"]
+        )
+    ]
+    if runs > 1:
+        warm_stages = {
+            stage: sum(report["timings"][stage] for report in reports[1:]) / (runs - 1)
+            for stage in reports[1]["timings"]
+        }
+        results.append(
+            make_result("pipeline.warm", summarize_times(times[1:]), params, stages=warm_stages)
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="medium", help="Corpus size")
+    parser.add_argument("--count", type=int, default=3, help="Regulations per format")
+    parser.add_argument("--runs", type=int, default=3, help="Pipeline runs (the first is cold)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--output", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        work_dir = Path(tmp)
+        isolate_data_dirs(work_dir)
+        corpus = generate_corpus(work_dir / "corpus", args.size, args.count)
+        results = asyncio.run(run_pipeline(corpus, args.runs, args.latency))
+    for result in results:
+        result["name"] = f"{result['name']}.{args.size}"
+        result["params"]["size"] = args.size
+
+    print_results(results)
+    for result in results:
+        stages = ", ".join(
+            f"{stage} {seconds * 1000:.0f}ms"
+            for stage, seconds in result["extra"]["stages"].items()
+        )
+        print(f"  {result['name']}: {stages}")
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark of re-indexing a lightly amended regulation.
+
+Indexes a synthetic regulation into a scratch Chroma collection, then re-indexes
+it unchanged and with a share of its clauses edited, and compares the time with
+indexing the amended regulation from scratch. Incremental re-indexing embeds and
+writes only the clauses that changed.
+
+Usage:
+    python -m benchmarks.bench_reindex [--size large] [--amend 0.05] [--repeat 3]
+        [--output results.json]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from langchain_chroma import Chroma
+
+from app.db.vector_store import add_regulatory_clauses_to_db
+from app.models.embeddings import ClaudeEmbeddings
+from app.utils.document_processing import extract_regulatory_clauses
+from benchmarks.corpus import SIZES, _obligation, blocks_to_text, generate_regulation
+from benchmarks.harness import make_result, print_results, summarize_times, write_results
+
+SOURCE = "amended_regulation.pdf"
+
+
+def amend_clauses(clauses: List[str], share: float, seed: int = 0) -> List[str]:
+    """Edit, drop and insert clauses, touching about ``share`` of them."""
+    rng = random.Random(seed)
+    amended = [[clause] for clause in clauses]
+    for index in rng.sample(range(len(amended)), max(1, int(len(amended) * share))):
+        action = rng.choice(["edit", "edit", "drop", "insert"])
+        if action == "edit":
+            amended[index] = [f"{clauses[index]} {_obligation(rng)}"]
+        elif action == "drop":
+            amended[index] = []
+        else:
+            amended[index].append(_obligation(rng))
+    return [clause for part in amended for clause in part]
+
+
+def new_collection(chroma_dir: str, name: str) -> Chroma:
+    """A fresh collection in the scratch directory."""
+    return Chroma(
+        collection_name=name,
+        persist_directory=chroma_dir,
+        embedding_function=ClaudeEmbeddings(api_key="benchmark"),
+    )
+
+
+def timed_index(clauses: List[str], db: Chroma):
+    """Index clauses and return (seconds, index stats)."""
+    start = time.perf_counter()
+    stats = add_regulatory_clauses_to_db(clauses, source=SOURCE, db=db)
+    return time.perf_counter() - start, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="large", help="Corpus size")
+    parser.add_argument(
+        "--amend", type=float, default=0.05, help="Share of clauses edited, dropped or inserted"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--output", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # Several regulations' worth of clauses, so the index is not trivially small
+    text = "\n".join(
+        blocks_to_text(generate_regulation(SIZES[args.size], seed=seed)) for seed in range(4)
+    )
+    clauses = extract_regulatory_clauses(text)
+    amended = amend_clauses(clauses, args.amend)
+    params = {"size": args.size, "clauses": len(clauses), "amend": args.amend}
+
+    times = {"full": [], "unchanged": [], "amended": []}
+    stats = {}
+    with tempfile.TemporaryDirectory(prefix="bench_reindex_") as chroma_dir:
+        for run in range(args.repeat):
+            seconds, _ = timed_index(amended, new_collection(chroma_dir, f"full_{run}"))
+            times["full"].append(seconds)
+
+            db = new_collection(chroma_dir, f"incremental_{run}")
+            add_regulatory_clauses_to_db(clauses, source=SOURCE, db=db)
+            seconds, stats["unchanged"] = timed_index(clauses, db)
+            times["unchanged"].append(seconds)
+            seconds, stats["amended"] = timed_index(amended, db)
+            times["amended"].append(seconds)
+        db._client.clear_system_cache()
+
+    results = [
+        make_result(f"reindex.full.{args.size}", summarize_times(times["full"]), params),
+        make_result(
+            f"reindex.unchanged.{args.size}",
+            summarize_times(times["unchanged"]),
+            params,
+            **stats["unchanged"],
+        ),
+        make_result(
+            f"reindex.amended.{args.size}",
+            summarize_times(times["amended"]),
+            params,
+            **stats["amended"],
+        ),
+    ]
+    print_results(results)
+    amended_stats = stats["amended"]
+    print(
+        f"\nAmended re-index: {amended_stats['added']} added, {amended_stats['removed']} removed, "
+        f"{amended_stats['unchanged']} unchanged of {len(amended)} clauses"
+    )
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
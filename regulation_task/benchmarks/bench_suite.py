@@ -0,0 +1,195 @@
+"""
+Benchmark suite over a synthetic regulatory corpus, with JSON results for regression checks.
+
+Microbenchmarks cover extract_text_from_file, extract_regulatory_clauses,
+split_text_into_chunks, ClaudeEmbeddings.embed_documents and find_relevant_clauses
+at each corpus size. The end-to-end pipeline benchmark (stubbed LLM) runs in a
+subprocess so its data directories stay isolated.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes small,medium] [--repeat 5] [--output results.json]
+                                     [--compare baseline.json] [--threshold 0.2] [--no-pipeline]
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from langchain_chroma import Chroma
+
+from app.db.vector_store import add_regulatory_clauses_to_db, find_relevant_clauses
+from app.models.embeddings import ClaudeEmbeddings
+from app.utils.document_processing import (
+    extract_regulatory_clauses,
+    extract_text_from_file,
+    split_text_into_chunks,
+)
+from benchmarks.corpus import SIZES, generate_corpus
+from benchmarks.harness import (
+    RESULTS_DIR,
+    compare_results,
+    load_results,
+    make_result,
+    measure,
+    print_comparison,
+    print_results,
+    write_results,
+)
+
+
+def run_microbenchmarks(corpus_dir: Path, size: str, repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark the pipeline building blocks on one corpus size."""
+    corpus = generate_corpus(corpus_dir / size, size, count=1)
+    results = []
+
+    texts = {}
+    for path in corpus["regulations"]:
+        fmt = path.suffix.lstrip(".")
+        texts[fmt] = extract_text_from_file(str(path))
+        stats = measure(lambda: extract_text_from_file(str(path)), repeat)
+        results.append(
+            make_result(
+                f"extract_text_from_file.{fmt}.{size}",
+                stats,
+                {"size": size, "format": fmt},
+                bytes=path.stat().st_size,
+                chars=len(texts[fmt]),
+            )
+        )
+
+    text = texts.get("pdf") or next(iter(texts.values()))
+    clauses = extract_regulatory_clauses(text)
+    stats = measure(lambda: extract_regulatory_clauses(text), repeat)
+    results.append(
+        make_result(
+            f"extract_regulatory_clauses.{size}",
+            stats,
+            {"size": size},
+            chars=len(text),
+            clauses=len(clauses),
+        )
+    )
+
+    chunks = split_text_into_chunks(text)
+    stats = measure(lambda: split_text_into_chunks(text), repeat)
+    results.append(
+        make_result(
+            f"split_text_into_chunks.{size}",
+            stats,
+            {"size": size},
+            chars=len(text),
+            chunks=len(chunks),
+        )
+    )
+
+    embeddings = ClaudeEmbeddings(api_key="benchmark")
+    stats = measure(lambda: embeddings.embed_documents(clauses), repeat)
+    results.append(
+        make_result(f"embed_documents.{size}", stats, {"size": size}, texts=len(clauses))
+    )
+
+    sop_chunks = split_text_into_chunks(extract_text_from_file(str(corpus["sop"][0])))
+    with tempfile.TemporaryDirectory(prefix="bench_chroma_") as chroma_dir:
+        db = Chroma(
+            collection_name=f"bench_{size}",
+            persist_directory=chroma_dir,
+            embedding_function=embeddings,
+        )
+        add_regulatory_clauses_to_db(clauses, source=corpus["regulations"][0].name, db=db)
+        stats = measure(lambda: find_relevant_clauses(sop_chunks, db, top_k=5), repeat)
+        results.append(
+            make_result(
+                f"find_relevant_clauses.{size}",
+                stats,
+                {"size": size, "top_k": 5},
+                queries=len(sop_chunks),
+                indexed_clauses=len(clauses),
+            )
+        )
+        db._client.clear_system_cache()
+    return results
+
+
+def run_pipeline_benchmark(size: str, runs: int, latency: float) -> List[Dict[str, Any]]:
+    """Run the end-to-end pipeline benchmark in a subprocess and load its results."""
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as tmp:
+        output = Path(tmp) / "pipeline.json"
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_pipeline",
+                "--size",
+                size,
+                "--runs",
+                str(runs),
+                "--latency",
+                str(latency),
+                "--output",
+                str(output),
+            ],
+            check=True,
+        )
+        return load_results(output)["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", default="small,medium", help=f"Comma-separated corpus sizes ({', '.join(SIZES)})"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per microbenchmark")
+    parser.add_argument(
+        "--pipeline-runs", type=int, default=3, help="End-to-end runs (the first is cold)"
+    )
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--no-pipeline", action="store_true", help="Skip the end-to-end benchmark")
+    parser.add_argument(
+        "--output", type=Path, help="Result file (default: benchmarks/results/<time>.json)"
+    )
+    parser.add_argument("--compare", type=Path, help="Baseline result file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown of the median that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    sizes = args.sizes.split(",")
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"Unknown corpus size: {size}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_corpus_") as corpus_dir:
+        for size in sizes:
+            print(f"Running microbenchmarks on the {size} corpus...")
+            results.extend(run_microbenchmarks(Path(corpus_dir), size, args.repeat))
+    if not args.no_pipeline:
+        for size in sizes:
+            print(f"Running the end-to-end pipeline on the {size} corpus...")
+            results.extend(run_pipeline_benchmark(size, args.pipeline_runs, args.latency))
+
+    print()
+    print_results(results)
+    output = args.output or RESULTS_DIR / f"suite_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    write_results(output, results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        comparisons = compare_results(
+            load_results(args.compare), load_results(output), args.threshold
+        )
+        print(f"\nCompared with {args.compare}:")
+        print_comparison(comparisons)
+        if any(c["regression"] for c in comparisons):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark of clause search scoped to the requested regulations, in both vector store layouts.
+
+Indexes a corpus of synthetic regulations into scratch Chroma directories, one in the
+single layout (all clauses in one collection) and one in the sharded layout (one
+collection per regulation). It then times searching the clauses of a few
+regulations against searching the whole corpus, and removing one regulation.
+
+Usage:
+    python -m benchmarks.bench_vector_search [--regulations 40] [--scope 2] [--size small]
+                                             [--repeat 5] [--output results.json]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_chroma import Chroma
+
+from app.core.config import settings
+from app.db.vector_store import (
+    COLLECTION_NAME,
+    find_relevant_clauses_by_chunk,
+    make_clause_id,
+    remove_document_from_db,
+    write_clauses,
+)
+from app.models.embeddings import ClaudeEmbeddings
+from app.utils.document_processing import extract_regulatory_clauses, split_text_into_chunks
+from benchmarks.corpus import SIZES, blocks_to_text, generate_regulation, generate_sop
+from benchmarks.harness import make_result, measure, print_results, summarize_times, write_results
+
+
+def build_index(chroma_dir: str, clauses_by_source: Dict[str, List[str]]) -> Chroma:
+    """Index every regulation's clauses in the current layout."""
+    db = Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=chroma_dir,
+        embedding_function=ClaudeEmbeddings(api_key="benchmark"),
+    )
+    clauses, sources = {}, {}
+    for source, source_clauses in clauses_by_source.items():
+        for clause in source_clauses:
+            clause_id = make_clause_id(source, clause)
+            clauses[clause_id] = clause
+            sources[clause_id] = source
+    write_clauses(clauses, sources, db)
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--regulations", type=int, default=40, help="Regulations in the index")
+    parser.add_argument("--scope", type=int, default=2, help="Regulations named in the request")
+    parser.add_argument(
+        "--size", choices=sorted(SIZES), default="small", help="Size of each regulation"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario")
+    parser.add_argument("--output", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    clauses_by_source = {
+        f"regulation_{seed:03d}.pdf": extract_regulatory_clauses(
+            blocks_to_text(generate_regulation(SIZES[args.size], seed=seed))
+        )
+        for seed in range(args.regulations)
+    }
+    sop_chunks = split_text_into_chunks(blocks_to_text(generate_sop(SIZES[args.size])))
+    scope = list(clauses_by_source)[: args.scope]
+    params = {
+        "regulations": args.regulations,
+        "scope": args.scope,
+        "size": args.size,
+        "clauses": sum(len(clauses) for clauses in clauses_by_source.values()),
+        "queries": len(sop_chunks),
+    }
+
+    results = []
+    for layout in ("single", "sharded"):
+        settings.VECTOR_STORE_LAYOUT = layout
+        with tempfile.TemporaryDirectory(prefix=f"bench_vector_search_{layout}_") as chroma_dir:
+            db = build_index(chroma_dir, clauses_by_source)
+            for name, sources in (("all", None), ("scoped", scope)):
+                stats = measure(
+                    lambda: find_relevant_clauses_by_chunk(
+                        sop_chunks, db, settings.TOP_K_CLAUSES, sources
+                    ),
+                    args.repeat,
+                )
+                results.append(
+                    make_result(
+                        f"vector_search.{layout}.{name}", stats, {**params, "layout": layout}
+                    )
+                )
+
+            # Remove one regulation per run, from the end of the corpus
+            removal_times = []
+            for source in list(clauses_by_source)[-args.repeat :]:
+                start = time.perf_counter()
+                remove_document_from_db(source, db)
+                removal_times.append(time.perf_counter() - start)
+            results.append(
+                make_result(
+                    f"vector_search.{layout}.remove",
+                    summarize_times(removal_times),
+                    {**params, "layout": layout},
+                )
+            )
+            db._client.clear_system_cache()
+
+    print_results(results)
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
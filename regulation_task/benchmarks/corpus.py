@@ -0,0 +1,281 @@
+"""
+Synthetic regulatory corpus for benchmarks.
+
+Generates regulations with numbered sections and subsections, obligation sentences
+(shall/must/should) mixed with descriptive text, and requirement tables, plus an SOP
+that implements part of those obligations. Documents are written as PDF or DOCX at
+configurable sizes, and the same seed always produces the same corpus.
+
+Usage:
+    python -m benchmarks.corpus --out /tmp/corpus [--size medium] [--count 3] [--formats pdf,docx]
+"""
+
+import argparse
+import random
+import textwrap
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import docx
+import fitz  # type: ignore[import-untyped]
+
+# Sections per regulation for each corpus size
+SIZES: Dict[str, int] = {"small": 8, "medium": 40, "large": 160}
+
+# A block is ("heading", text), ("paragraph", text) or ("table", rows)
+Block = Tuple[str, Union[str, List[List[str]]]]
+
+TOPICS = [
+    "Equipment Qualification",
+    "Cleaning Validation",
+    "Batch Records",
+    "Deviation Handling",
+    "Change Control",
+    "Training",
+    "Calibration",
+    "Pressure Systems",
+    "Environmental Monitoring",
+    "Supplier Qualification",
+    "Data Integrity",
+    "Complaint Handling",
+    "Internal Audits",
+    "Document Control",
+    "Storage Conditions",
+    "Labelling",
+    "Waste Disposal",
+    "Personal Protection",
+]
+SUBJECTS = [
+    "The operator",
+    "The quality unit",
+    "Each site",
+    "The manufacturer",
+    "The responsible person",
+    "Maintenance staff",
+    "The process owner",
+    "Every supervisor",
+]
+OBLIGATIONS = ["shall", "must", "should", "is required to"]
+ACTIONS = [
+    "record the {item} before each {event}",
+    "verify the {item} at least once per {period}",
+    "retain evidence of the {item} for {years} years",
+    "notify the quality unit of any change to the {item} within {days} days",
+    "document the review of the {item} and sign the {record}",
+    "investigate every deviation in the {item} and record the root cause in the {record}",
+    "ensure that the {item} is calibrated against a traceable standard every {period}",
+]
+DESCRIPTIONS = [
+    "This section applies to all {item} used in regulated operations.",
+    "The {item} is described in the site master file and the associated {record}.",
+    "Guidance on acceptable limits for the {item} is given in the annex to this part.",
+    "Historical data on the {item} may be used to justify a reduced {period}ly frequency.",
+]
+ITEMS = [
+    "pressure relief valve setting",
+    "cleaning agent concentration",
+    "equipment log",
+    "temperature record",
+    "training matrix",
+    "calibration certificate",
+    "batch yield",
+    "alarm history",
+    "access list",
+    "environmental sample",
+    "label reconciliation",
+]
+EVENTS = ["shift", "batch", "changeover", "release", "start-up"]
+PERIODS = ["day", "week", "month", "quarter", "year"]
+RECORDS = ["logbook", "batch record", "deviation report", "inspection form", "quality file"]
+
+
+def _fill(rng: random.Random, template: str) -> str:
+    """Fill a sentence template with random terms."""
+    return template.format(
+        item=rng.choice(ITEMS),
+        event=rng.choice(EVENTS),
+        period=rng.choice(PERIODS),
+        record=rng.choice(RECORDS),
+        years=rng.choice([2, 5, 10]),
+        days=rng.choice([5, 10, 30]),
+    )
+
+
+def _obligation(rng: random.Random) -> str:
+    """One obligation sentence."""
+    return f"{rng.choice(SUBJECTS)} {rng.choice(OBLIGATIONS)} {_fill(rng, rng.choice(ACTIONS))}."
+
+
+def generate_regulation(
+    sections: int, seed: int = 0, title: str = "Synthetic Regulation"
+) -> List[Block]:
+    """Generate the blocks of a regulation with ``sections`` numbered sections."""
+    rng = random.Random(seed)
+    blocks: List[Block] = [("heading", title)]
+    for number in range(1, sections + 1):
+        blocks.append(("heading", f"Section {number}. {rng.choice(TOPICS)}"))
+        blocks.append(("paragraph", _fill(rng, rng.choice(DESCRIPTIONS))))
+        for sub in range(1, rng.randint(2, 4) + 1):
+            sentences = [_obligation(rng) for _ in range(rng.randint(1, 3))]
+            if rng.random() < 0.4:
+                sentences.append(_fill(rng, rng.choice(DESCRIPTIONS)))
+            blocks.append(("paragraph", f"{number}.{sub} " + " ".join(sentences)))
+        if number % 4 == 0:
+            rows = [["Requirement", "Frequency", "Record"]]
+            for _ in range(rng.randint(3, 6)):
+                rows.append(
+                    [
+                        rng.choice(ITEMS).capitalize(),
+                        f"Every {rng.choice(PERIODS)}",
+                        rng.choice(RECORDS).capitalize(),
+                    ]
+                )
+            blocks.append(("table", rows))
+    return blocks
+
+
+def generate_sop(
+    steps: int, seed: int = 0, title: str = "Synthetic Standard Operating Procedure"
+) -> List[Block]:
+    """Generate the blocks of an SOP with ``steps`` numbered procedure steps."""
+    rng = random.Random(seed + 10_000)
+    blocks: List[Block] = [
+        ("heading", title),
+        ("paragraph", "1. Purpose"),
+        (
+            "paragraph",
+            "This procedure describes routine operation and inspection of plant equipment.",
+        ),
+    ]
+    for number in range(1, steps + 1):
+        blocks.append(("heading", f"{number + 1}. {rng.choice(TOPICS)}"))
+        for sub in range(1, rng.randint(2, 3) + 1):
+            item = rng.choice(ITEMS)
+            blocks.append(
+                (
+                    "paragraph",
+                    f"{number + 1}.{sub} Operators {rng.choice(['record', 'check', 'review'])} "
+                    f"the {item} every {rng.choice(PERIODS)} and file it in the "
+                    f"{rng.choice(RECORDS)}.",
+                )
+            )
+    return blocks
+
+
+def blocks_to_text(blocks: List[Block]) -> str:
+    """Render blocks as plain text, with tables as pipe-separated rows."""
+    parts = []
+    for _, content in blocks:
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.append("\n".join(" | ".join(row) for row in content))
+    return "\n\n".join(parts) + "\n"
+
+
+def write_docx(blocks: List[Block], path: Path) -> Path:
+    """Write blocks to a DOCX file with real headings and tables."""
+    document = docx.Document()
+    for kind, content in blocks:
+        if isinstance(content, str):
+            if kind == "heading":
+                document.add_heading(content, level=1)
+            else:
+                document.add_paragraph(content)
+        else:
+            table = document.add_table(rows=len(content), cols=len(content[0]))
+            for row, values in zip(table.rows, content):
+                for cell, value in zip(row.cells, values):
+                    cell.text = value
+    document.save(str(path))
+    return path
+
+
+def write_pdf(blocks: List[Block], path: Path) -> Path:
+    """Write blocks to a PDF file as wrapped text lines, with ruled tables."""
+    document = fitz.open()
+    width, height = fitz.paper_size("a4")
+    margin, line_height, font_size = 56, 13, 10
+    page = document.new_page(width=width, height=height)
+    y: float = margin
+
+    def next_line(advance: float = line_height) -> None:
+        nonlocal page, y
+        if y + advance > height - margin:
+            page = document.new_page(width=width, height=height)
+            y = margin
+        y += advance
+
+    for kind, content in blocks:
+        if not isinstance(content, str):
+            column_width = (width - 2 * margin) / len(content[0])
+            for row in content:
+                next_line(line_height + 4)
+                for i, value in enumerate(row):
+                    page.insert_text(
+                        (margin + i * column_width + 2, y), value, fontsize=font_size - 1
+                    )
+                page.draw_line((margin, y + 4), (width - margin, y + 4), width=0.5)
+        else:
+            size = font_size + 2 if kind == "heading" else font_size
+            for line in textwrap.wrap(content, width=95) or [""]:
+                next_line()
+                page.insert_text((margin, y), line, fontsize=size)
+        next_line(line_height / 2)
+    document.save(str(path))
+    document.close()
+    return path
+
+
+def write_document(blocks: List[Block], path: Path) -> Path:
+    """Write blocks to a PDF or DOCX file, chosen by the file extension."""
+    path = Path(path)
+    if path.suffix.lower() == ".pdf":
+        return write_pdf(blocks, path)
+    if path.suffix.lower() == ".docx":
+        return write_docx(blocks, path)
+    raise ValueError(f"Unsupported corpus format: {path.suffix}")
+
+
+def generate_corpus(
+    out_dir: Path,
+    size: str = "medium",
+    count: int = 3,
+    formats: Tuple[str, ...] = ("pdf", "docx"),
+    seed: int = 0,
+) -> Dict[str, List[Path]]:
+    """Write ``count`` regulations per format and one SOP into ``out_dir``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sections = SIZES[size]
+    regulations = []
+    for i in range(count):
+        blocks = generate_regulation(sections, seed=seed + i, title=f"Synthetic Regulation {i + 1}")
+        for fmt in formats:
+            regulations.append(write_document(blocks, out_dir / f"regulation_{size}_{i + 1}.{fmt}"))
+    sop = write_document(
+        generate_sop(max(sections // 2, 4), seed=seed), out_dir / f"sop_{size}.docx"
+    )
+    return {"regulations": regulations, "sop": [sop]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="Output directory")
+    parser.add_argument(
+        "--size", choices=sorted(SIZES), default="medium", help="Sections per regulation"
+    )
+    parser.add_argument("--count", type=int, default=3, help="Regulations per format")
+    parser.add_argument("--formats", default="pdf,docx", help="Comma-separated formats (pdf, docx)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(
+        args.out, args.size, args.count, tuple(args.formats.split(",")), args.seed
+    )
+    for path in corpus["regulations"] + corpus["sop"]:
+        print(f"{path} ({path.stat().st_size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Local stand-in for the Claude Messages API.
+
+Serves POST /v1/messages with a fixed latency (plus an optional per-character cost
+for the prompt) and a schema-valid analysis response, so the LLM client path can be
+exercised and measured without network access.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+FAKE_ANALYSIS = {
+    "compliance_summary": "The SOP partially complies with the referenced clauses.",
+    "discrepancies": [
+        {
+            "regulatory_reference": "Clause 1",
+            "issue": "Inspection intervals are not defined.",
+            "severity": "Medium",
+        }
+    ],
+    "recommended_adjustments": [
+        {
+            "section": "Inspection",
+            "current_text": None,
+            "suggested_text": "Inspect pressure vessels at intervals set by the inspector.",
+            "explanation": "Aligns the SOP with the inspection interval requirement.",
+        }
+    ],
+    "compliance_score": 70,
+}
+
+
+class FakeAnthropicServer:
+    """Threaded HTTP server that answers Messages API calls after a delay."""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        latency_per_1k_chars: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """Initialize the server; ``port=0`` picks a free port."""
+        self.latency = latency
+        self.latency_per_1k_chars = latency_per_1k_chars
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to point the Claude client at."""
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAnthropicServer":
+        """Start serving in a background thread."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self) -> None:
+        """Reset the request counters."""
+        with self._lock:
+            self.requests = 0
+            self.peak_in_flight = 0
+
+    @staticmethod
+    def _prompt_text(request: Dict[str, Any]) -> str:
+        """Concatenate the string contents of the request messages."""
+        return "".join(
+            message.get("content", "") if isinstance(message.get("content"), str) else ""
+            for message in request.get("messages", [])
+        )
+
+    def _respond(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a Messages API response for a request body."""
+        prompt = self._prompt_text(request)
+        return {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "fake"),
+            "content": [{"type": "text", "text": json.dumps(FAKE_ANALYSIS)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 200},
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(
+                    self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}"
+                )
+                delay = (
+                    server.latency
+                    + server.latency_per_1k_chars * len(server._prompt_text(request)) / 1000
+                )
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    time.sleep(delay)
+                    payload = json.dumps(server._respond(request)).encode()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
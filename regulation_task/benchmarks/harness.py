@@ -0,0 +1,142 @@
+"""
+Timing, JSON result files and regression comparison shared by the benchmark suite.
+
+A result file holds run metadata and a list of results. Each result has a unique
+``name``, the ``params`` it ran with, timing ``stats`` in seconds and optional
+``extra`` values such as counts or per-stage timings.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Default directory for result files
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Time ``fn`` over ``repeat`` runs after ``warmup`` untimed runs."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return summarize_times(times)
+
+
+def summarize_times(times: List[float]) -> Dict[str, float]:
+    """Summarize run times in seconds."""
+    return {
+        "runs": len(times),
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def make_result(
+    name: str, stats: Dict[str, float], params: Optional[Dict[str, Any]] = None, **extra: Any
+) -> Dict[str, Any]:
+    """Build one benchmark result."""
+    return {"name": name, "params": params or {}, "stats": stats, "extra": extra}
+
+
+def _git_commit() -> Optional[str]:
+    """Get the current commit, if the benchmarks run from a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Describe the machine and code a run was made on."""
+    return {
+        "timestamp": time.time(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: Path, results: List[Dict[str, Any]]) -> Path:
+    """Write results and run metadata to a JSON file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"metadata": run_metadata(), "results": results}, f, indent=2)
+    return path
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    """Load a result file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1, stat: str = "median"
+) -> List[Dict[str, Any]]:
+    """
+    Compare two result files by benchmark name.
+
+    Each comparison has the relative ``change`` in ``stat`` (positive is slower) and
+    ``regression`` set when it is slower by more than ``threshold``.
+    """
+    baseline_by_name = {result["name"]: result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        previous = baseline_by_name.get(result["name"])
+        if previous is None:
+            continue
+        before, after = previous["stats"][stat], result["stats"][stat]
+        change = (after - before) / before if before > 0 else 0.0
+        comparisons.append(
+            {
+                "name": result["name"],
+                "before": before,
+                "after": after,
+                "change": change,
+                "regression": change > threshold,
+            }
+        )
+    return comparisons
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """Print a table of results."""
+    print(f"{'benchmark':<48} {'median':>10} {'best':>10} {'runs':>5}")
+    print("-" * 76)
+    for result in results:
+        stats = result["stats"]
+        print(
+            f"{result['name'][:48]:<48} {stats['median'] * 1000:>8.2f}ms "
+            f"{stats['best'] * 1000:>8.2f}ms {stats['runs']:>5}"
+        )
+
+
+def print_comparison(comparisons: List[Dict[str, Any]]) -> None:
+    """Print a comparison table, marking regressions."""
+    print(f"{'benchmark':<48} {'before':>10} {'after':>10} {'change':>8}")
+    print("-" * 80)
+    for c in comparisons:
+        flag = "  REGRESSION" if c["regression"] else ""
+        print(
+            f"{c['name'][:48]:<48} {c['before'] * 1000:>8.2f}ms {c['after'] * 1000:>8.2f}ms "
+            f"{c['change']:>+7.1%}{flag}"
+        )
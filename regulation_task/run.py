@@ -3,17 +3,23 @@
 Entry point script for the Regulatory Compliance Document Processor.
 """
 import sys
-import uvicorn
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--cli":
-        # Run in CLI mode
-        from app.cli import run_cli_analysis
-        import asyncio
-        asyncio.run(run_cli_analysis())
+    if len(sys.argv) > 1 and sys.argv[1] in ("--cli", "--ingest"):
+        # Run in CLI mode, without importing the web stack:
+        # --cli, or --ingest [directory] [--force] to index a directory of regulatory documents
+        from app.cli import main
+
+        main(sys.argv[1:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        # Run an analysis worker for the durable job queue (JOB_EXECUTION=queue)
+        from app.worker import main
+
+        main(sys.argv[2:])
     else:
         # Run in server mode
+        import uvicorn
         from app.core.config import settings
         print(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}")
         print(f"Server running at http://localhost:{settings.PORT}")
-        uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=settings.DEBUG) 
\ No newline at end of file
+        uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=settings.DEBUG) 
@@ -0,0 +1,13 @@
+import pytest
+
+from app.db.job_store import MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def job_store(request, tmp_path):
+    """A job store of each backend, empty."""
+    store = (
+        MemoryJobStore() if request.param == "memory" else SQLiteJobStore(tmp_path / "jobs.sqlite3")
+    )
+    yield store
+    store.close()
@@ -0,0 +1,29 @@
+from app.services.analysis_service import _is_reusable_report
+from app.services.llm_service import merge_section_analyses
+
+SECTION = {
+    "compliance_summary": "Mostly compliant",
+    "compliance_score": 80,
+    "discrepancies": [],
+    "recommended_adjustments": [],
+}
+
+
+def test_complete_analysis_is_reusable():
+    analysis = merge_section_analyses([SECTION, SECTION], [1, 1])
+
+    assert _is_reusable_report({"job_id": "job", "analysis": analysis})
+
+
+def test_failed_analysis_is_not_reusable():
+    analysis = merge_section_analyses([{"error": "timeout"}], [1])
+
+    assert not _is_reusable_report({"job_id": "job", "analysis": analysis})
+    assert not _is_reusable_report({"job_id": "job", "error": "boom"})
+
+
+def test_analysis_with_failed_sections_is_not_reusable():
+    analysis = merge_section_analyses([SECTION, {"error": "timeout"}], [1, 1])
+
+    assert analysis["section_errors"] == ["Section 2: timeout"]
+    assert not _is_reusable_report({"job_id": "job", "analysis": analysis})
@@ -0,0 +1,37 @@
+import fitz
+
+from app.services.document_service import _extract_clauses_from_pdf_pages
+from app.utils.document_processing import extract_regulatory_clauses, extract_text_from_pdf
+
+PAGES = [
+    "Section 1 Scope\nOperators shall keep records of every inspection for five years.\n",
+    "the records must be available on request.\nSection 2 Training\n",
+    "Employees must complete safety training before operating the equipment.\n",
+]
+
+
+def write_pdf(path):
+    with fitz.open() as doc:
+        for text in PAGES:
+            doc.new_page().insert_text((72, 72), text)
+        doc.save(path)
+    return str(path)
+
+
+def test_page_by_page_clauses_match_whole_text(tmp_path):
+    file_path = write_pdf(tmp_path / "regulation.pdf")
+    timings = {}
+
+    text, clauses = _extract_clauses_from_pdf_pages(file_path, timings)
+
+    assert text == extract_text_from_pdf(file_path)
+    assert clauses == extract_regulatory_clauses(text)
+    assert len(clauses) == 2
+    assert set(timings) == {"extraction", "clause_extraction"}
+
+
+def test_unreadable_pdf_has_no_clauses(tmp_path):
+    file_path = tmp_path / "broken.pdf"
+    file_path.write_bytes(b"not a pdf")
+
+    assert _extract_clauses_from_pdf_pages(str(file_path), {}) == ("", [])
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.models.embedding_cache import EmbeddingStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty store holding up to 100 vectors."""
+    store = EmbeddingStore(tmp_path / "embeddings.sqlite3", max_entries=100)
+    yield store
+    store.close()
+
+
+def vectors(start: int, count: int):
+    return {
+        i.to_bytes(16, "big"): np.full(4, i, dtype=np.float32) for i in range(start, start + count)
+    }
+
+
+def test_round_trip(store):
+    store.put_many(vectors(0, 3))
+
+    found = store.get_many([(1).to_bytes(16, "big"), (7).to_bytes(16, "big")])
+
+    assert list(found) == [(1).to_bytes(16, "big")]
+    assert found[(1).to_bytes(16, "big")].tolist() == [1.0] * 4
+
+
+def test_store_stays_within_max_entries(store):
+    for start in range(0, 500, 10):
+        store.put_many(vectors(start, 10))
+        assert store.count() <= store.max_entries
+
+    # The newest vectors are kept
+    assert (499).to_bytes(16, "big") in store.get_many([(499).to_bytes(16, "big")])
+    assert not store.get_many([(0).to_bytes(16, "big")])
+
+
+def test_replacing_vectors_does_not_evict(store):
+    for _ in range(20):
+        store.put_many(vectors(0, 100))
+
+    assert store.count() == 100
+
+
+def test_eviction_accounts_for_other_writers(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    first = EmbeddingStore(path, max_entries=100)
+    second = EmbeddingStore(path, max_entries=100)
+    first.put_many(vectors(0, 1))
+    second.put_many(vectors(1, 90))
+
+    # The first store counts again once its own writes pass the limit
+    first.put_many(vectors(91, 100))
+
+    assert first.count() <= 100
+    first.close()
+    second.close()
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from app.db.job_queue import JobQueue
+
+# Short enough for leases to expire within a test
+VISIBILITY_TIMEOUT = 0.05
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """An empty queue with a short visibility timeout and up to two attempts per job."""
+    queue = JobQueue(
+        tmp_path / "queue.sqlite3", visibility_timeout=VISIBILITY_TIMEOUT, max_attempts=2
+    )
+    yield queue
+    queue.close()
+
+
+def expire_leases():
+    time.sleep(VISIBILITY_TIMEOUT * 2)
+
+
+def test_claim_in_priority_then_submission_order(queue):
+    queue.enqueue("low", {"n": 1}, priority=10)
+    queue.enqueue("first", {"n": 2})
+    queue.enqueue("second", {"n": 3})
+
+    claimed = [queue.claim("w1")["job_id"] for _ in range(3)]
+
+    assert claimed == ["first", "second", "low"]
+    assert queue.claim("w1") is None
+
+
+def test_claim_leases_job_to_one_worker(queue):
+    queue.enqueue("job", {"sop_file": "sop.docx"})
+
+    job = queue.claim("w1")
+
+    assert job["payload"] == {"sop_file": "sop.docx"}
+    assert job["attempt"] == 1
+    assert queue.claim("w2") is None
+    assert queue.stats()["running"] == 1
+
+
+def test_enqueue_rejects_when_full(queue):
+    assert queue.enqueue("a", {}, max_queued=1)
+    assert not queue.enqueue("b", {}, max_queued=1)
+    assert queue.rejected == 1
+    # Enqueueing a job that is already queued is not a rejection
+    assert queue.enqueue("a", {}, max_queued=1)
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    queue.enqueue("job", {})
+    queue.claim("w1")
+
+    for _ in range(4):
+        time.sleep(VISIBILITY_TIMEOUT / 2)
+        assert queue.heartbeat("job", "w1") == "renewed"
+        assert queue.requeue_expired() == []
+
+    assert queue.claim("w2") is None
+    assert queue.heartbeat("job", "w2") == "lost"
+
+
+def test_expired_lease_is_requeued_and_claimed_again(queue):
+    queue.enqueue("job", {})
+    queue.claim("w1")
+    expire_leases()
+
+    assert queue.requeue_expired() == []
+    job = queue.claim("w2")
+
+    assert job["job_id"] == "job"
+    assert job["attempt"] == 2
+    # The first worker lost the job and cannot record its outcome
+    assert queue.heartbeat("job", "w1") == "lost"
+    assert not queue.finish("job", "w1")
+    assert queue.finish("job", "w2")
+    assert queue.stats()["completed"] == 1
+
+
+def test_job_fails_after_max_attempts(queue):
+    queue.enqueue("job", {})
+    for _ in range(2):
+        queue.claim("w1")
+        expire_leases()
+        abandoned = queue.requeue_expired()
+
+    assert [job["job_id"] for job in abandoned] == ["job"]
+    assert abandoned[0]["attempts"] == 2
+    assert queue.claim("w1") is None
+    assert queue.stats()["failed"] == 1
+
+
+def test_cancel_queued_job(queue):
+    queue.enqueue("job", {})
+
+    assert queue.cancel("job") == "cancelled"
+    assert queue.claim("w1") is None
+    assert queue.cancel("job") is None
+
+
+def test_cancel_running_job_stops_it_at_next_heartbeat(queue):
+    queue.enqueue("job", {})
+    queue.claim("w1")
+
+    assert queue.cancel("job") == "cancelling"
+    assert queue.heartbeat("job", "w1") == "cancelled"
+    assert queue.finish("job", "w1", "cancelled")
+    assert queue.stats()["cancelled"] == 1
+
+
+def test_cancel_requested_job_is_not_requeued_when_its_lease_expires(queue):
+    queue.enqueue("job", {})
+    queue.claim("w1")
+    queue.cancel("job")
+    expire_leases()
+
+    assert queue.requeue_expired() == []
+    assert queue.claim("w2") is None
+    assert queue.stats()["cancelled"] == 1
+
+
+def test_release_hands_job_back(queue):
+    queue.enqueue("job", {})
+    queue.claim("w1")
+
+    assert queue.release("job", "w1")
+    assert queue.position("job") == 1
+    assert queue.claim("w2")["attempt"] == 2
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.services.job_scheduler import DuplicateJob, JobQueueFull, JobScheduler
+
+
+def test_submit_rejects_duplicate_job_id():
+    async def run():
+        scheduler = JobScheduler(max_workers=1, max_queue=5)
+        await scheduler.start()
+        release = asyncio.Event()
+        first = scheduler.submit("job", release.wait)
+        await asyncio.sleep(0)
+
+        with pytest.raises(DuplicateJob):
+            scheduler.submit("job", release.wait)
+
+        release.set()
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return first
+
+    assert asyncio.run(run()).status == "completed"
+
+
+def test_finished_job_id_can_be_submitted_again():
+    async def run():
+        scheduler = JobScheduler(max_workers=1, max_queue=5)
+        await scheduler.start()
+        scheduler.submit("job", lambda: asyncio.sleep(0))
+        await asyncio.sleep(0.01)
+        again = scheduler.submit("job", lambda: asyncio.sleep(0))
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return again
+
+    assert asyncio.run(run()).status == "completed"
+
+
+def test_submit_rejects_when_full():
+    async def run():
+        scheduler = JobScheduler(max_workers=1, max_queue=1)
+        await scheduler.start()
+        release = asyncio.Event()
+        scheduler.submit("running", release.wait)
+        await asyncio.sleep(0)
+        scheduler.submit("queued", release.wait)
+
+        with pytest.raises(JobQueueFull):
+            scheduler.submit("rejected", release.wait)
+
+        release.set()
+        await scheduler.stop()
+        return scheduler.rejected
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from app.db.job_store import JobStore, SQLiteJobStore, is_stale, make_job_id
+
+
+def test_job_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+
+def test_update_merges_fields(job_store):
+    assert job_store.update("job", {"status": "queued", "queued_at": 1.0})
+    assert job_store.update("job", {"status": "processing"})
+
+    assert job_store.get("job") == {"status": "processing", "queued_at": 1.0}
+    assert job_store.get_status("job") == "processing"
+    assert job_store.get_status("unknown") is None
+
+
+def test_replace_drops_previous_fields(job_store):
+    job_store.update("job", {"status": "failed", "error": "boom"})
+    assert job_store.update(
+        "job", {"status": "queued"}, from_statuses=(None, "failed"), replace=True
+    )
+
+    assert job_store.get("job") == {"status": "queued"}
+
+
+def test_from_statuses_none_only_creates(job_store):
+    assert job_store.update("job", {"status": "completed"}, from_statuses=(None,))
+    assert not job_store.update("job", {"status": "failed"}, from_statuses=(None,))
+
+    assert job_store.get_status("job") == "completed"
+
+
+def test_only_one_worker_moves_a_job_out_of_queued(job_store):
+    job_store.update("job", {"status": "queued"})
+    barrier = threading.Barrier(8)
+    results = []
+
+    def start(worker: int):
+        barrier.wait()
+        fields = {"status": "processing", "worker": worker}
+        results.append(job_store.update("job", fields, from_statuses=("queued",)))
+
+    threads = [threading.Thread(target=start, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert job_store.get_status("job") == "processing"
+
+
+def test_cancel_while_queued_is_not_started(job_store):
+    job_store.update("job", {"status": "queued"})
+    assert job_store.update("job", {"status": "cancelled"}, from_statuses=("queued",))
+
+    assert not job_store.update("job", {"status": "processing"}, from_statuses=("queued",))
+    assert not job_store.update("job", {"status": "completed"}, from_statuses=("processing",))
+    assert job_store.get_status("job") == "cancelled"
+
+
+def test_cancel_after_start_is_rejected(job_store):
+    job_store.update("job", {"status": "queued"})
+    job_store.update("job", {"status": "processing"}, from_statuses=("queued",))
+
+    assert not job_store.update("job", {"status": "cancelled"}, from_statuses=("queued",))
+    assert job_store.get_status("job") == "processing"
+
+
+def test_stale_job_can_be_taken_over(job_store):
+    stopped = {"status": "processing", "owner": "host:1", "heartbeat_at": time.time() - 120}
+    job_store.update("job", stopped)
+    restart = {"status": "queued"}
+
+    assert not job_store.update("job", restart, from_statuses=(None, "completed"), replace=True)
+    assert job_store.update(
+        "job", restart, from_statuses=(None, "completed"), replace=True, stale_after=60
+    )
+    assert job_store.get("job") == restart
+
+
+def test_heartbeat_keeps_job_from_going_stale(job_store):
+    job_store.update(
+        "job", {"status": "processing", "owner": "host:1", "heartbeat_at": time.time() - 120}
+    )
+    job_store.update(
+        "other", {"status": "processing", "owner": "host:2", "heartbeat_at": time.time() - 120}
+    )
+
+    assert job_store.heartbeat("host:1") == 1
+
+    assert not is_stale(job_store.get("job"), 60)
+    assert is_stale(job_store.get("other"), 60)
+    assert not job_store.update("job", {"status": "queued"}, from_statuses=(None,), stale_after=60)
+
+
+def test_job_without_owner_is_never_stale(job_store):
+    job_store.update("job", {"status": "queued"})
+
+    assert not is_stale(job_store.get("job"), 0)
+    assert not job_store.update("job", {"status": "queued"}, from_statuses=(None,), stale_after=0)
+
+
+def test_delete(job_store):
+    job_store.update("job", {"status": "completed"})
+
+    assert job_store.delete("job")
+    assert not job_store.delete("job")
+    assert job_store.get("job") is None
+
+
+def test_sqlite_transitions_are_atomic_across_connections(tmp_path):
+    # Each store has its own connection, like separate worker processes
+    stores = [SQLiteJobStore(tmp_path / "jobs.sqlite3") for _ in range(4)]
+    stores[0].update("job", {"status": "queued"})
+    barrier = threading.Barrier(len(stores))
+    results = []
+
+    def start(store: SQLiteJobStore):
+        barrier.wait()
+        results.append(store.update("job", {"status": "processing"}, from_statuses=("queued",)))
+
+    threads = [threading.Thread(target=start, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for store in stores:
+        store.close()
+
+    assert results.count(True) == 1
+
+
+def test_job_ids_are_unique_and_sort_by_submission():
+    job_ids = [make_job_id("job") for _ in range(1000)]
+
+    assert len(set(job_ids)) == len(job_ids)
+    assert all(job_id.startswith("job_") for job_id in job_ids)
+    times = [int(job_id.split("_")[1]) for job_id in job_ids]
+    assert times == sorted(times)
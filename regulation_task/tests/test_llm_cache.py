@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from app.services.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """An empty cache holding up to 1000 bytes of responses, without expiry."""
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", max_bytes=1000, ttl=0)
+    yield cache
+    cache.close()
+
+
+def test_round_trip(cache):
+    cache.set("key", "response")
+
+    assert cache.get("key") == "response"
+    assert cache.get("other") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_stays_within_max_bytes(cache):
+    for i in range(100):
+        cache.set(f"key{i}", "x" * 100)
+        assert cache.stats()["bytes"] <= cache.max_bytes
+
+    # The most recently used responses are kept
+    assert cache.get("key99") is not None
+    assert cache.get("key0") is None
+
+
+def test_replacing_responses_does_not_evict(cache):
+    for _ in range(50):
+        cache.set("key", "x" * 500)
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (1, 500, 0)
+
+
+def test_expired_responses_are_evicted(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", max_bytes=1000, ttl=0.05)
+    cache.set("old", "x" * 600)
+    time.sleep(0.1)
+    cache.set("new", "x" * 600)
+
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+    assert cache.evictions == 1
+    cache.close()
+
+
+def test_eviction_accounts_for_other_writers(tmp_path):
+    path = tmp_path / "llm.sqlite3"
+    first = LLMResponseCache(path, max_bytes=1000, ttl=0)
+    second = LLMResponseCache(path, max_bytes=1000, ttl=0)
+    first.set("first", "x" * 100)
+    second.set("second", "x" * 800)
+
+    # The first cache sums the stored sizes again once its own writes pass the limit
+    first.set("third", "x" * 950)
+
+    assert first.stats()["bytes"] <= 1000
+    first.close()
+    second.close()
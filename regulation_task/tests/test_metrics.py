@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import app.services.analysis_service as analysis_service
+from app.api.endpoints.metrics import get_metrics
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.job_queue import JobQueue
+from app.services.job_scheduler import JobScheduler
+
+
+def gauges():
+    return (
+        metrics.get_sample_value("regulation_job_queue_depth"),
+        metrics.get_sample_value("regulation_jobs_in_flight"),
+    )
+
+
+def test_job_gauges_follow_the_job_scheduler(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_EXECUTION", "local")
+
+    async def run():
+        scheduler = JobScheduler(max_workers=1, max_queue=5)
+        monkeypatch.setattr(analysis_service, "job_scheduler", scheduler)
+        await scheduler.start()
+        release = asyncio.Event()
+        for job_id in ("running", "queued_1", "queued_2"):
+            scheduler.submit(job_id, release.wait)
+        await asyncio.sleep(0)
+        await get_metrics()
+        release.set()
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+    assert gauges() == (2, 1)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = JobQueue(tmp_path / "queue.sqlite3")
+    monkeypatch.setattr(analysis_service, "job_queue", queue)
+    yield queue
+    queue.close()
+
+
+def test_job_gauges_follow_the_durable_queue(monkeypatch, queue):
+    monkeypatch.setattr(settings, "JOB_EXECUTION", "queue")
+    for job_id in ("leased", "queued_1", "queued_2", "queued_3"):
+        queue.enqueue(job_id, {})
+    queue.claim("worker")
+
+    asyncio.run(get_metrics())
+
+    assert gauges() == (3, 1)